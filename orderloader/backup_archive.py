@@ -0,0 +1,627 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Archivo de Backups - OrderLoader
+Un archivo append-only por día (o por sesión) con índice por orden
+"""
+
+import os
+import sys
+import bz2
+import json
+import lzma
+import zlib
+import gzip
+import time
+import struct
+import hashlib
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+ARCHIVE_SUFFIX = '.olbk'
+INDEX_SUFFIX = '.idx'
+
+# Cabecera de cada registro: magic, códec, largo del nombre, largo del contenido
+RECORD_MAGIC = b'OLB1'
+_RECORD_HEADER = struct.Struct('>4sBHI')
+_LENGTH_OFFSET = struct.calcsize('>4sBH')
+_LENGTH = struct.Struct('>I')
+
+CODECS = {
+    'none': 0,
+    'zlib': 1,
+    'gzip': 2,
+    'lzma': 3,
+    'bz2': 4,
+}
+_CODEC_NAMES = {codec_id: name for name, codec_id in CODECS.items()}
+
+
+def compress(raw: bytes, codec: str, level: int) -> bytes:
+    """
+    Comprimir contenido con el códec indicado.
+
+    Args:
+        raw: Contenido original
+        codec: Nombre del códec (ver CODECS)
+        level: Nivel de compresión (1 = rápido)
+
+    Returns:
+        bytes: Contenido comprimido
+    """
+    if codec == 'none':
+        return raw
+    if codec == 'zlib':
+        return zlib.compress(raw, level)
+    if codec == 'gzip':
+        return gzip.compress(raw, compresslevel=level)
+    if codec == 'lzma':
+        return lzma.compress(raw, preset=min(max(level, 0), 9))
+    if codec == 'bz2':
+        return bz2.compress(raw, compresslevel=min(max(level, 1), 9))
+    raise ValueError(f"Códec de backup desconocido: {codec}")
+
+
+def compressor(codec: str, level: int):
+    """
+    Crear un compresor incremental (métodos compress y flush).
+
+    Produce el mismo formato que compress(), así que los registros se
+    leen con decompress() sin importar cómo se escribieron.
+
+    Args:
+        codec: Nombre del códec (ver CODECS)
+        level: Nivel de compresión (1 = rápido)
+
+    Returns:
+        Compresor incremental, o None para 'none'
+    """
+    if codec == 'none':
+        return None
+    if codec == 'zlib':
+        return zlib.compressobj(level)
+    if codec == 'gzip':
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if codec == 'lzma':
+        return lzma.LZMACompressor(preset=min(max(level, 0), 9))
+    if codec == 'bz2':
+        return bz2.BZ2Compressor(min(max(level, 1), 9))
+    raise ValueError(f"Códec de backup desconocido: {codec}")
+
+
+def decompress(payload: bytes, codec: str) -> bytes:
+    """Descomprimir contenido con el códec indicado"""
+    if codec == 'none':
+        return payload
+    if codec == 'zlib':
+        return zlib.decompress(payload)
+    if codec == 'gzip':
+        return gzip.decompress(payload)
+    if codec == 'lzma':
+        return lzma.decompress(payload)
+    if codec == 'bz2':
+        return bz2.decompress(payload)
+    raise ValueError(f"Códec de backup desconocido: {codec}")
+
+
+class BackupArchive:
+    """
+    Archivo de backups append-only.
+
+    Cada orden se agrega como un registro comprimido de forma independiente
+    al archivo de la sesión o del día, y se anota en un índice JSONL con
+    nombre, offset, largo, códec y hash SHA-256. Restaurar una orden es
+    leer el índice, hacer seek y descomprimir un solo registro. Los
+    registros llevan su propia cabecera, así que el índice se puede
+    reconstruir a partir del archivo.
+    """
+
+    def __init__(self, backup_path: Path, codec: str = 'zlib', level: int = 1,
+                 rotation: str = 'daily'):
+        """
+        Inicializar archivo de backups.
+
+        Args:
+            backup_path: Directorio de backups
+            codec: Códec de compresión ('none', 'zlib', 'gzip', 'lzma', 'bz2')
+            level: Nivel de compresión
+            rotation: 'daily' (un archivo por día) o 'session' (uno por ejecución)
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Códec de backup desconocido: {codec}")
+        if rotation not in ('daily', 'session'):
+            raise ValueError(f"Rotación de backup desconocida: {rotation}")
+
+        self.backup_path = backup_path
+        self.codec = codec
+        self.level = level
+        self.rotation = rotation
+        self._session_key = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self._key: Optional[str] = None
+        self._archive = None
+        self._index = None
+
+    def _current_key(self) -> str:
+        if self.rotation == 'session':
+            return self._session_key
+        return datetime.now().strftime('%Y%m%d')
+
+    @property
+    def current_archive(self) -> Optional[Path]:
+        """Ruta del archivo abierto actualmente (None si no hay)"""
+        if self._key is None:
+            return None
+        return self.backup_path / f"orders_{self._key}{ARCHIVE_SUFFIX}"
+
+    def _open(self, key: str):
+        self.close()
+        self._key = key
+        archive_path = self.current_archive
+        self._archive = open(archive_path, 'ab')
+        self._index = open(archive_path.with_suffix(INDEX_SUFFIX), 'a', encoding='utf-8')
+
+    def append(self, name: str, raw: bytes) -> Dict[str, Any]:
+        """
+        Agregar el contenido de una orden al archivo.
+
+        Args:
+            name: Nombre del archivo de la orden
+            raw: Bytes originales del archivo
+
+        Returns:
+            Dict[str, Any]: Entrada de índice escrita
+        """
+        key = self._current_key()
+        if key != self._key or self._archive is None:
+            self._open(key)
+
+        payload = compress(raw, self.codec, self.level)
+        name_bytes = name.encode('utf-8')
+        header = _RECORD_HEADER.pack(RECORD_MAGIC, CODECS[self.codec], len(name_bytes), len(payload))
+
+        record_offset = self._archive.tell()
+        self._archive.write(header + name_bytes + payload)
+        self._archive.flush()
+
+        entry = {
+            'name': name,
+            'offset': record_offset + _RECORD_HEADER.size + len(name_bytes),
+            'length': len(payload),
+            'size': len(raw),
+            'codec': self.codec,
+            'sha256': hashlib.sha256(raw).hexdigest(),
+            'timestamp': datetime.now().isoformat()
+        }
+        # El índice se escribe después de los datos: un índice nunca apunta
+        # a un registro incompleto
+        self._index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._index.flush()
+        return entry
+
+    def append_file(self, name: str, file_path: Path, chunk_size: int = 1024 * 1024) -> Dict[str, Any]:
+        """
+        Agregar una orden leyendo el archivo por bloques.
+
+        Para órdenes grandes: el contenido se comprime y se escribe bloque a
+        bloque sin tenerlo completo en memoria. El largo del registro se
+        completa al final en la cabecera; si el proceso cae antes, el índice
+        no apunta al registro.
+
+        Args:
+            name: Nombre del archivo de la orden
+            file_path: Ruta del archivo a respaldar
+            chunk_size: Bytes leídos por bloque
+
+        Returns:
+            Dict[str, Any]: Entrada de índice escrita
+        """
+        key = self._current_key()
+        if key != self._key or self._archive is None:
+            self._open(key)
+
+        codec = compressor(self.codec, self.level)
+        name_bytes = name.encode('utf-8')
+        digest = hashlib.sha256()
+        size = 0
+        length = 0
+
+        record_offset = self._archive.tell()
+        self._archive.write(_RECORD_HEADER.pack(RECORD_MAGIC, CODECS[self.codec], len(name_bytes), 0))
+        self._archive.write(name_bytes)
+        with open(file_path, 'rb') as source:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+                payload = codec.compress(chunk) if codec else chunk
+                self._archive.write(payload)
+                length += len(payload)
+        if codec:
+            payload = codec.flush()
+            self._archive.write(payload)
+            length += len(payload)
+        self._archive.flush()
+
+        # El archivo está abierto en modo append: el largo se escribe con
+        # un descriptor aparte
+        with open(self.current_archive, 'r+b') as patch:
+            patch.seek(record_offset + _LENGTH_OFFSET)
+            patch.write(_LENGTH.pack(length))
+
+        entry = {
+            'name': name,
+            'offset': record_offset + _RECORD_HEADER.size + len(name_bytes),
+            'length': length,
+            'size': size,
+            'codec': self.codec,
+            'sha256': digest.hexdigest(),
+            'timestamp': datetime.now().isoformat()
+        }
+        self._index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._index.flush()
+        return entry
+
+    def sync(self):
+        """Forzar a disco el archivo y el índice abiertos"""
+        if self._archive is not None:
+            self._archive.flush()
+            os.fsync(self._archive.fileno())
+            self._index.flush()
+            os.fsync(self._index.fileno())
+
+    def close(self):
+        """Cerrar el archivo abierto"""
+        if self._archive is not None:
+            self._archive.close()
+            self._index.close()
+        self._archive = None
+        self._index = None
+
+    def cleanup(self, max_archives: int) -> List[Path]:
+        """
+        Eliminar archivos completos antiguos, conservando los más recientes.
+
+        Los nombres llevan la fecha, así que se ordenan sin hacer stat.
+
+        Args:
+            max_archives: Número de archivos a conservar
+
+        Returns:
+            List[Path]: Archivos eliminados
+        """
+        archives = list_archives(self.backup_path)
+        current = self.current_archive
+        deleted = []
+        for archive_path in archives[:-max_archives] if max_archives > 0 else archives:
+            if archive_path == current:
+                continue
+            archive_path.unlink(missing_ok=True)
+            archive_path.with_suffix(INDEX_SUFFIX).unlink(missing_ok=True)
+            deleted.append(archive_path)
+        return deleted
+
+
+class BackupWriter:
+    """
+    Escritor de backups en segundo plano.
+
+    Los bytes de cada orden se entregan en la ingesta y un hilo dedicado
+    los agrega al BackupArchive, fuera del camino crítico de SAP. Cada
+    lote de registros se confirma con un fsync (group commit) antes de
+    resolver sus futures, así que un future resuelto significa backup
+    durable. La cola está acotada por cantidad y por bytes: si el disco
+    es lento, submit() bloquea en lugar de acumular memoria.
+    """
+
+    def __init__(self, archive: BackupArchive, max_queue: int = 64,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 on_written: Optional[Callable[[bool, int, float], None]] = None):
+        """
+        Inicializar escritor.
+
+        Args:
+            archive: Archivo de backups destino
+            max_queue: Máximo de backups en cola
+            max_bytes: Máximo de bytes en cola
+            on_written: Callback (éxito, profundidad de cola, lag en segundos)
+        """
+        self.archive = archive
+        self.max_queue = max_queue
+        self.max_bytes = max_bytes
+        self.on_written = on_written
+
+        self._jobs = deque()
+        self._queued_bytes = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+
+    @property
+    def depth(self) -> int:
+        """Backups en cola pendientes de escribir"""
+        with self._condition:
+            return len(self._jobs)
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._closing = False
+            self._thread = threading.Thread(target=self._run, name="BackupWriter", daemon=True)
+            self._thread.start()
+
+    def submit(self, name: str, raw: bytes) -> Future:
+        """
+        Encolar el backup de una orden.
+
+        Bloquea mientras la cola esté llena (back-pressure). Un único
+        backup mayor que max_bytes se acepta si la cola está vacía.
+
+        Args:
+            name: Nombre del archivo de la orden
+            raw: Bytes originales del archivo
+
+        Returns:
+            Future: Se resuelve con la entrada de índice cuando el backup es durable
+        """
+        return self._enqueue(name, raw, len(raw))
+
+    def submit_file(self, name: str, file_path: Path) -> Future:
+        """
+        Encolar el backup de una orden grande que se lee desde disco.
+
+        El archivo se lee por bloques en el hilo escritor (ver
+        BackupArchive.append_file), así que no ocupa memoria en la cola.
+        Debe seguir en su lugar hasta que el future se resuelva.
+
+        Args:
+            name: Nombre del archivo de la orden
+            file_path: Ruta del archivo a respaldar
+
+        Returns:
+            Future: Se resuelve con la entrada de índice cuando el backup es durable
+        """
+        return self._enqueue(name, Path(file_path), 0)
+
+    def _enqueue(self, name: str, source: Any, size: int) -> Future:
+        future = Future()
+        with self._condition:
+            self._ensure_started()
+            while self._jobs and (len(self._jobs) >= self.max_queue
+                                  or self._queued_bytes + size > self.max_bytes):
+                self._condition.wait()
+            self._jobs.append((name, source, size, time.monotonic(), future))
+            self._queued_bytes += size
+            self._condition.notify_all()
+        return future
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._jobs and not self._closing:
+                    self._condition.wait()
+                if not self._jobs:
+                    return
+                batch = list(self._jobs)
+                self._jobs.clear()
+
+            written = []
+            for name, source, _, submitted_at, future in batch:
+                try:
+                    if isinstance(source, Path):
+                        entry = self.archive.append_file(name, source)
+                    else:
+                        entry = self.archive.append(name, source)
+                    written.append((entry, submitted_at, future))
+                except Exception as e:
+                    self._finish(future, False, submitted_at, error=e)
+
+            try:
+                if written:
+                    self.archive.sync()
+                for entry, submitted_at, future in written:
+                    self._finish(future, True, submitted_at, entry=entry)
+            except Exception as e:
+                for _, submitted_at, future in written:
+                    self._finish(future, False, submitted_at, error=e)
+
+            with self._condition:
+                self._queued_bytes -= sum(size for _, _, size, _, _ in batch)
+                self._condition.notify_all()
+
+    def _finish(self, future: Future, success: bool, submitted_at: float,
+                entry: Optional[Dict[str, Any]] = None, error: Optional[Exception] = None):
+        if success:
+            future.set_result(entry)
+        else:
+            future.set_exception(error)
+        if self.on_written:
+            self.on_written(success, self.depth, time.monotonic() - submitted_at)
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Escribir lo pendiente y detener el hilo.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos (None = sin límite)
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def list_archives(backup_path: Path) -> List[Path]:
+    """
+    Listar archivos de backup del más antiguo al más reciente.
+
+    Args:
+        backup_path: Directorio de backups
+
+    Returns:
+        List[Path]: Archivos .olbk ordenados por nombre (fecha)
+    """
+    try:
+        with os.scandir(backup_path) as entries:
+            names = sorted(entry.name for entry in entries
+                           if entry.name.startswith('orders_') and entry.name.endswith(ARCHIVE_SUFFIX))
+    except FileNotFoundError:
+        return []
+    return [backup_path / name for name in names]
+
+
+def read_index(archive_path: Path) -> List[Dict[str, Any]]:
+    """
+    Leer el índice de un archivo (reconstruyéndolo si falta).
+
+    Args:
+        archive_path: Ruta al archivo .olbk
+
+    Returns:
+        List[Dict[str, Any]]: Entradas del índice en orden de escritura
+    """
+    index_path = archive_path.with_suffix(INDEX_SUFFIX)
+    if not index_path.exists():
+        return rebuild_index(archive_path)
+
+    entries = []
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Línea final truncada por una caída: se ignora
+                continue
+    return entries
+
+
+def iter_records(archive_path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Recorrer los registros de un archivo leyendo sus cabeceras.
+
+    Se detiene en el primer registro incompleto (caída a mitad de escritura).
+
+    Args:
+        archive_path: Ruta al archivo .olbk
+
+    Yields:
+        Dict[str, Any]: name, offset, length y codec de cada registro
+    """
+    with open(archive_path, 'rb') as f:
+        while True:
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            magic, codec_id, name_len, length = _RECORD_HEADER.unpack(header)
+            if magic != RECORD_MAGIC or codec_id not in _CODEC_NAMES:
+                return
+            name_bytes = f.read(name_len)
+            offset = f.tell()
+            f.seek(length, os.SEEK_CUR)
+            if len(name_bytes) < name_len or f.tell() > os.fstat(f.fileno()).st_size:
+                return
+            yield {
+                'name': name_bytes.decode('utf-8'),
+                'offset': offset,
+                'length': length,
+                'codec': _CODEC_NAMES[codec_id]
+            }
+
+
+def rebuild_index(archive_path: Path) -> List[Dict[str, Any]]:
+    """
+    Reconstruir el índice de un archivo a partir de sus registros.
+
+    Args:
+        archive_path: Ruta al archivo .olbk
+
+    Returns:
+        List[Dict[str, Any]]: Entradas reconstruidas (también se escriben a disco)
+    """
+    entries = []
+    with open(archive_path, 'rb') as f:
+        for record in iter_records(archive_path):
+            f.seek(record['offset'])
+            raw = decompress(f.read(record['length']), record['codec'])
+            record['size'] = len(raw)
+            record['sha256'] = hashlib.sha256(raw).hexdigest()
+            entries.append(record)
+
+    with open(archive_path.with_suffix(INDEX_SUFFIX), 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return entries
+
+
+def restore(backup_path: Path, name: str) -> Optional[bytes]:
+    """
+    Restaurar la copia más reciente de una orden.
+
+    Args:
+        backup_path: Directorio de backups
+        name: Nombre del archivo de la orden (ej. TEST001.json)
+
+    Returns:
+        Optional[bytes]: Contenido original, o None si no hay backup
+
+    Raises:
+        ValueError: Si el hash del contenido restaurado no coincide
+    """
+    for archive_path in reversed(list_archives(backup_path)):
+        matches = [entry for entry in read_index(archive_path) if entry['name'] == name]
+        if not matches:
+            continue
+        entry = matches[-1]
+        with open(archive_path, 'rb') as f:
+            f.seek(entry['offset'])
+            raw = decompress(f.read(entry['length']), entry['codec'])
+        if 'sha256' in entry and hashlib.sha256(raw).hexdigest() != entry['sha256']:
+            raise ValueError(f"Hash inválido para {name} en {archive_path.name}")
+        return raw
+    return None
+
+
+def main():
+    """Herramienta de línea de comandos para listar y restaurar backups"""
+    from config import PROJECT_ROOT, BACKUP_CONFIG
+
+    parser = argparse.ArgumentParser(description="Backups de órdenes - OrderLoader")
+    parser.add_argument('--list', action='store_true', help="Listar archivos y órdenes respaldadas")
+    parser.add_argument('--restore', metavar='NOMBRE', help="Restaurar la orden indicada (ej. TEST001.json)")
+    parser.add_argument('--output', metavar='RUTA', help="Destino de la orden restaurada")
+    args = parser.parse_args()
+
+    backup_path = PROJECT_ROOT / BACKUP_CONFIG['backup_path']
+
+    if args.restore:
+        raw = restore(backup_path, args.restore)
+        if raw is None:
+            print(f"❌ No hay backup de {args.restore}")
+            return 1
+        output = Path(args.output) if args.output else Path(args.restore)
+        output.write_bytes(raw)
+        print(f"✅ Restaurado: {args.restore} → {output}")
+        return 0
+
+    for archive_path in list_archives(backup_path):
+        entries = read_index(archive_path)
+        print(f"📦 {archive_path.name} ({len(entries)} órdenes)")
+        if args.list:
+            for entry in entries:
+                print(f"   • {entry['name']} ({entry.get('size', '?')} bytes, {entry['codec']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Captura de Pantalla - OrderLoader
+Cuadros por segundo de cada backend de screen_capture, capturando la
+pantalla completa y una región, hasta tener el arreglo en escala de grises
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from screen_capture import FakeCapture, MSSCapture, PyAutoGUICapture
+
+BACKENDS = ('mss', 'pyautogui', 'fake')
+
+
+def measure(capture, region, seconds: float):
+    """Capturar durante seconds y devolver (cuadros por segundo, forma de la captura)"""
+    frame = capture.grab(region)  # La primera captura abre la conexión
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        frame = capture.grab(region)
+        count += 1
+    return count / (time.perf_counter() - start), np.asarray(frame).shape
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de captura de pantalla")
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS),
+                        help="Backends a medir")
+    parser.add_argument('--region', type=int, nargs=2, default=[400, 300], metavar=('ANCHO', 'ALTO'),
+                        help="Tamaño de la región (centrada en pantalla)")
+    parser.add_argument('--fake-size', type=int, nargs=2, default=[1920, 1080], metavar=('ANCHO', 'ALTO'),
+                        help="Resolución del cuadro del backend fake")
+    parser.add_argument('--seconds', type=float, default=2.0, help="Duración de cada medición")
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print("📊 BENCHMARK DE CAPTURA DE PANTALLA (cuadros por segundo, hasta escala de grises)")
+    print("=" * 78)
+    print(f"{'Backend':<10} | {'Captura':<10} | {'Tamaño':>11} | {'fps':>9} | {'ms/cuadro':>10}")
+    print("-" * 78)
+
+    failures = 0
+    for name in args.backends:
+        try:
+            if name == 'fake':
+                width, height = args.fake_size
+                frame = np.random.default_rng(0).integers(0, 256, (height, width), dtype=np.uint8)
+                capture = FakeCapture([frame])
+            else:
+                capture = MSSCapture() if name == 'mss' else PyAutoGUICapture()
+            width, height = capture.size()
+        except Exception as e:
+            failures += 1
+            print(f"{name:<10} | ❌ no disponible: {e}")
+            continue
+
+        region_width, region_height = min(args.region[0], width), min(args.region[1], height)
+        region = ((width - region_width) // 2, (height - region_height) // 2, region_width, region_height)
+        try:
+            for label, box in (('completa', None), ('región', region)):
+                fps, shape = measure(capture, box, args.seconds)
+                size = f"{shape[1]}x{shape[0]}"
+                print(f"{name:<10} | {label:<10} | {size:>11} | {fps:>9.1f} | {1000 / fps:>8.2f}ms")
+        except Exception as e:
+            failures += 1
+            print(f"{name:<10} | ❌ error capturando: {e}")
+        finally:
+            capture.close()
+
+    print("=" * 78)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
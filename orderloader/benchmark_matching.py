@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Búsqueda de Plantillas - OrderLoader
+Compara locateOnScreen (pyscreeze), OpenCV a resolución completa con
+plantillas en caché y la búsqueda piramidal gruesa a fina, en capturas
+sintéticas de distintas resoluciones
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pyscreeze
+
+from vision import Frame, TemplateRegistry, match_template
+
+ASSETS_PATH = Path(__file__).parent / "assets" / "images" / "sap"
+RESOLUTIONS = {
+    '1080p': (1920, 1080),
+    '1440p': (2560, 1440),
+    '4k': (3840, 2160),
+}
+
+
+def build_screen(width: int, height: int, seed: int) -> np.ndarray:
+    """Captura sintética con aspecto de interfaz: ventanas, bordes y texto"""
+    rng = np.random.default_rng(seed)
+    screen = np.full((height, width, 3), 236, dtype=np.uint8)
+    for _ in range(width * height // 20000):
+        x, y = int(rng.integers(0, width - 40)), int(rng.integers(0, height - 20))
+        w, h = int(rng.integers(40, 400)), int(rng.integers(16, 200))
+        color = tuple(int(c) for c in rng.integers(150, 256, 3))
+        cv2.rectangle(screen, (x, y), (x + w, y + h), color, -1)
+        cv2.rectangle(screen, (x, y), (x + w, y + h), (120, 120, 120), 1)
+    for _ in range(width * height // 8000):
+        x, y = int(rng.integers(0, width - 100)), int(rng.integers(12, height))
+        text = ''.join(chr(int(c)) for c in rng.integers(65, 91, int(rng.integers(4, 14))))
+        cv2.putText(screen, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (20, 20, 20), 1, cv2.LINE_AA)
+    return screen
+
+
+def paste(screen: np.ndarray, asset: Path, seed: int):
+    """Pegar la imagen de referencia en una posición aleatoria"""
+    image = cv2.imread(str(asset), cv2.IMREAD_COLOR)
+    height, width = image.shape[:2]
+    rng = np.random.default_rng(seed)
+    x = int(rng.integers(0, screen.shape[1] - width))
+    y = int(rng.integers(0, screen.shape[0] - height))
+    screen[y:y + height, x:x + width] = image
+    return x, y
+
+
+def timed(func, repeat: int):
+    """Ejecutar func repeat veces y devolver (resultado, ms promedio)"""
+    result = func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda de plantillas")
+    parser.add_argument('--resolutions', nargs='+', default=list(RESOLUTIONS),
+                        choices=list(RESOLUTIONS), help="Resoluciones de captura")
+    parser.add_argument('--levels', type=int, default=2, help="Niveles de la búsqueda piramidal")
+    parser.add_argument('--confidence', type=float, default=0.8, help="Confianza mínima")
+    parser.add_argument('--repeat', type=int, default=5, help="Repeticiones por medición")
+    args = parser.parse_args()
+
+    registry = TemplateRegistry(ASSETS_PATH)
+    names = list(registry.iter_assets())
+    if not names:
+        print(f"❌ No hay imágenes de referencia en {ASSETS_PATH}")
+        return 1
+
+    print("=" * 104)
+    print("📊 BENCHMARK DE BÚSQUEDA DE PLANTILLAS (ms por búsqueda)")
+    print("   locateOnScreen: pyscreeze.locate con la imagen desde disco (ruta original)")
+    print("   completa: OpenCV con la plantilla en caché a resolución completa")
+    print(f"   piramidal: búsqueda gruesa en {args.levels} nivel(es) y refinamiento local")
+    print("=" * 104)
+    print(f"{'Resolución':>10} | {'Plantilla':<32} | {'locateOnScreen':>14} | "
+          f"{'completa':>9} | {'piramidal':>9} | {'aceleración':>11} | {'ok':>3}")
+    print("-" * 104)
+
+    failures = 0
+    for label in args.resolutions:
+        width, height = RESOLUTIONS[label]
+        for seed, name in enumerate(names):
+            template = registry.get(name)
+            screen = build_screen(width, height, seed)
+            x, y = paste(screen, template.path, seed)
+            gray = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+            rgb = cv2.cvtColor(screen, cv2.COLOR_BGR2RGB)
+            expected = (x, y, template.width, template.height)
+
+            located, locate_ms = timed(
+                lambda: pyscreeze.locate(str(template.path), rgb, confidence=args.confidence),
+                max(1, args.repeat // 2))
+            full, full_ms = timed(lambda: match_template(gray, template, args.confidence), args.repeat)
+            pyramid, pyramid_ms = timed(
+                lambda: match_template(Frame(gray), template, args.confidence, args.levels), args.repeat)
+
+            # locateOnScreen puede desplazarse un píxel en bordes uniformes
+            ok = (located is not None
+                  and abs(located[0] - x) <= 1 and abs(located[1] - y) <= 1
+                  and full is not None and full[0] == expected
+                  and pyramid is not None and pyramid[0] == expected
+                  and abs(pyramid[1] - full[1]) < 1e-4)
+            failures += not ok
+            print(f"{label:>10} | {name:<32} | {locate_ms:>12.1f}ms | {full_ms:>7.1f}ms | "
+                  f"{pyramid_ms:>7.1f}ms | {locate_ms / pyramid_ms:>10.1f}x | {'✅' if ok else '❌':>2}")
+
+    print("=" * 104)
+    if failures:
+        print(f"❌ {failures} búsqueda(s) no encontraron la posición esperada")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
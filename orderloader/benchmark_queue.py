@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Colas - OrderLoader
+Compara el escaneo de data/pending anterior (iterdir + sort con stat)
+contra QueueScanner (os.scandir + heap + contadores) a 1k, 10k y 100k archivos
+"""
+
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+from pathlib import Path
+
+from file_queue import QueueScanner
+
+
+def legacy_pending_files(pending_path: Path):
+    """Implementación anterior de QueueManager.get_pending_files"""
+    files = [f for f in pending_path.iterdir()
+             if f.is_file() and f.suffix.lower() == '.json']
+    files.sort(key=lambda x: x.stat().st_ctime)
+    return files
+
+
+def legacy_queue_status(pending_path: Path, completed_path: Path):
+    """Implementación anterior de QueueManager.get_queue_status"""
+    pending_files = legacy_pending_files(pending_path)
+    completed_files = [f for f in completed_path.iterdir()
+                       if f.is_file() and f.suffix.lower() == '.json']
+    return {
+        'pending': len(pending_files),
+        'completed': len(completed_files),
+        'total': len(pending_files) + len(completed_files)
+    }
+
+
+def create_files(directory: Path, count: int):
+    """Crear count archivos JSON mínimos"""
+    directory.mkdir(parents=True, exist_ok=True)
+    payload = b'{"orden_compra": "BENCH"}'
+    for i in range(count):
+        (directory / f"orden_{i:06d}.json").write_bytes(payload)
+
+
+def timed(func, repeat: int = 3) -> float:
+    """Mejor tiempo de repeat ejecuciones, en milisegundos"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run_benchmark(sizes, repeat: int):
+    print("=" * 86)
+    print("📊 BENCHMARK DE ESCANEO DE COLAS")
+    print("=" * 86)
+    print(f"{'Archivos':>9} | {'legacy scan':>12} | {'scandir scan':>12} | {'primer archivo':>14} | "
+          f"{'legacy status':>13} | {'status O(1)':>11}")
+    print("-" * 86)
+
+    for size in sizes:
+        root = Path(tempfile.mkdtemp(prefix="orderloader_bench_"))
+        try:
+            pending = root / "pending"
+            completed = root / "completed"
+            create_files(pending, size)
+            create_files(completed, size // 2)
+
+            scanner = QueueScanner(pending, completed, ['.json'])
+
+            legacy_scan = timed(lambda: legacy_pending_files(pending), repeat)
+            new_scan = timed(lambda: list(scanner.scan_pending()), repeat)
+            first_file = timed(lambda: next(iter(scanner.scan_pending())), repeat)
+            legacy_status = timed(lambda: legacy_queue_status(pending, completed), repeat)
+
+            scanner.status()  # Siembra de contadores (un escaneo)
+            new_status = timed(scanner.status, repeat)
+
+            print(f"{size:>9,} | {legacy_scan:>10.1f}ms | {new_scan:>10.1f}ms | {first_file:>12.1f}ms | "
+                  f"{legacy_status:>11.1f}ms | {new_status:>9.4f}ms")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print("=" * 86)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escaneo de colas")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="Número de archivos pendientes a probar")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por medición")
+    args = parser.parse_args()
+
+    run_benchmark(args.sizes, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
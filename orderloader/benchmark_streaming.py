@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Memoria - OrderLoader
+Compara el pico de memoria (tracemalloc) de cargar una orden completa
+(json.loads + Order) contra la lectura incremental de order_stream
+"""
+
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import tracemalloc
+from pathlib import Path
+
+from order import Order
+from order_schema import ORDER_VALIDATOR
+from order_stream import open_streaming_order
+from benchmark_validation import build_order
+
+
+def load_full(file_path: Path) -> int:
+    """Ruta normal: documento completo en memoria antes del primer item"""
+    data = json.loads(file_path.read_bytes().decode('utf-8'))
+    assert not ORDER_VALIDATOR.validate(data)
+    order = Order.from_dict(data)
+    return sum(1 for _ in order.items)
+
+
+def load_streaming(file_path: Path, prevalidate: bool, chunk_size: int) -> int:
+    """Ruta incremental: encabezado primero e items de a uno"""
+    order, violations = open_streaming_order(file_path, prevalidate, 'utf-8', chunk_size)
+    assert order is not None and not violations
+    return sum(1 for _ in order.items)
+
+
+def measure(func, *args):
+    """Ejecutar func midiendo tiempo y pico de memoria"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed * 1000, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memoria de lectura de órdenes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 200000],
+                        help="Número de items por orden")
+    parser.add_argument('--chunk-size', type=int, default=64 * 1024,
+                        help="Caracteres por bloque en la lectura incremental")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="orderloader_bench_"))
+    try:
+        print("=" * 96)
+        print("📊 BENCHMARK DE MEMORIA (pico tracemalloc)")
+        print("   completa: json.loads + validación + Order")
+        print("   incremental: order_stream (prevalidada = dos pasadas, directa = una pasada)")
+        print("=" * 96)
+        print(f"{'Items':>8} | {'Archivo':>8} | {'completa':>20} | "
+              f"{'incremental prevalidada':>24} | {'incremental directa':>20}")
+        print("-" * 96)
+
+        for size in args.sizes:
+            file_path = root / f"orden_{size}.json"
+            file_path.write_text(json.dumps(build_order(size), indent=2), encoding='utf-8')
+            file_mb = file_path.stat().st_size / (1024 * 1024)
+
+            results = [
+                measure(load_full, file_path),
+                measure(load_streaming, file_path, True, args.chunk_size),
+                measure(load_streaming, file_path, False, args.chunk_size),
+            ]
+            assert all(count == size for count, _, _ in results)
+
+            cells = [f"{peak:>7.1f}MB {ms:>7.0f}ms" for _, ms, peak in results]
+            print(f"{size:>8,} | {file_mb:>6.1f}MB | {cells[0]:>20} | {cells[1]:>24} | {cells[2]:>20}")
+
+        print("=" * 96)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Estrategias de Búsqueda - OrderLoader
+Para cada imagen de navegación y cada estrategia (pyautogui, OpenCV en
+grises, piramidal, solo ROI) mide el tiempo de búsqueda, el mejor puntaje,
+el segundo mejor (otra posición) y el margen entre ambos, en varias
+resoluciones y escalas de pantalla. Sirve para elegir la estrategia más
+rápida y un confidence que distinga "Orden de venta" de "Oferta de ventas"
+
+Con --screenshots usa capturas reales (la posición esperada es la que
+encuentra OpenCV a escala 1); sin ellas, capturas sintéticas con un
+señuelo junto a boton_orden_venta.png
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from benchmark_matching import RESOLUTIONS, build_screen, timed
+from vision import TEMPLATE_EXTENSIONS, Frame, TemplateRegistry, match_template
+
+try:
+    import pyscreeze
+except ImportError:  # Sin pyscreeze no se mide la estrategia pyautogui
+    pyscreeze = None
+
+ASSETS_PATH = Path(__file__).parent / "assets" / "images" / "sap"
+STRATEGIES = ('pyautogui', 'opencv', 'piramidal', 'roi')
+# Imagen parecida que no debe confundirse con cada plantilla
+DECOY_TARGETS = ('navegacion/boton_orden_venta.png',)
+
+
+def make_decoy(image: np.ndarray) -> np.ndarray:
+    """
+    Señuelo sintético: la misma imagen con la primera palabra invertida.
+
+    Conserva el fondo y el resto del texto ("de venta"), como "Oferta de
+    ventas" junto a "Orden de venta" en el menú de SAP.
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    columns = np.flatnonzero((gray < gray.mean() - 40).any(axis=0))
+    decoy = image.copy()
+    if columns.size == 0:
+        return decoy[:, ::-1].copy()
+    gaps = np.flatnonzero(np.diff(columns) >= 4)
+    end = columns[gaps[0]] if gaps.size else columns[-1]
+    decoy[:, columns[0]:end + 1] = decoy[:, columns[0]:end + 1][:, ::-1]
+    return decoy
+
+
+def peaks(result: np.ndarray, template_size: Tuple[int, int]) -> Tuple[float, Tuple[int, int], float]:
+    """
+    Mejor puntaje de un mapa de matchTemplate y el mejor en otra posición.
+
+    Returns:
+        Tuple[float, Tuple[int, int], float]: (mejor, posición, segundo),
+        donde el segundo excluye la vecindad del mejor (medio tamaño de la
+        plantilla a cada lado)
+    """
+    result = np.nan_to_num(result, nan=-1.0)
+    _, best, _, (x, y) = cv2.minMaxLoc(result)
+    width, height = template_size
+    masked = result.copy()
+    masked[max(0, y - height // 2):y + height // 2 + 1, max(0, x - width // 2):x + width // 2 + 1] = -1.0
+    return float(best), (x, y), float(masked.max())
+
+
+def scaled(image: np.ndarray, scale: float) -> np.ndarray:
+    """Imagen como se vería con la escala de pantalla (DPI) dada"""
+    if scale == 1.0:
+        return image
+    return cv2.resize(image, None, fx=scale, fy=scale,
+                      interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+
+def synthetic_case(template, resolution: str, scale: float, seed: int,
+                   decoy: Optional[np.ndarray]) -> Dict[str, Any]:
+    """Captura sintética con la plantilla (y su señuelo) en la escala dada"""
+    width, height = RESOLUTIONS[resolution]
+    screen = build_screen(width, height, seed)
+    image = scaled(cv2.imread(str(template.path), cv2.IMREAD_COLOR), scale)
+    image_height, image_width = image.shape[:2]
+    rng = np.random.default_rng(seed)
+    x = int(rng.integers(0, width - image_width))
+    # Espacio arriba para el señuelo, como en el menú de SAP
+    y = int(rng.integers(image_height + 8, height - image_height))
+    screen[y:y + image_height, x:x + image_width] = image
+    decoy_box = None
+    if decoy is not None:
+        decoy = scaled(decoy, scale)
+        decoy_y = y - image_height - 4
+        screen[decoy_y:decoy_y + image_height, x:x + image_width] = decoy
+        decoy_box = (x, decoy_y, image_width, image_height)
+    return {'label': resolution, 'scale': scale, 'color': screen,
+            'expected': (x, y, image_width, image_height), 'decoy': decoy_box}
+
+
+def screenshot_cases(directory: Path, template, scales: List[float], confidence: float) -> List[Dict[str, Any]]:
+    """Casos desde capturas reales; la posición esperada es la de OpenCV a escala 1"""
+    cases = []
+    for path in sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in TEMPLATE_EXTENSIONS):
+        original = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if original is None:
+            continue
+        gray = cv2.cvtColor(original, cv2.COLOR_BGR2GRAY)
+        expected = match_template(gray, template, confidence)
+        for scale in scales:
+            box = None
+            if expected is not None:
+                box = tuple(int(round(v * scale)) for v in expected[0])
+            cases.append({'label': path.stem, 'scale': scale, 'color': scaled(original, scale),
+                          'expected': box, 'decoy': None})
+    return cases
+
+
+def pyautogui_locate(path: Path, rgb: np.ndarray, confidence: float):
+    """pyscreeze.locate como lo llama pyautogui.locateOnScreen (None si no está)"""
+    try:
+        return pyscreeze.locate(str(path), rgb, confidence=confidence)
+    except pyscreeze.ImageNotFoundException:
+        return None
+
+
+def inside(point: Tuple[int, int], box: Optional[Tuple[int, int, int, int]]) -> bool:
+    if box is None:
+        return False
+    x, y, width, height = box
+    return x <= point[0] < x + width and y <= point[1] < y + height
+
+
+def run_strategy(strategy: str, template, template_color: np.ndarray, case: Dict[str, Any],
+                 confidence: float, levels: int, padding: int, repeat: int) -> Optional[Dict[str, Any]]:
+    """
+    Medir una estrategia sobre un caso.
+
+    Returns:
+        Optional[Dict[str, Any]]: Tiempo, puntajes, margen y si encontró la
+        posición esperada; None si la estrategia no aplica al caso. Si la
+        plantilla no está en la captura no hay mejor puntaje ni margen: el
+        segundo es la coincidencia falsa más alta
+    """
+    color = case['color']
+    if template.width > color.shape[1] or template.height > color.shape[0]:
+        return None
+    gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+    size = (template.width, template.height)
+
+    if strategy == 'pyautogui':
+        if pyscreeze is None:
+            return None
+        rgb = cv2.cvtColor(color, cv2.COLOR_BGR2RGB)
+        found, ms = timed(lambda: pyautogui_locate(template.path, rgb, confidence), max(1, repeat // 2))
+        box = tuple(found) if found else None
+        # El mismo mapa que calcula pyscreeze: TM_CCOEFF_NORMED en color
+        result = cv2.matchTemplate(color, template_color, cv2.TM_CCOEFF_NORMED)
+    elif strategy == 'roi':
+        if case['expected'] is None:
+            return None
+        x, y, width, height = case['expected']
+        left, top = max(0, x - padding), max(0, y - padding)
+        region = gray[top:y + height + padding, left:x + width + padding]
+        found, ms = timed(lambda: match_template(region, template, confidence), repeat)
+        box = (found[0][0] + left, found[0][1] + top) + found[0][2:] if found else None
+        result = cv2.matchTemplate(region, template.gray, cv2.TM_CCOEFF_NORMED)
+    else:
+        max_level = levels if strategy == 'piramidal' else 0
+        found, ms = timed(lambda: match_template(Frame(gray), template, confidence, max_level), repeat)
+        box = found[0] if found else None
+        # La piramidal refina a resolución completa: mismo puntaje que opencv
+        result = cv2.matchTemplate(gray, template.gray, cv2.TM_CCOEFF_NORMED)
+
+    best, _, runner_up = peaks(result, size)
+    if case['expected'] is None:
+        ok = box is None
+        best, runner_up = None, best
+    else:
+        center = (box[0] + size[0] // 2, box[1] + size[1] // 2) if box else None
+        ok = center is not None and inside(center, case['expected']) and not inside(center, case['decoy'])
+    return {
+        'strategy': strategy, 'template': template.name, 'case': case['label'], 'scale': case['scale'],
+        'ms': ms, 'best': best, 'runner_up': runner_up,
+        'margin': None if best is None else best - runner_up,
+        'found': list(box) if box else None, 'ok': ok,
+    }
+
+
+def summarize(rows: List[Dict[str, Any]], min_margin: float) -> List[Dict[str, Any]]:
+    """
+    Resumen por escala y estrategia, de la más rápida a la más lenta.
+
+    Un confidence separa todos los casos si queda entre el mayor segundo
+    puntaje y el menor mejor puntaje: ese es el rango seguro.
+    """
+    summary = []
+    for scale in sorted({row['scale'] for row in rows}):
+        for strategy in STRATEGIES:
+            selected = [row for row in rows if row['strategy'] == strategy and row['scale'] == scale]
+            if selected:
+                summary.append(_summary_entry(strategy, scale, selected, min_margin))
+    return sorted(summary, key=lambda s: (s['scale'], s['ms']))
+
+
+def _summary_entry(strategy: str, scale: float, selected: List[Dict[str, Any]],
+                   min_margin: float) -> Dict[str, Any]:
+    low = max(r['runner_up'] for r in selected)
+    high = min((r['best'] for r in selected if r['best'] is not None), default=1.0)
+    margin = min((r['margin'] for r in selected if r['margin'] is not None), default=None)
+    return {
+        'strategy': strategy, 'scale': scale,
+        'ms': sum(r['ms'] for r in selected) / len(selected),
+        'ok': sum(r['ok'] for r in selected), 'cases': len(selected),
+        'min_margin': margin,
+        'safe_range': [low, high] if high > low else None,
+        'usable': all(r['ok'] for r in selected) and (margin is None or margin >= min_margin),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de estrategias de búsqueda de plantillas")
+    parser.add_argument('--templates', nargs='+', default=None,
+                        help="Plantillas relativas a assets/images/sap (por defecto navegacion/*)")
+    parser.add_argument('--screenshots', type=Path, help="Directorio con capturas reales de SAP")
+    parser.add_argument('--decoy', type=Path,
+                        help="Captura real de 'Oferta de ventas' (por defecto un señuelo sintético)")
+    parser.add_argument('--resolutions', nargs='+', default=['1080p', '1440p'],
+                        choices=list(RESOLUTIONS), help="Resoluciones de las capturas sintéticas")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1.0, 1.25],
+                        help="Escalas de pantalla (DPI) relativas a las plantillas")
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument('--confidence', type=float, default=0.8, help="Confianza mínima")
+    parser.add_argument('--levels', type=int, default=2, help="Niveles de la búsqueda piramidal")
+    parser.add_argument('--padding', type=int, default=40, help="Margen de la ROI en píxeles")
+    parser.add_argument('--min-margin', type=float, default=0.05,
+                        help="Margen mínimo entre mejor y segundo puntaje para recomendar")
+    parser.add_argument('--repeat', type=int, default=5, help="Repeticiones por medición")
+    parser.add_argument('--output', type=Path, help="Guardar filas y resumen en JSON")
+    args = parser.parse_args()
+
+    registry = TemplateRegistry(ASSETS_PATH)
+    names = args.templates or [name for name in registry.iter_assets() if name.startswith('navegacion/')]
+    templates = [registry.get(name) for name in names]
+    if not templates or None in templates:
+        print(f"❌ Plantillas no encontradas en {ASSETS_PATH}: {names}")
+        return 1
+    if 'pyautogui' in args.strategies and pyscreeze is None:
+        print("⚠️ pyscreeze no está instalado: se omite la estrategia pyautogui")
+
+    print("=" * 118)
+    print(f"📊 BENCHMARK DE ESTRATEGIAS DE BÚSQUEDA (confidence {args.confidence}, ms por búsqueda)")
+    print("   2º: mejor puntaje en otra posición (señuelo o fondo); margen = mejor - 2º")
+    print("=" * 118)
+    print(f"{'Plantilla':<32} | {'Captura':<10} | {'Escala':>6} | {'Estrategia':<10} | "
+          f"{'ms':>8} | {'mejor':>6} | {'2º':>6} | {'margen':>7} | {'ok':>3}")
+    print("-" * 118)
+
+    rows = []
+    for seed, template in enumerate(templates):
+        template_color = cv2.imread(str(template.path), cv2.IMREAD_COLOR)
+        if args.screenshots:
+            cases = screenshot_cases(args.screenshots, template, args.scales, args.confidence)
+        else:
+            decoy = None
+            if template.name in DECOY_TARGETS:
+                decoy = cv2.imread(str(args.decoy), cv2.IMREAD_COLOR) if args.decoy else make_decoy(template_color)
+                decoy = cv2.resize(decoy, (template.width, template.height))
+            cases = [synthetic_case(template, resolution, scale, seed, decoy)
+                     for resolution in args.resolutions for scale in args.scales]
+        for case in cases:
+            for strategy in args.strategies:
+                row = run_strategy(strategy, template, template_color, case, args.confidence,
+                                   args.levels, args.padding, args.repeat)
+                if row is None:
+                    continue
+                rows.append(row)
+                best = '—' if row['best'] is None else f"{row['best']:.3f}"
+                margin = '—' if row['margin'] is None else f"{row['margin']:.3f}"
+                print(f"{row['template']:<32} | {row['case']:<10} | {row['scale']:>6.2f} | {strategy:<10} | "
+                      f"{row['ms']:>6.1f}ms | {best:>6} | {row['runner_up']:>6.3f} | "
+                      f"{margin:>7} | {'✅' if row['ok'] else '❌':>2}")
+
+    summary = summarize(rows, args.min_margin)
+    print("=" * 118)
+    print(f"{'Escala':>6} | {'Estrategia':<10} | {'ms prom.':>9} | {'ok':>7} | {'margen mín.':>11} | "
+          f"{'confidence seguro':<20}")
+    print("-" * 118)
+    for entry in summary:
+        safe = entry['safe_range']
+        safe_text = f"({safe[0]:.3f}, {safe[1]:.3f}]" if safe else "ninguno"
+        margin = '—' if entry['min_margin'] is None else f"{entry['min_margin']:.3f}"
+        print(f"{entry['scale']:>6.2f} | {entry['strategy']:<10} | {entry['ms']:>7.1f}ms | "
+              f"{entry['ok']:>3}/{entry['cases']:<3} | {margin:>11} | {safe_text:<20}")
+    print("=" * 118)
+
+    # La más rápida que encontró todo con margen suficiente, por escala. roi
+    # solo sirve con la posición en caché: la primera búsqueda es completa
+    missing = 0
+    for scale in sorted({entry['scale'] for entry in summary}):
+        usable = [entry for entry in summary
+                  if entry['scale'] == scale and entry['usable'] and entry['strategy'] != 'roi']
+        if usable:
+            low, high = usable[0]['safe_range']
+            print(f"✅ Escala {scale:.2f}: {usable[0]['strategy']} ({usable[0]['ms']:.1f}ms), confidence entre "
+                  f"{low:.3f} y {high:.3f} (ej. {(low + high) / 2:.2f})")
+        else:
+            missing += 1
+            print(f"❌ Escala {scale:.2f}: ninguna estrategia encontró todo con margen >= {args.min_margin}")
+
+    if args.output:
+        args.output.write_text(json.dumps({'rows': rows, 'summary': summary}, indent=2), encoding='utf-8')
+        print(f"💾 Reporte guardado en {args.output}")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
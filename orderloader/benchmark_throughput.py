@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Rendimiento de Punta a Punta - OrderLoader
+Genera órdenes sintéticas en un pending/ temporal, las procesa con
+QueueManager.process_queue (el camino de OrderLoader.run) contra el backend
+de simulación sin esperas, y reporta órdenes/s, latencia por orden y
+tiempo por etapa. Compara contra una línea base guardada para detectar
+regresiones.
+
+Uso:
+    py benchmark_throughput.py                       # Comparar con la línea base
+    py benchmark_throughput.py --save-baseline       # Guardar una nueva línea base
+"""
+
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import platform
+import tempfile
+import argparse
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import main as orderloader
+from config import *
+from calibrate_timing import percentile
+from simulation import VirtualClock, synthetic_order_data
+
+BASELINE_FILE = Path(__file__).parent / "benchmark_throughput_baseline.json"
+STAGES = ('scan', 'validate', 'backup', 'process', 'move')
+# Etapas por debajo de este tiempo por orden no se comparan (ruido de medición)
+MIN_COMPARABLE_MS = 0.05
+
+
+def write_orders(directory: Path, count: int, items_mean: float, items_max: int,
+                 text_length: int, malformed_rate: float, seed: int) -> Tuple[int, int]:
+    """
+    Escribir count órdenes sintéticas en directory.
+
+    Una fracción malformed_rate sale dañada, alternando JSON truncado y
+    JSON que no cumple el esquema (campo faltante o cantidad negativa).
+
+    Returns:
+        Tuple[int, int]: (válidas, malformadas)
+    """
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    malformed = 0
+    for number in range(1, count + 1):
+        data = synthetic_order_data(rng, number, items_mean, items_max, text_length)
+        payload = json.dumps(data, ensure_ascii=False, indent=2).encode(FILE_ENCODING)
+        if rng.random() < malformed_rate:
+            kind = malformed % 3
+            if kind == 0:
+                payload = payload[:len(payload) // 2]
+            elif kind == 1:
+                del data['comprador']
+                payload = json.dumps(data, ensure_ascii=False).encode(FILE_ENCODING)
+            else:
+                data['items'][0]['cantidad'] = -1
+                payload = json.dumps(data, ensure_ascii=False).encode(FILE_ENCODING)
+            malformed += 1
+        (directory / f"orden_{number:06d}.json").write_bytes(payload)
+    return count - malformed, malformed
+
+
+@contextmanager
+def isolated_environment(root: Path, workers: int):
+    """
+    Apuntar OrderLoader a root en lugar de data/, backups/ y logs/.
+
+    Fuerza el modo simulación, sin carriles, y restaura todo al salir.
+    """
+    paths = {'PENDING_PATH': root / "pending", 'COMPLETED_PATH': root / "completed",
+             'LOGS_PATH': root / "logs"}
+    overrides = [
+        (BACKUP_CONFIG, 'backup_path', str(root / "backups")),
+        (METRICS_CONFIG, 'metrics_file', str(root / "metrics.json")),
+        (SAP_AUTOMATION_CONFIG, 'location_cache_file', str(root / "vision_state.json")),
+        (SAP_AUTOMATION_CONFIG, 'simulation_mode', True),
+        (LANES_CONFIG, 'enabled', False),
+        (PIPELINE_CONFIG, 'enabled', workers > 0),
+        (PIPELINE_CONFIG, 'workers', workers),
+    ]
+    previous_paths = {name: getattr(orderloader, name) for name in paths}
+    previous = [(config, key, config[key]) for config, key, _ in overrides]
+    try:
+        for name, path in paths.items():
+            setattr(orderloader, name, path)
+        for config, key, value in overrides:
+            config[key] = value
+        yield
+    finally:
+        for name, path in previous_paths.items():
+            setattr(orderloader, name, path)
+        for config, key, value in previous:
+            config[key] = value
+
+
+class StageTimer:
+    """Acumula el tiempo de las etapas envolviendo métodos de una instancia"""
+
+    def __init__(self):
+        self.totals = {stage: 0.0 for stage in STAGES}
+        self.latencies: List[float] = []
+
+    def wrap(self, owner: Any, name: str, stage: Optional[str] = None):
+        """Medir owner.name en stage (None = latencia por orden)"""
+        method = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                if stage is None:
+                    self.latencies.append(elapsed)
+                else:
+                    self.totals[stage] += elapsed
+
+        setattr(owner, name, timed)
+
+    def wrap_generator(self, owner: Any, name: str, stage: str):
+        """Medir el tiempo que se espera cada elemento de un generador"""
+        method = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            iterator = iter(method(*args, **kwargs))
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.totals[stage] += time.perf_counter() - start
+                yield item
+
+        setattr(owner, name, timed)
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    """Generar la carga, procesarla y construir el reporte"""
+    root = Path(tempfile.mkdtemp(prefix="orderloader_throughput_"))
+    try:
+        valid, malformed = write_orders(root / "pending", args.orders, args.items, args.items_max,
+                                        args.text_length, args.malformed, args.seed)
+        with isolated_environment(root, args.workers):
+            loader = orderloader.OrderLoader()
+            queue_manager = loader.queue_manager
+            file_processor = loader.file_processor
+            # Backend de simulación sin esperas: las acciones avanzan un reloj virtual
+            file_processor.sap_automation.sleep = VirtualClock().sleep
+
+            timer = StageTimer()
+            timer.wrap(queue_manager.scanner, 'scan_pending', 'scan')
+            timer.wrap_generator(queue_manager.pipeline, 'prepare', 'validate')
+            timer.wrap(file_processor, 'log_prepared', 'validate')
+            timer.wrap(file_processor, 'create_backup', 'backup')
+            timer.wrap(file_processor, 'confirm_backup', 'backup')
+            timer.wrap(file_processor, 'process_order', 'process')
+            timer.wrap(queue_manager, 'move_to_completed', 'move')
+            timer.wrap(queue_manager, 'process_prepared')
+
+            loader.metrics.start_session()
+            start = time.perf_counter()
+            try:
+                queue_manager.process_queue()
+            finally:
+                queue_manager.close()
+                file_processor.close()
+            elapsed = time.perf_counter() - start
+            completed = queue_manager.get_queue_status()['completed']
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    latencies = [value * 1000 for value in timer.latencies]
+    return {
+        'orders': args.orders,
+        'valid': valid,
+        'malformed': malformed,
+        'completed': completed,
+        'seconds': round(elapsed, 3),
+        'orders_per_sec': round(args.orders / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50), 3) if latencies else 0.0,
+            'p95': round(percentile(latencies, 0.95), 3) if latencies else 0.0,
+            'p99': round(percentile(latencies, 0.99), 3) if latencies else 0.0,
+        },
+        'stages_ms': {stage: round(total * 1000, 2) for stage, total in timer.totals.items()},
+        'stages_ms_per_order': {stage: round(total * 1000 / args.orders, 4)
+                                for stage, total in timer.totals.items()},
+        'workload': {
+            'items_mean': args.items,
+            'items_max': args.items_max,
+            'text_length': args.text_length,
+            'malformed_rate': args.malformed,
+            'seed': args.seed,
+            'workers': args.workers,
+        },
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+        },
+    }
+
+
+def baseline_mismatch(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Campos de la carga en los que la línea base difiere del reporte.
+
+    Returns:
+        List[str]: 'orders' y/o 'workload.<campo>'; vacía si son comparables
+    """
+    mismatch = [] if baseline.get('orders') == report['orders'] else ['orders']
+    workload = baseline.get('workload') or {}
+    for key, value in report['workload'].items():
+        if workload.get(key) != value:
+            mismatch.append(f'workload.{key}')
+    return mismatch
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Comparar un reporte con la línea base.
+
+    Returns:
+        List[str]: Una línea por métrica que empeoró más de tolerance
+    """
+    regressions = []
+
+    def check(label: str, current: float, reference: float, higher_is_better: bool = False):
+        if not reference:
+            return
+        change = (current - reference) / reference
+        worse = -change if higher_is_better else change
+        if worse > tolerance:
+            regressions.append(f"{label}: {reference:g} → {current:g} ({change:+.0%})")
+
+    check('orders_per_sec', report['orders_per_sec'], baseline.get('orders_per_sec', 0), True)
+    for key, value in report['latency_ms'].items():
+        check(f'latency_ms.{key}', value, baseline.get('latency_ms', {}).get(key, 0))
+    for stage, value in report['stages_ms_per_order'].items():
+        reference = baseline.get('stages_ms_per_order', {}).get(stage, 0)
+        if max(value, reference) >= MIN_COMPARABLE_MS:
+            check(f'stages_ms_per_order.{stage}', value, reference)
+    return regressions
+
+
+def exit_code(report: Dict[str, Any]) -> int:
+    """1 si hay regresiones u órdenes sin completar, 2 si la línea base no es comparable"""
+    if report['regressions'] or report['completed'] != report['valid']:
+        return 1
+    return 2 if report['comparable'] is False else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de rendimiento de punta a punta")
+    parser.add_argument('--orders', type=int, default=500, help="Órdenes a generar")
+    parser.add_argument('--items', type=float, default=20, help="Items promedio por orden (geométrica)")
+    parser.add_argument('--items-max', type=int, default=200, help="Máximo de items por orden")
+    parser.add_argument('--text-length', type=int, default=24, help="Largo promedio de descripciones y nombres")
+    parser.add_argument('--malformed', type=float, default=0.05, help="Fracción de archivos dañados")
+    parser.add_argument('--workers', type=int, default=PIPELINE_CONFIG['workers'],
+                        help="Procesos de preparación (0 = en el proceso principal)")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla de la carga")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE, help="Archivo de línea base")
+    parser.add_argument('--save-baseline', action='store_true', help="Guardar este reporte como línea base")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Empeoramiento relativo permitido antes de marcar regresión")
+    parser.add_argument('--output', type=Path, help="Escribir el reporte JSON en este archivo")
+    parser.add_argument('--json', action='store_true', help="Imprimir solo el reporte JSON")
+    args = parser.parse_args()
+
+    # Los logs de OrderLoader no deben medir la consola
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.NullHandler()], force=True)
+    report = run_benchmark(args)
+
+    regressions = []
+    # None: sin línea base contra la cual comparar
+    comparable, mismatch = None, []
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding='utf-8')
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        mismatch = baseline_mismatch(report, baseline)
+        comparable = not mismatch
+        if comparable:
+            regressions = compare(report, baseline, args.tolerance)
+    report['comparable'] = comparable
+    report['baseline_mismatch'] = mismatch
+    report['regressions'] = regressions
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding='utf-8')
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return exit_code(report)
+
+    print("=" * 72)
+    print(f"📊 BENCHMARK DE PUNTA A PUNTA: {report['orders']} órdenes "
+          f"({report['malformed']} dañadas, {args.workers} workers)")
+    print("=" * 72)
+    print(f"   Tiempo total:   {report['seconds']:.2f}s")
+    print(f"   Órdenes/s:      {report['orders_per_sec']:.1f}")
+    print(f"   Completadas:    {report['completed']}/{report['valid']} válidas")
+    latency = report['latency_ms']
+    print(f"   Latencia/orden: p50 {latency['p50']:.2f}ms | p95 {latency['p95']:.2f}ms | p99 {latency['p99']:.2f}ms")
+    print("-" * 72)
+    print(f"{'Etapa':<10} | {'total':>10} | {'por orden':>10}")
+    print("-" * 72)
+    for stage in STAGES:
+        print(f"{stage:<10} | {report['stages_ms'][stage]:>8.1f}ms | "
+              f"{report['stages_ms_per_order'][stage]:>8.3f}ms")
+    print("=" * 72)
+    if args.save_baseline:
+        print(f"💾 Línea base guardada en {args.baseline.name}")
+    elif comparable is False:
+        print(f"⚠️ {args.baseline.name} se midió con otra carga ({', '.join(mismatch)}): "
+              f"no se comparó, use los mismos parámetros o --save-baseline")
+    elif regressions:
+        print(f"❌ {len(regressions)} regresión(es) contra {args.baseline.name}:")
+        for line in regressions:
+            print(f"   {line}")
+    elif comparable:
+        print(f"✅ Sin regresiones contra {args.baseline.name} (tolerancia {args.tolerance:.0%})")
+    if report['completed'] != report['valid']:
+        print(f"❌ Solo {report['completed']} de {report['valid']} órdenes válidas llegaron a completados")
+    return exit_code(report)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Validación - OrderLoader
+Compara el validador anterior (cadena de ifs) contra el validador
+compilado de order_schema en órdenes de 10, 1.000 y 50.000 items
+"""
+
+import sys
+import time
+import argparse
+
+from order_schema import ORDER_VALIDATOR
+
+
+def legacy_validate(data) -> bool:
+    """Implementación anterior de FileProcessor.validate_json (sin logging)"""
+    required_fields = ['orden_compra', 'fecha_documento', 'comprador', 'items']
+    for field in required_fields:
+        if field not in data:
+            return False
+
+    comprador = data.get('comprador', {})
+    if not isinstance(comprador, dict) or 'nit' not in comprador or 'nombre' not in comprador:
+        return False
+
+    items = data.get('items', [])
+    if not isinstance(items, list):
+        return False
+
+    for item in items:
+        if not isinstance(item, dict):
+            return False
+        for field in ['descripcion', 'codigo', 'cantidad', 'precio_unitario']:
+            if field not in item:
+                return False
+    return True
+
+
+def build_order(item_count: int, broken_every: int = 0) -> dict:
+    """
+    Construir una orden sintética.
+
+    Args:
+        item_count: Número de items
+        broken_every: Si > 0, cada N items uno tiene cantidad inválida
+    """
+    items = []
+    for i in range(item_count):
+        cantidad = "diez" if broken_every and i % broken_every == 0 else (i % 50) + 1
+        items.append({
+            "codigo": f"PROD{i:06d}",
+            "descripcion": f"PRODUCTO DE PRUEBA {i}",
+            "cantidad": cantidad,
+            "precio_unitario": 1500,
+            "precio_total": 1500 * ((i % 50) + 1),
+            "fecha_entrega": "15/10/2025"
+        })
+    return {
+        "orden_compra": "BENCH001",
+        "fecha_documento": "01/10/2025",
+        "fecha_entrega": "15/10/2025",
+        "comprador": {"nit": "900123456", "nombre": "EMPRESA DE PRUEBA S.A.S."},
+        "items": items,
+        "valor_total": 150000,
+    }
+
+
+def timed(func, repeat: int) -> float:
+    """Mejor tiempo de repeat ejecuciones, en milisegundos"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de validación de órdenes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 50000],
+                        help="Número de items por orden")
+    parser.add_argument('--repeat', type=int, default=5, help="Repeticiones por medición")
+    args = parser.parse_args()
+
+    print("=" * 92)
+    print("📊 BENCHMARK DE VALIDACIÓN")
+    print("   legacy: solo verifica que existan las claves y se detiene en el primer error")
+    print("   compilado: tipos, fechas y rangos; reporta todas las violaciones")
+    print("=" * 92)
+    print(f"{'Items':>7} | {'legacy':>10} | {'compilado':>10} | {'µs/item':>8} | "
+          f"{'errores (1 de cada 100 roto)':>30}")
+    print("-" * 92)
+
+    for size in args.sizes:
+        order = build_order(size)
+        broken = build_order(size, broken_every=100)
+
+        assert legacy_validate(order) and not ORDER_VALIDATOR.validate(order)
+
+        legacy_ms = timed(lambda: legacy_validate(order), args.repeat)
+        compiled_ms = timed(lambda: ORDER_VALIDATOR.validate(order), args.repeat)
+        per_item = compiled_ms * 1000 / size
+
+        # El validador anterior no detecta tipos: la orden rota le parece válida
+        legacy_errors = 0 if legacy_validate(broken) else 1
+        compiled_errors = len(ORDER_VALIDATOR.validate(broken))
+
+        print(f"{size:>7,} | {legacy_ms:>8.2f}ms | {compiled_ms:>8.2f}ms | {per_item:>8.2f} | "
+              f"{'legacy ' + str(legacy_errors) + ' / compilado ' + str(compiled_errors):>30}")
+
+    print("=" * 92)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calibración de Tiempos - OrderLoader
+Mide cuánto tarda este equipo en reaccionar a la entrada y guarda un
+perfil de tiempos (timing_profiles.json) con margen de seguridad
+
+Uso real: abrir un campo de texto de prueba en la misma sesión (ej. un Bloc
+de notas; no un formulario de SAP, la prueba usa Ctrl+A), dejarlo con el
+foco y ejecutar:
+    py calibrate_timing.py --profile oficina --backend screen
+"""
+
+import sys
+import math
+import time
+import random
+import argparse
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from config import *
+from timing_profiles import (TIMING_FIELDS, TimingProfile, default_profile, load_profile,
+                             profiles_path, read_profiles, save_profile)
+
+# Intervalos entre teclas a probar, de menor a mayor
+TYPE_INTERVALS = (0.0, 0.005, 0.01, 0.02, 0.03, 0.05, 0.08)
+PROBE_TEXT = "Calibra123"
+# Mínimos para no dejar esperas en cero por una medición afortunada
+MIN_SETTLE_TIME = 0.1
+MIN_PAUSE = 0.02
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Percentil por el método del rango más cercano"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class SimulatedTarget:
+    """
+    Terminal simulada con latencias conocidas (sin pantalla ni teclado).
+
+    Sirve para probar la calibración: pierde teclas escritas más rápido que
+    min_interval y redibuja en varios cuadros separados por frame_gap.
+    """
+
+    name = 'simulation'
+
+    def __init__(self, latency: float = 0.12, jitter: float = 0.04, frames: int = 3,
+                 frame_gap: float = 0.06, min_interval: float = 0.02,
+                 activation: float = 0.4, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.frames = frames
+        self.frame_gap = frame_gap
+        self.min_interval = min_interval
+        self.activation = activation
+        self.random = random.Random(seed)
+
+    def respond(self) -> Tuple[Optional[float], List[float]]:
+        """Latencia hasta el primer cambio y momentos de cada cambio"""
+        latency = self.latency + self.random.uniform(0, self.jitter)
+        changes = [latency]
+        for _ in range(self.frames - 1):
+            changes.append(changes[-1] + self.random.uniform(0.3, 1.0) * self.frame_gap)
+        return latency, changes
+
+    def type_roundtrip(self, text: str, interval: float) -> str:
+        """Texto que llegó al campo al escribir con interval"""
+        if interval >= self.min_interval:
+            return text
+        # Cada tecla demasiado rápida se pierde con cierta probabilidad
+        loss = 1 - interval / self.min_interval
+        return ''.join(char for char in text if self.random.random() > loss * 0.5)
+
+    def activate_window(self) -> Optional[float]:
+        """Tiempo hasta que la ventana activada queda estable"""
+        return self.activation + self.random.uniform(0, self.jitter)
+
+
+class ScreenTarget:
+    """
+    Pantalla y teclado reales.
+
+    Escribe en el campo de texto que tenga el foco y observa la pantalla
+    con capturas en escala de grises.
+    """
+
+    name = 'screen'
+
+    def __init__(self, quiet_time: float = 1.0, timeout: float = 5.0, change_threshold: float = 0.0005):
+        import pyautogui
+        import pyperclip
+        from screen_capture import create_capture
+        from vision import frame_difference
+        self.pyautogui = pyautogui
+        self.pyperclip = pyperclip
+        self.frame_difference = frame_difference
+        self.screen = create_capture(SAP_AUTOMATION_CONFIG['capture_backend'])
+        self.quiet_time = quiet_time
+        self.timeout = timeout
+        self.change_threshold = change_threshold
+        pyautogui.FAILSAFE = PYAUTOGUI_FAILSAFE
+        # Las pausas de pyautogui falsearían la medición
+        pyautogui.PAUSE = 0
+
+    def _capture(self):
+        return self.screen.grab()
+
+    def _observe(self, action) -> Tuple[Optional[float], List[float]]:
+        """Ejecutar action y registrar los cambios hasta quiet_time sin cambios"""
+        previous = self._capture()
+        start = time.perf_counter()
+        action()
+        changes: List[float] = []
+        while True:
+            frame = self._capture()
+            now = time.perf_counter() - start
+            if self.frame_difference(previous, frame) >= self.change_threshold:
+                changes.append(now)
+                previous = frame
+            last = changes[-1] if changes else 0.0
+            if now - last >= self.quiet_time or now >= self.timeout:
+                break
+        return (changes[0] if changes else None), changes
+
+    def respond(self) -> Tuple[Optional[float], List[float]]:
+        latency, changes = self._observe(lambda: self.pyautogui.write('x'))
+        self._observe(lambda: self.pyautogui.press('backspace'))
+        return latency, changes
+
+    def type_roundtrip(self, text: str, interval: float) -> str:
+        self.pyautogui.write(text, interval=interval)
+        time.sleep(self.quiet_time)
+        self.pyperclip.copy('')
+        self.pyautogui.hotkey('ctrl', 'a')
+        self.pyautogui.hotkey('ctrl', 'c')
+        time.sleep(0.2)
+        typed = self.pyperclip.paste()
+        self.pyautogui.press('delete')
+        return typed
+
+    def activate_window(self) -> Optional[float]:
+        # Ida y vuelta para dejar el foco donde estaba
+        _, changes = self._observe(lambda: self.pyautogui.hotkey('alt', 'tab'))
+        self._observe(lambda: self.pyautogui.hotkey('alt', 'tab'))
+        return changes[-1] if changes else None
+
+
+def calibrate(target, name: str, samples: int = 10, margin: float = 1.5,
+              intervals: Sequence[float] = TYPE_INTERVALS, window: bool = False,
+              report=print) -> TimingProfile:
+    """
+    Medir el equipo y construir un perfil de tiempos.
+
+    - pyautogui_pause: latencia de respuesta a una tecla (p95)
+    - settle_time: mayor pausa entre cuadros de una misma respuesta (p95)
+    - type_interval: menor intervalo entre teclas sin perder caracteres
+    - ventana: tiempo hasta quedar estable tras Alt+Tab (con window), o
+      latencia más redibujo si no se mide
+
+    Todos se multiplican por margin.
+
+    Args:
+        target: SimulatedTarget o ScreenTarget
+        name: Nombre del perfil
+        samples: Repeticiones de cada medición
+        margin: Factor de seguridad
+        intervals: Intervalos entre teclas a probar, de menor a mayor
+        window: Medir también la activación de ventana (Alt+Tab)
+        report: Función para mostrar el progreso
+
+    Returns:
+        TimingProfile: Perfil calibrado
+    """
+    defaults = default_profile()
+
+    latencies, gaps, totals = [], [], []
+    for _ in range(samples):
+        latency, changes = target.respond()
+        if latency is None:
+            continue
+        latencies.append(latency)
+        totals.append(changes[-1])
+        gaps.append(max((b - a for a, b in zip(changes, changes[1:])), default=0.0))
+    if not latencies:
+        raise RuntimeError("La pantalla no reaccionó a la entrada: ¿hay un campo de texto con el foco?")
+    report(f"   respuesta: p95 {percentile(latencies, 0.95) * 1000:.0f}ms, "
+           f"redibujo p95 {percentile(totals, 0.95) * 1000:.0f}ms ({len(latencies)}/{samples} muestras)")
+
+    type_interval = None
+    for interval in intervals:
+        intact = all(target.type_roundtrip(PROBE_TEXT, interval) == PROBE_TEXT for _ in range(samples))
+        report(f"   escritura a {interval * 1000:.0f}ms/tecla: {'✅' if intact else '❌ pierde teclas'}")
+        if intact:
+            type_interval = interval
+            break
+    if type_interval is None:
+        report("   ⚠️ Ningún intervalo fue confiable, se conserva el actual")
+        type_interval = defaults.type_interval / margin  # Sin margen extra sobre el actual
+
+    response = percentile(totals, 0.95)
+    window_delay = None
+    if window:
+        activations = [t for t in (target.activate_window() for _ in range(samples)) if t is not None]
+        if activations:
+            window_delay = percentile(activations, 0.95)
+            report(f"   activación de ventana: p95 {window_delay * 1000:.0f}ms")
+    if window_delay is None:
+        window_delay = response
+
+    return TimingProfile(
+        name,
+        pyautogui_pause=max(percentile(latencies, 0.95) * margin, MIN_PAUSE),
+        type_interval=type_interval * margin,
+        settle_time=max(percentile(gaps, 0.95) * margin, MIN_SETTLE_TIME),
+        window_activation_delay=window_delay * margin,
+        window_maximize_delay=window_delay * margin,
+        stabilization_delay=window_delay * margin,
+        margin=margin,
+        measured_at=datetime.now().isoformat(timespec='seconds'),
+        backend=target.name,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrar los tiempos de entrada de este equipo")
+    parser.add_argument('--profile', required=True, help="Nombre del perfil a guardar")
+    parser.add_argument('--backend', choices=['screen', 'simulation'], default='simulation',
+                        help="screen = pantalla y teclado reales, simulation = terminal simulada")
+    parser.add_argument('--samples', type=int, default=10, help="Repeticiones de cada medición")
+    parser.add_argument('--margin', type=float, default=TIMING_CONFIG['safety_margin'],
+                        help="Factor de seguridad sobre lo medido")
+    parser.add_argument('--window', action='store_true',
+                        help="Medir también Alt+Tab (cambia de ventana y vuelve)")
+    parser.add_argument('--countdown', type=int, default=5,
+                        help="Segundos para poner el foco en el campo de prueba (screen)")
+    parser.add_argument('--dry-run', action='store_true', help="Mostrar el perfil sin guardarlo")
+    args = parser.parse_args()
+
+    if args.profile == default_profile().name:
+        print("❌ El perfil 'default' son los valores de config.py: elige otro nombre")
+        return 1
+
+    if args.backend == 'screen':
+        print(f"⌨️ Pon el foco en un campo de texto de prueba. Empezando en {args.countdown}s...")
+        time.sleep(args.countdown)
+        target = ScreenTarget()
+    else:
+        target = SimulatedTarget()
+
+    print("=" * 72)
+    print(f"⏱️ CALIBRACIÓN DE TIEMPOS ({target.name}, margen x{args.margin})")
+    print("=" * 72)
+    try:
+        profile = calibrate(target, args.profile, args.samples, args.margin, window=args.window)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    exists = args.profile in read_profiles(profiles_path())
+    current = load_profile(args.profile) if exists else default_profile()
+    print("-" * 72)
+    print(f"{'Tiempo':<26} | {'actual':>10} | {'calibrado':>10}")
+    print("-" * 72)
+    for field in TIMING_FIELDS:
+        print(f"{field:<26} | {getattr(current, field):>9.3f}s | {getattr(profile, field):>9.3f}s")
+    print("=" * 72)
+
+    if args.dry_run:
+        return 0
+    save_profile(profile)
+    print(f"💾 Perfil '{profile.name}' guardado. Para usarlo: TIMING_CONFIG['profile'] = '{profile.name}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -45,6 +45,38 @@ POWERSHELL_TIMEOUT = 5
 SUPPORTED_EXTENSIONS = ['.json']
 FILE_ENCODING = 'utf-8'
 
+# Configuración de validación de órdenes (esquema en order_schema.py)
+VALIDATION_CONFIG = {
+    'max_logged_errors': 100,  # Violaciones listadas en el log por archivo
+}
+
+# Configuración de lectura incremental para órdenes grandes (ver order_stream.py)
+STREAMING_CONFIG = {
+    'threshold_bytes': 2 * 1024 * 1024,  # Archivos desde este tamaño se leen por partes
+    'chunk_size': 64 * 1024,             # Caracteres leídos por bloque
+    'prevalidate': True,                 # Validar todos los items antes de ingresarlos en SAP (una lectura más del archivo)
+}
+
+# Configuración del pipeline de preparación (lectura y validación en paralelo)
+PIPELINE_CONFIG = {
+    'enabled': True,
+    'workers': 2,       # Procesos que preparan órdenes mientras SAP procesa la actual
+    'prefetch': 4,      # Órdenes preparadas por adelantado como máximo
+}
+
+# Configuración de carriles de ejecución (varias sesiones SAP en paralelo, ver lanes.py)
+LANES_CONFIG = {
+    'enabled': False,
+    'backend': 'sap',  # 'sap' = SAPAutomation, 'simulated' = sin pantalla (pruebas)
+    'item_delay': 0.0,  # Demora por item del backend 'simulated'
+    'start_xvfb': False,  # Lanzar un Xvfb por carril (Linux)
+    'xvfb_screen': '1920x1080x24',
+    'lanes': [  # Un carril por sesión SAP con licencia, cada uno en su display
+        {'name': 'lane1', 'display': ':101'},
+        {'name': 'lane2', 'display': ':102'},
+    ],
+}
+
 # Configuración de logging
 LOG_LEVEL = 'INFO'
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
@@ -69,8 +101,14 @@ RETRY_CONFIG = {
 BACKUP_CONFIG = {
     'enabled': True,
     'backup_path': 'backups',
-    'max_backups': 10,
-    'compress_backups': True
+    'archive_rotation': 'daily',  # 'daily' = un archivo por día, 'session' = uno por ejecución
+    'max_archives': 10,  # Archivos completos (días/sesiones) a conservar
+    'compress_backups': True,  # False = guardar sin comprimir (códec 'none')
+    'codec': 'zlib',  # 'zlib', 'gzip', 'lzma', 'bz2' o 'none'
+    'compression_level': 1,  # 1 = más rápido, 9 = máxima compresión
+    'writer_queue_size': 64,  # Backups máximos en cola del escritor en segundo plano
+    'writer_max_bytes': 64 * 1024 * 1024,  # Bytes máximos en cola (back-pressure)
+    'confirm_timeout': 30.0  # Segundos máximos esperando backup durable antes de mover
 }
 
 # Configuración de métricas
@@ -78,9 +116,19 @@ METRICS_CONFIG = {
     'enabled': True,
     'track_performance': True,
     'track_success_rate': True,
+    'track_spans': True,  # Tiempos por paso de SAPAutomation (histogramas en metrics.json)
     'metrics_file': 'metrics.json'
 }
 
+# Configuración de modo watch (daemon sobre data/pending)
+WATCH_CONFIG = {
+    'use_inotify': True,  # inotify en Linux; en otros sistemas se usa sondeo
+    'poll_interval': 0.5,  # Intervalo de sondeo en segundos (modo respaldo)
+    'settle_time': 0.3,  # Segundos con tamaño y mtime estables antes de procesar
+    'rescan_interval': 30.0,  # Re-escaneo completo de seguridad en modo inotify
+    'idle_timeout': 5.0,  # Espera máxima por ciclo antes de tareas periódicas
+}
+
 # Configuración de automatización SAP
 SAP_AUTOMATION_CONFIG = {
     'simulation_mode': True,  # True = simular, False = automatización real
@@ -88,6 +136,53 @@ SAP_AUTOMATION_CONFIG = {
     'search_timeout': 10,  # Timeout de búsqueda de imágenes en segundos
     'type_interval': 0.05,  # Intervalo entre teclas al escribir
     'action_delay': 0.5,  # Delay entre acciones en segundos
+    'template_cache_size': 64,  # Plantillas de assets/images/sap decodificadas en memoria (LRU)
+    'location_cache_file': 'vision_state.json',  # Última posición de cada plantilla entre ejecuciones
+    'roi_padding': 40,  # Margen en píxeles al buscar cerca de la última posición
+    'pyramid_levels': 2,  # Búsqueda gruesa a fina en capturas grandes (0 = desactivada)
+    'poll_interval': 0.03,  # Intervalo inicial entre capturas al esperar un estado de pantalla
+    'max_poll_interval': 0.5,  # Intervalo máximo mientras la pantalla no cambia
+    'poll_backoff': 1.5,  # Factor de crecimiento del intervalo
+    'settle_time': 0.3,  # Segundos sin cambios para considerar la pantalla estable
+    'change_threshold': 0.002,  # Fracción de píxeles que debe cambiar tras una acción
+    'save_timeout': 30,  # Tiempo máximo de espera al guardar una orden
+    'batch_mode': False,  # Mantener el formulario de Orden de Venta abierto entre órdenes (requiere form_image)
+    'form_image': None,  # Imagen visible solo con el formulario abierto (ej. 'formulario/orden_venta.png')
+    'bulk_paste': False,  # Pegar los items desde el portapapeles en lugar de escribirlos (requiere grid_copy_keys)
+    'paste_chunk_size': 100,  # Items por pegado
+    'paste_columns': ('codigo', 'cantidad'),  # Columnas de la tabla desde la celda activa (None = saltar)
+    'grid_copy_keys': ('ctrl', 'c'),  # Atajo para copiar las filas pegadas y contarlas (None = sin pegado en bloque)
+    'capture_backend': 'auto',  # Captura de pantalla: 'auto' (mss si está instalado), 'mss' o 'pyautogui'
+    'record_file': None,  # Grabar capturas y entrada del modo real en este archivo (ver recording.py)
+}
+
+# Simulación de capacidad con reloj virtual (simulation.py)
+SIMULATION_CONFIG = {
+    # Duración de cada acción en segundos: un número fijo o una distribución
+    # {'kind': 'normal'|'lognormal', 'mean': ..., 'stdev': ...}. Son estimaciones:
+    # con metrics.json de una ejecución real usar simulation.py --fit
+    'latencies': {
+        'click': {'kind': 'lognormal', 'mean': 0.6, 'stdev': 0.2},
+        'type': {'kind': 'lognormal', 'mean': 0.4, 'stdev': 0.1},
+        'keystroke': 0.05,
+        'key': {'kind': 'lognormal', 'mean': 0.35, 'stdev': 0.1},
+        'item': {'kind': 'lognormal', 'mean': 1.2, 'stdev': 0.4},
+        'paste': {'kind': 'lognormal', 'mean': 3.0, 'stdev': 1.0},
+        'save': {'kind': 'lognormal', 'mean': 2.0, 'stdev': 0.8},
+        'close': 0.5,
+        'reset': 0.4,
+    },
+    'items_mean': 20,  # Items promedio por orden de la carga sintética
+    'items_max': 500,  # Máximo de items por orden
+    'lanes': 1,  # Carriles a simular por defecto
+    'seed': 0,  # Semilla para resultados reproducibles
+}
+
+# Perfiles de tiempos de entrada (calibrate_timing.py)
+TIMING_CONFIG = {
+    'profile': 'default',  # Perfil a usar; 'default' = tiempos fijos de este archivo
+    'profiles_file': 'timing_profiles.json',  # Perfiles calibrados por equipo
+    'safety_margin': 1.5,  # Factor de seguridad sobre los tiempos medidos al calibrar
 }
 
 # Códigos de error específicos
@@ -108,6 +203,7 @@ class ErrorCodes:
     JSON_VALIDATION_FAILED = "FILE002"
     JSON_PROCESSING_FAILED = "FILE003"
     FILE_MOVE_FAILED = "FILE004"
+    BACKUP_FAILED = "FILE005"
     
     # Errores de red/sistema
     POWERSHELL_TIMEOUT = "NET001"
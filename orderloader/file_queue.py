@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Colas de Archivos - OrderLoader
+Escaneo escalable de data/pending y contadores de estado O(1)
+"""
+
+import os
+import re
+import sys
+import errno
+import heapq
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+class PendingFiles:
+    """
+    Archivos pendientes en orden de llegada, entregados de forma perezosa.
+
+    Internamente es un heap de (st_ctime, nombre): construirlo es O(n) y
+    cada archivo se extrae en O(log n) solo cuando se consume, así que el
+    primer archivo está disponible sin ordenar todo el directorio.
+    """
+
+    def __init__(self, path: Path, heap: List[Tuple[float, str]]):
+        self.path = path
+        self._heap = heap
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def __iter__(self) -> Iterator[Path]:
+        while self._heap:
+            _, name = heapq.heappop(self._heap)
+            yield self.path / name
+
+
+class QueueScanner:
+    """
+    Escáner de colas basado en os.scandir.
+
+    Reutiliza el stat cacheado de cada DirEntry (gratis en Windows, una
+    sola llamada en Linux) y mantiene contadores de pendientes y
+    completados que se actualizan de forma incremental, de modo que
+    consultar el estado no requiere listar los directorios.
+    """
+
+    def __init__(self, pending_path: Path, completed_path: Path, extensions: List[str]):
+        """
+        Inicializar escáner.
+
+        Args:
+            pending_path: Directorio de archivos pendientes
+            completed_path: Directorio de archivos completados
+            extensions: Extensiones aceptadas (ej. ['.json'])
+        """
+        self.pending_path = pending_path
+        self.completed_path = completed_path
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.pending_count: Optional[int] = None
+        self.completed_count: Optional[int] = None
+
+    def _accepts(self, name: str) -> bool:
+        return name.lower().endswith(self.extensions)
+
+    def scan_pending(self) -> PendingFiles:
+        """
+        Escanear pendientes y preparar su entrega en orden de llegada.
+
+        Actualiza el contador de pendientes con el resultado del escaneo.
+
+        Returns:
+            PendingFiles: Iterable perezoso de archivos (más antiguos primero).
+        """
+        heap = []
+        try:
+            with os.scandir(self.pending_path) as entries:
+                for entry in entries:
+                    if not self._accepts(entry.name):
+                        continue
+                    try:
+                        if entry.is_file():
+                            heap.append((entry.stat().st_ctime, entry.name))
+                    except FileNotFoundError:
+                        continue
+        except FileNotFoundError:
+            pass
+
+        self.pending_count = len(heap)
+        return PendingFiles(self.pending_path, heap)
+
+    def count_files(self, path: Path) -> int:
+        """
+        Contar archivos aceptados en un directorio (sin stat por archivo).
+
+        Args:
+            path: Directorio a contar
+
+        Returns:
+            int: Número de archivos
+        """
+        count = 0
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if self._accepts(entry.name) and entry.is_file():
+                        count += 1
+        except FileNotFoundError:
+            pass
+        return count
+
+    def ensure_counters(self):
+        """Sembrar los contadores con un único escaneo si aún no existen"""
+        if self.pending_count is None:
+            self.pending_count = self.count_files(self.pending_path)
+        if self.completed_count is None:
+            self.completed_count = self.count_files(self.completed_path)
+
+    def record_arrival(self, count: int = 1):
+        """Registrar archivos nuevos en pendientes (modo watch)"""
+        self.ensure_counters()
+        self.pending_count += count
+
+    def record_completed(self):
+        """Registrar el movimiento de un archivo de pendientes a completados"""
+        self.ensure_counters()
+        self.pending_count = max(self.pending_count - 1, 0)
+        self.completed_count += 1
+
+    def status(self) -> Dict[str, int]:
+        """
+        Estado de las colas en O(1) una vez sembrados los contadores.
+
+        Returns:
+            Dict[str, int]: pending, completed y total
+        """
+        self.ensure_counters()
+        return {
+            'pending': self.pending_count,
+            'completed': self.completed_count,
+            'total': self.pending_count + self.completed_count
+        }
+
+
+class CompletedNameIndex:
+    """
+    Índice de nombres del directorio de completados.
+
+    Guarda los nombres existentes y, por cada (stem, extensión), el mayor
+    sufijo numérico usado (``stem_N.ext``). Se siembra con un único escaneo
+    al iniciar, así que asignar un nombre libre es O(1) sin sondear el
+    sistema de archivos. El nombre original se conserva si está libre.
+
+    El directorio es la única fuente de verdad: el índice se reconstruye
+    en cada arranque y los movimientos nunca sobrescriben (enlace duro +
+    borrado en POSIX, rename en Windows). Si el índice quedara
+    desactualizado, la colisión se detecta al mover y se re-sincroniza.
+    """
+
+    _SUFFIX_RE = re.compile(r'^(.*)_(\d+)$')
+
+    def __init__(self, path: Path, extensions: List[str]):
+        """
+        Inicializar índice.
+
+        Args:
+            path: Directorio de completados
+            extensions: Extensiones que cuentan como archivos completados
+        """
+        self.path = path
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self._names: Set[str] = set()
+        self._max_suffix: Dict[Tuple[str, str], int] = {}
+        self.file_count = 0
+
+    def _register(self, name: str):
+        self._names.add(name)
+        stem, ext = os.path.splitext(name)
+        match = self._SUFFIX_RE.match(stem)
+        if match:
+            base_key = (match.group(1), ext)
+            number = int(match.group(2))
+            if self._max_suffix.get(base_key, -1) < number:
+                self._max_suffix[base_key] = number
+        if name.lower().endswith(self.extensions):
+            self.file_count += 1
+
+    def load(self):
+        """Reconstruir el índice con un único escaneo del directorio"""
+        self._names.clear()
+        self._max_suffix.clear()
+        self.file_count = 0
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    self._register(entry.name)
+        except FileNotFoundError:
+            pass
+
+    def allocate(self, name: str) -> Path:
+        """
+        Reservar un nombre libre para name en O(1).
+
+        Args:
+            name: Nombre original del archivo
+
+        Returns:
+            Path: Destino libre (name, o stem_N.ext si ya existe)
+        """
+        if name in self._names:
+            stem, ext = os.path.splitext(name)
+            name = f"{stem}_{self._max_suffix.get((stem, ext), 0) + 1}{ext}"
+        self._register(name)
+        return self.path / name
+
+    def move_into(self, file_path: Path) -> Path:
+        """
+        Mover un archivo al directorio sin sobrescribir nunca un destino.
+
+        Args:
+            file_path: Archivo a mover
+
+        Returns:
+            Path: Destino final
+        """
+        destination = self.allocate(file_path.name)
+        try:
+            _move_no_replace(file_path, destination)
+        except FileExistsError:
+            # Índice desactualizado (escritura externa): re-sincronizar y reintentar
+            self.load()
+            destination = self.allocate(file_path.name)
+            _move_no_replace(file_path, destination)
+        return destination
+
+    def recover(self, pending_path: Path) -> List[Path]:
+        """
+        Completar movimientos interrumpidos por una caída.
+
+        En POSIX el movimiento es enlace duro + borrado; si el proceso cae
+        entre ambos pasos, el archivo queda en pendientes con st_nlink > 1
+        y un enlace en completados. Aquí se termina ese borrado para que la
+        orden no se procese dos veces.
+
+        Args:
+            pending_path: Directorio de pendientes
+
+        Returns:
+            List[Path]: Archivos de pendientes que se limpiaron
+        """
+        if sys.platform == 'win32':
+            return []
+
+        linked = {}
+        try:
+            with os.scandir(pending_path) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_nlink > 1:
+                            linked[(st.st_dev, st.st_ino)] = Path(entry.path)
+        except FileNotFoundError:
+            return []
+        if not linked:
+            return []
+
+        recovered = []
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                pending_file = linked.pop((st.st_dev, st.st_ino), None)
+                if pending_file is not None:
+                    pending_file.unlink()
+                    recovered.append(pending_file)
+        return recovered
+
+
+def _move_no_replace(source: Path, destination: Path):
+    """
+    Mover source a destination fallando si destination ya existe.
+
+    Raises:
+        FileExistsError: Si el destino ya existe
+    """
+    if sys.platform == 'win32':
+        # En Windows os.rename nunca sobrescribe
+        os.rename(source, destination)
+        return
+
+    try:
+        os.link(source, destination)
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EMLINK):
+            raise
+        # Sistema de archivos sin enlaces duros o en otro dispositivo
+        if destination.exists():
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(destination))
+        shutil.move(str(source), str(destination))
+        return
+    os.unlink(source)
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carriles de Ejecución - OrderLoader
+Varias sesiones SAP en paralelo, una por display
+"""
+
+import os
+import time
+import queue
+import shutil
+import logging
+import threading
+import subprocess
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config import LANES_CONFIG, LOGS_PATH, METRICS_CONFIG
+from spans import SpanRecorder, traced
+
+# El entorno del proceso padre se modifica al lanzar cada carril
+_ENV_LOCK = threading.Lock()
+
+
+class LaneResult:
+    """
+    Resultado de un carril.
+
+    Con file_path None es el aviso de arranque del carril: success indica
+    si quedó listo para recibir órdenes. spans trae los histogramas por
+    paso acumulados por el carril hasta esta orden (SpanRecorder.to_dict()).
+    """
+
+    __slots__ = ('lane', 'file_path', 'success', 'duration', 'error', 'spans')
+
+    def __init__(self, lane: str, file_path: Optional[Path], success: bool,
+                 duration: float = 0.0, error: Optional[str] = None,
+                 spans: Optional[Dict[str, Any]] = None):
+        self.lane = lane
+        self.file_path = file_path
+        self.success = success
+        self.duration = duration
+        self.error = error
+        self.spans = spans
+
+
+class SimulatedAutomation:
+    """
+    Backend de carril sin pantalla ni pyautogui.
+
+    Recorre los items de la orden con una demora fija por item; sirve para
+    probar el reparto entre carriles en cualquier máquina.
+    """
+
+    def __init__(self, logger: logging.Logger, item_delay: float = 0.0):
+        self.logger = logger
+        self.item_delay = item_delay
+        self.spans = SpanRecorder(enabled=METRICS_CONFIG['track_spans'])
+
+    @traced('process_order')
+    def process_order(self, order: Any) -> bool:
+        """Simular el ingreso de una orden"""
+        count = 0
+        for _ in order.items:
+            if self.item_delay:
+                time.sleep(self.item_delay)
+            count += 1
+        self.logger.info(f"🎭 SIMULACIÓN: Orden {order.orden_compra} ({count} items)")
+        return True
+
+
+def create_automation(backend: str, logger: logging.Logger, item_delay: float = 0.0,
+                      name: Optional[str] = None):
+    """
+    Crear el backend de automatización de un carril.
+
+    Se llama dentro del proceso del carril: con 'sap', pyautogui se importa
+    aquí y queda ligado al DISPLAY del carril.
+
+    Args:
+        backend: 'sap' (SAPAutomation) o 'simulated' (sin pantalla)
+        logger: Logger del carril
+        item_delay: Demora por item del backend simulado
+        name: Nombre del carril (ver SAPAutomation.from_config)
+
+    Returns:
+        Objeto con process_order(order) -> bool
+    """
+    if backend == 'simulated':
+        return SimulatedAutomation(logger, item_delay)
+    if backend == 'sap':
+        from sap_automation import SAPAutomation
+        return SAPAutomation.from_config(logger, lane=name)
+    raise ValueError(f"Backend de carril desconocido: {backend}")
+
+
+def _lane_main(name: str, backend: str, item_delay: float, tasks, results):
+    """Bucle del proceso de un carril: una orden a la vez"""
+    LOGS_PATH.mkdir(parents=True, exist_ok=True)
+    log_file = LOGS_PATH / f"orderloader_{datetime.now().strftime('%Y%m%d')}_{name}.log"
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - {name} - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    logger = logging.getLogger(f"orderloader.{name}")
+
+    try:
+        automation = create_automation(backend, logger, item_delay, name)
+    except Exception as e:
+        results.put(LaneResult(name, None, False, error=f"{type(e).__name__} - {e}"))
+        return
+    results.put(LaneResult(name, None, True))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            end_batch = getattr(automation, 'end_batch', None)
+            if end_batch is not None:
+                try:
+                    end_batch()
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo cerrar el formulario del lote: {e}")
+            return
+        file_path, order = task
+        start_time = time.time()
+        try:
+            success, error = bool(automation.process_order(order)), None
+        except Exception as e:
+            success, error = False, f"{type(e).__name__} - {e}"
+        spans = getattr(automation, 'spans', None)
+        results.put(LaneResult(name, file_path, success, time.time() - start_time, error,
+                               spans.to_dict() if spans is not None and spans.steps else None))
+
+
+class VirtualDisplay:
+    """Servidor Xvfb propio de un carril (Linux)"""
+
+    def __init__(self, display: str, screen: str = '1920x1080x24'):
+        """
+        Inicializar display virtual.
+
+        Args:
+            display: Display X a crear (ej. ':101')
+            screen: Geometría y profundidad de la pantalla
+        """
+        self.display = display
+        self.screen = screen
+        self._process: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 10.0):
+        """
+        Lanzar Xvfb y esperar a que acepte conexiones.
+
+        Raises:
+            RuntimeError: Si Xvfb no está instalado o no arranca a tiempo
+        """
+        executable = shutil.which('Xvfb')
+        if executable is None:
+            raise RuntimeError("Xvfb no está instalado")
+
+        self._process = subprocess.Popen(
+            [executable, self.display, '-screen', '0', self.screen, '-nolisten', 'tcp'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        socket_path = Path('/tmp/.X11-unix') / f"X{self.display.lstrip(':').split('.')[0]}"
+        deadline = time.monotonic() + timeout
+        while not socket_path.exists():
+            if self._process.poll() is not None or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError(f"Xvfb no arrancó en {self.display}")
+            time.sleep(0.05)
+
+    def stop(self):
+        """Detener Xvfb"""
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process = None
+
+
+class Lane:
+    """
+    Carril de ejecución: un proceso con su display y su SAPAutomation.
+
+    pyautogui trabaja sobre una pantalla global por proceso, así que cada
+    carril es un proceso 'spawn' propio lanzado con DISPLAY apuntando a su
+    display. Cada display debe tener su propia sesión SAP abierta.
+    """
+
+    def __init__(self, name: str, display: Optional[str] = None, backend: str = 'sap',
+                 item_delay: float = 0.0, virtual_display: bool = False,
+                 screen: str = '1920x1080x24'):
+        """
+        Inicializar carril.
+
+        Args:
+            name: Nombre del carril (aparece en logs y métricas)
+            display: Display X del carril (None = el del proceso actual)
+            backend: 'sap' o 'simulated' (ver create_automation)
+            item_delay: Demora por item del backend simulado
+            virtual_display: Lanzar un Xvfb propio en display
+            screen: Geometría del Xvfb
+        """
+        self.name = name
+        self.display = display
+        self.backend = backend
+        self.item_delay = item_delay
+        self.virtual_display = VirtualDisplay(display, screen) if virtual_display and display else None
+        self.busy: Optional[Path] = None
+        self.alive = False
+        self.process = None
+        self.tasks = None
+
+    def start(self, context, results):
+        """
+        Lanzar el proceso del carril.
+
+        Args:
+            context: Contexto multiprocessing 'spawn'
+            results: Cola compartida de LaneResult
+        """
+        if self.virtual_display:
+            self.virtual_display.start()
+
+        self.tasks = context.Queue()
+        self.process = context.Process(
+            target=_lane_main, name=f"Lane-{self.name}",
+            args=(self.name, self.backend, self.item_delay, self.tasks, results),
+            daemon=True
+        )
+        # El proceso hijo hereda el entorno al arrancar: DISPLAY debe estar
+        # definido antes de que importe pyautogui
+        with _ENV_LOCK:
+            previous = os.environ.get('DISPLAY')
+            if self.display:
+                os.environ['DISPLAY'] = self.display
+            try:
+                self.process.start()
+            finally:
+                if previous is None:
+                    os.environ.pop('DISPLAY', None)
+                else:
+                    os.environ['DISPLAY'] = previous
+
+    def submit(self, file_path: Path, order: Any):
+        """Entregar una orden al carril (debe estar libre)"""
+        self.busy = file_path
+        self.tasks.put((file_path, order))
+
+    def stop(self, timeout: float = 10.0):
+        """Detener el proceso del carril y su display"""
+        if self.process is not None:
+            if self.process.is_alive():
+                self.tasks.put(None)
+                self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout)
+            self.process = None
+        if self.virtual_display:
+            self.virtual_display.stop()
+        self.alive = False
+
+
+class LaneScheduler:
+    """
+    Reparte órdenes de la cola compartida al primer carril libre.
+
+    El proceso principal sigue haciendo la ingesta, el backup y el
+    movimiento a completados; los carriles solo ingresan órdenes en SAP.
+    Con N carriles hay hasta N órdenes en curso, y los resultados se
+    entregan a on_done a medida que terminan (no necesariamente en orden).
+    """
+
+    def __init__(self, logger: logging.Logger, lanes: List[Lane],
+                 on_done: Callable[[LaneResult], None], start_timeout: float = 60.0):
+        """
+        Inicializar scheduler.
+
+        Args:
+            logger: Logger para registro de eventos
+            lanes: Carriles a usar
+            on_done: Callback con el LaneResult de cada orden terminada
+            start_timeout: Espera máxima por el arranque de los carriles
+        """
+        self.logger = logger
+        self.lanes = lanes
+        self.on_done = on_done
+        self.start_timeout = start_timeout
+        self._by_name: Dict[str, Lane] = {lane.name: lane for lane in lanes}
+        self._results = None
+        self._started = False
+
+    def start(self) -> int:
+        """
+        Arrancar todos los carriles y esperar a que estén listos.
+
+        Returns:
+            int: Número de carriles listos
+
+        Raises:
+            RuntimeError: Si ningún carril quedó listo
+        """
+        context = multiprocessing.get_context('spawn')
+        self._results = context.Queue()
+        for lane in self.lanes:
+            try:
+                lane.start(context, self._results)
+            except Exception as e:
+                self.logger.error(f"❌ No se pudo lanzar el carril {lane.name}: {e}")
+
+        pending = {lane.name for lane in self.lanes if lane.process is not None}
+        deadline = time.monotonic() + self.start_timeout
+        while pending and time.monotonic() < deadline:
+            try:
+                result = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            lane = self._by_name[result.lane]
+            pending.discard(lane.name)
+            lane.alive = result.success
+            if result.success:
+                self.logger.info(f"🛣️ Carril {lane.name} listo (display {lane.display or 'actual'})")
+            else:
+                self.logger.error(f"❌ Carril {lane.name} no arrancó: {result.error}")
+                lane.stop()
+
+        for name in pending:
+            self.logger.error(f"❌ Carril {name} no respondió al arrancar")
+            self._by_name[name].stop()
+
+        self._started = True
+        ready = sum(1 for lane in self.lanes if lane.alive)
+        if not ready:
+            raise RuntimeError("Ningún carril de ejecución disponible")
+        return ready
+
+    @property
+    def in_flight(self) -> int:
+        """Órdenes en curso en los carriles"""
+        return sum(1 for lane in self.lanes if lane.busy is not None)
+
+    def submit(self, file_path: Path, order: Any) -> str:
+        """
+        Entregar una orden al primer carril libre (bloquea si todos están ocupados).
+
+        Args:
+            file_path: Archivo de origen de la orden
+            order: Orden preparada (Order o StreamingOrder)
+
+        Returns:
+            str: Nombre del carril asignado
+        """
+        if not self._started:
+            self.start()
+        while True:
+            for lane in self.lanes:
+                if lane.alive and lane.busy is None:
+                    lane.submit(file_path, order)
+                    return lane.name
+            self._collect()
+
+    def drain(self):
+        """Esperar a que terminen todas las órdenes en curso"""
+        while self.in_flight:
+            self._collect()
+
+    def _collect(self, timeout: float = 1.0):
+        """Esperar un resultado; detecta carriles caídos mientras espera"""
+        try:
+            result = self._results.get(timeout=timeout)
+        except queue.Empty:
+            self._check_lanes()
+            return
+
+        lane = self._by_name[result.lane]
+        if result.file_path is None:
+            return
+        lane.busy = None
+        self.on_done(result)
+
+    def _check_lanes(self):
+        for lane in self.lanes:
+            if lane.alive and not lane.process.is_alive():
+                self.logger.error(f"❌ Carril {lane.name} terminó inesperadamente")
+                lane.alive = False
+                if lane.busy is not None:
+                    file_path, lane.busy = lane.busy, None
+                    self.on_done(LaneResult(lane.name, file_path, False,
+                                            error="El carril terminó inesperadamente"))
+        if not any(lane.alive for lane in self.lanes):
+            raise RuntimeError("Ningún carril de ejecución disponible")
+
+    def close(self):
+        """Esperar lo pendiente y detener los carriles"""
+        if self._started:
+            try:
+                self.drain()
+            except RuntimeError:
+                pass
+        for lane in self.lanes:
+            lane.stop()
+        self._started = False
+
+
+def lanes_from_config(config: Optional[Dict[str, Any]] = None) -> List[Lane]:
+    """
+    Construir los carriles definidos en LANES_CONFIG.
+
+    Args:
+        config: Configuración a usar (por defecto LANES_CONFIG)
+
+    Returns:
+        List[Lane]: Un carril por sesión SAP configurada
+    """
+    config = config or LANES_CONFIG
+    return [
+        Lane(
+            spec['name'],
+            display=spec.get('display'),
+            backend=config['backend'],
+            item_delay=config['item_delay'],
+            virtual_display=config['start_xvfb'],
+            screen=config['xvfb_screen']
+        )
+        for spec in config['lanes']
+    ]
@@ -9,11 +9,11 @@ import sys
 import io
 import json
 import time
-import shutil
 import logging
 import subprocess
 import functools
-import gzip
+import threading
+import argparse
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Callable
@@ -21,6 +21,14 @@ from typing import Optional, Dict, Any, List, Callable
 import pyautogui
 from config import *
 from sap_automation import SAPAutomation
+from order import Order
+from order_schema import ORDER_VALIDATOR
+from watcher import PendingWatcher
+from pipeline import OrderPipeline, PreparedOrder, prepare_order
+from lanes import LaneResult, LaneScheduler, lanes_from_config
+from file_queue import QueueScanner, CompletedNameIndex
+from backup_archive import BackupArchive, BackupWriter
+from timing_profiles import TimingProfile, load_profile
 
 # Fix encoding for Windows console
 if sys.platform == 'win32':
@@ -49,9 +57,22 @@ class MetricsCollector:
             'failed_files': 0,
             'retry_attempts': 0,
             'errors': [],
-            'performance': {}
+            'performance': {},
+            'backup': self._empty_backup_metrics()
         }
         self.metrics_file = PROJECT_ROOT / METRICS_CONFIG['metrics_file']
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _empty_backup_metrics() -> Dict[str, Any]:
+        return {
+            'written': 0,
+            'failed': 0,
+            'queue_depth': 0,
+            'max_queue_depth': 0,
+            'avg_lag': 0.0,
+            'max_lag': 0.0
+        }
     
     def start_session(self):
         """Iniciar sesión de métricas"""
@@ -61,6 +82,7 @@ class MetricsCollector:
         self.metrics['failed_files'] = 0
         self.metrics['retry_attempts'] = 0
         self.metrics['errors'] = []
+        self.metrics['backup'] = self._empty_backup_metrics()
     
     def record_file_processed(self, success: bool, file_name: str, duration: float):
         """Registrar archivo procesado"""
@@ -76,6 +98,58 @@ class MetricsCollector:
             'timestamp': datetime.now().isoformat()
         }
     
+    def record_backup(self, success: bool, queue_depth: int, lag: float):
+        """
+        Registrar un backup confirmado por el escritor en segundo plano.
+        
+        Se llama desde el hilo del escritor.
+        
+        Args:
+            success: True si el backup quedó durable
+            queue_depth: Backups que siguen en cola
+            lag: Segundos desde la ingesta hasta la confirmación
+        """
+        with self._lock:
+            backup = self.metrics['backup']
+            if success:
+                backup['written'] += 1
+                backup['avg_lag'] += (lag - backup['avg_lag']) / backup['written']
+            else:
+                backup['failed'] += 1
+            backup['queue_depth'] = queue_depth
+            backup['max_queue_depth'] = max(backup['max_queue_depth'], queue_depth)
+            backup['max_lag'] = max(backup['max_lag'], lag)
+    
+    def record_latencies(self, samples: Dict[str, Any]):
+        """
+        Registrar las duraciones reales por acción de SAPAutomation.
+        
+        simulation.py --fit ajusta con ellas las latencias simuladas.
+        
+        Args:
+            samples: Duraciones en segundos por acción
+        """
+        with self._lock:
+            self.metrics['latencies'] = {
+                primitive: [round(value, 4) for value in values]
+                for primitive, values in samples.items() if values
+            }
+    
+    def record_spans(self, spans: Dict[str, Any], lane: Optional[str] = None):
+        """
+        Registrar los histogramas por paso de SAPAutomation (ver spans.py).
+        
+        Args:
+            spans: SpanRecorder.to_dict(): duración, fallos y atributos por paso
+            lane: Carril que los midió (quedan en 'lane_spans'), o None
+                para los del proceso principal
+        """
+        with self._lock:
+            if lane is None:
+                self.metrics['spans'] = spans
+            else:
+                self.metrics.setdefault('lane_spans', {})[lane] = spans
+    
     def record_retry(self, error_code: str, attempt: int):
         """Registrar intento de retry"""
         self.metrics['retry_attempts'] += 1
@@ -93,8 +167,10 @@ class MetricsCollector:
     def save_metrics(self):
         """Guardar métricas en archivo"""
         try:
+            with self._lock:
+                content = json.dumps(self.metrics, indent=2, ensure_ascii=False)
             with open(self.metrics_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metrics, f, indent=2, ensure_ascii=False)
+                f.write(content)
         except Exception as e:
             print(f"Error guardando métricas: {e}")
     
@@ -148,8 +224,9 @@ def retry_with_backoff(max_attempts: int = None, base_delay: float = None,
 class WindowManager:
     """Gestor de ventanas y navegación SAP"""
     
-    def __init__(self, logger):
+    def __init__(self, logger, timing: Optional[TimingProfile] = None):
         self.logger = logger
+        self.timing = timing or load_profile(logger=logger)
     
     @retry_with_backoff()
     def activate_sap_chrome_window(self) -> bool:
@@ -164,11 +241,11 @@ class WindowManager:
         try:
             # Configurar pyautogui
             pyautogui.FAILSAFE = PYAUTOGUI_FAILSAFE
-            pyautogui.PAUSE = PYAUTOGUI_PAUSE
+            pyautogui.PAUSE = self.timing.pyautogui_pause
             
             # Presionar Alt+Tab para cambiar a la ventana correcta
             pyautogui.hotkey('alt', 'tab')
-            time.sleep(WINDOW_ACTIVATION_DELAY)  # Esperar a que se active
+            time.sleep(self.timing.window_activation_delay)  # Esperar a que se active
             
             self.logger.info("✅ Ventana de SAP activada")
             return True
@@ -189,7 +266,7 @@ class WindowManager:
         self.logger.info("📱 Maximizando ventana...")
         try:
             pyautogui.hotkey('win', 'up')
-            time.sleep(WINDOW_MAXIMIZE_DELAY)
+            time.sleep(self.timing.window_maximize_delay)
             self.logger.info("✅ Ventana maximizada")
             return True
         except Exception as e:
@@ -197,6 +274,29 @@ class WindowManager:
             self.logger.error(f"   Detalles: {type(e).__name__} - {str(e)}")
             return False
     
+    def is_sap_active(self) -> bool:
+        """
+        Health check barato: verificar que la ventana activa sea SAP en Chrome.
+        
+        Solo consulta el título de la ventana activa (sin PowerShell ni
+        esperas). Si la plataforma no permite consultarlo, asume que el
+        entorno sigue listo.
+        
+        Returns:
+            bool: True si la ventana activa parece ser SAP en Chrome.
+        """
+        get_title = getattr(pyautogui, 'getActiveWindowTitle', None)
+        if get_title is None:
+            return True
+        
+        try:
+            title = (get_title() or '').lower()
+        except Exception as e:
+            self.logger.debug(f"No se pudo leer la ventana activa: {e}")
+            return True
+        
+        return any(keyword in title for keyword in CHROME_KEYWORDS + SAP_APP_KEYWORDS)
+    
     def verify_sap(self) -> bool:
         """
         Verificar que SAP esté visible en el sistema.
@@ -279,177 +379,283 @@ class WindowManager:
 class FileProcessor:
     """Procesador de archivos JSON"""
 
-    def __init__(self, logger, metrics):
+    def __init__(self, logger, metrics, timing: Optional[TimingProfile] = None):
         self.logger = logger
         self.metrics = metrics
+        self.timing = timing or load_profile(logger=logger)
         self.backup_path = PROJECT_ROOT / BACKUP_CONFIG['backup_path']
+        self.backup_archive = BackupArchive(
+            self.backup_path,
+            codec=BACKUP_CONFIG['codec'] if BACKUP_CONFIG['compress_backups'] else 'none',
+            level=BACKUP_CONFIG['compression_level'],
+            rotation=BACKUP_CONFIG['archive_rotation']
+        )
+        self.backup_writer = BackupWriter(
+            self.backup_archive,
+            max_queue=BACKUP_CONFIG['writer_queue_size'],
+            max_bytes=BACKUP_CONFIG['writer_max_bytes'],
+            on_written=metrics.record_backup
+        )
+        self._pending_backups: Dict[Path, Any] = {}
 
         # Inicializar automatización SAP
-        assets_path = PROJECT_ROOT / "assets" / "images" / "sap"
-        simulation_mode = SAP_AUTOMATION_CONFIG['simulation_mode']
-        self.sap_automation = SAPAutomation(
-            logger=logger,
-            assets_path=assets_path,
-            simulation_mode=simulation_mode
-        )
+        self.sap_automation = SAPAutomation.from_config(logger, self.timing)
     
-    def create_backup(self, file_path: Path) -> bool:
+    def create_backup(self, file_path: Path, raw: Optional[bytes]) -> bool:
         """
         Crear backup de archivo antes de procesar.
         
+        Los bytes se entregan al escritor en segundo plano, que los agrega
+        al archivo de backups de la sesión/día (ver backup_archive). La
+        confirmación de durabilidad se espera con confirm_backup() antes
+        de mover la orden a completados.
+        
         Args:
             file_path (Path): Ruta al archivo a respaldar.
+            raw (Optional[bytes]): Contenido ya leído del archivo (se respalda sin
+                releerlo), o None para órdenes grandes leídas por partes: el
+                escritor lee el archivo por bloques.
             
         Returns:
-            bool: True si el backup fue exitoso, False en caso contrario.
+            bool: True si el backup fue encolado, False en caso contrario.
         """
         if not BACKUP_CONFIG['enabled']:
             return True
             
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_name = f"{file_path.stem}_{timestamp}{file_path.suffix}"
-            backup_file = self.backup_path / backup_name
-            
-            if BACKUP_CONFIG['compress_backups']:
-                backup_file = backup_file.with_suffix('.gz')
-                with open(file_path, 'rb') as f_in:
-                    with gzip.open(backup_file, 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
+            if raw is None:
+                future = self.backup_writer.submit_file(file_path.name, file_path)
             else:
-                shutil.copy2(file_path, backup_file)
-            
-            self.logger.info(f"💾 Backup creado: {backup_name}")
+                future = self.backup_writer.submit(file_path.name, raw)
+            self._pending_backups[file_path] = future
             return True
             
         except Exception as e:
             self.logger.error(f"❌ Error creando backup: {e}")
             return False
     
-    def validate_json(self, file_path: Path) -> bool:
+    def confirm_backup(self, file_path: Path, wait: bool = True) -> bool:
         """
-        Validar estructura y contenido de archivo JSON.
-        
-        Verifica que el archivo contenga:
-        - orden_compra, fecha_documento, comprador, items
-        - comprador con nit y nombre
-        - items como lista con descripcion, codigo, cantidad, precio_unitario
+        Esperar a que el backup de un archivo sea durable.
         
         Args:
-            file_path (Path): Ruta al archivo JSON a validar.
+            file_path (Path): Archivo cuyo backup se encoló en la ingesta.
+            wait (bool): Si False, solo libera el seguimiento sin esperar.
             
         Returns:
-            bool: True si el archivo es válido, False en caso contrario.
+            bool: True si el backup quedó durable (o backups desactivados).
         """
+        future = self._pending_backups.pop(file_path, None)
+        if future is None or not wait:
+            return True
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            required_fields = ['orden_compra', 'fecha_documento', 'comprador', 'items']
-            for field in required_fields:
-                if field not in data:
-                    self.logger.error(f"❌ Campo faltante: {field}")
-                    return False
-            
-            # Validar comprador
-            comprador = data.get('comprador', {})
-            if not isinstance(comprador, dict) or 'nit' not in comprador or 'nombre' not in comprador:
-                self.logger.error("❌ Comprador inválido")
-                return False
+            entry = future.result(timeout=BACKUP_CONFIG['confirm_timeout'])
+            self.logger.info(f"💾 Backup creado: {entry['name']} → {self.backup_archive.current_archive.name}")
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Error creando backup de {file_path.name}: {type(e).__name__} - {e}")
+            return False
+    
+    def record_automation_metrics(self):
+        """Pasar a las métricas las latencias y spans acumulados por SAPAutomation"""
+        if self.sap_automation.latency_samples:
+            self.metrics.record_latencies(self.sap_automation.latency_samples)
+        if self.sap_automation.spans.steps:
+            self.metrics.record_spans(self.sap_automation.spans.to_dict())
+    
+    def close(self):
+        """Cerrar el formulario del lote y la captura, escribir backups pendientes y cerrar el archivo de backups"""
+        try:
+            self.sap_automation.end_batch()
+        except Exception as e:
+            self.logger.warning(f"⚠️ No se pudo cerrar el formulario del lote: {e}")
+        self.record_automation_metrics()
+        self.sap_automation.screen.close()
+        self.backup_writer.close()
+        self.backup_archive.close()
+    
+    def validate_order_data(self, data: Any, file_name: str = "") -> bool:
+        """
+        Validar estructura y contenido de una orden ya decodificada.
+        
+        Usa el validador compilado de order_schema: verifica campos
+        requeridos, tipos, fechas dd/mm/yyyy y números no negativos, y
+        reporta todas las violaciones (con su ruta JSON) en una sola pasada.
+        
+        Args:
+            data (Any): Documento JSON decodificado.
+            file_name (str): Nombre del archivo (para el log).
             
-            # Validar items
-            items = data.get('items', [])
-            if not isinstance(items, list):
-                self.logger.error("❌ Items debe ser lista")
-                return False
+        Returns:
+            bool: True si la orden es válida, False en caso contrario.
+        """
+        violations = ORDER_VALIDATOR.validate(data)
+        if not violations:
+            return True
+        
+        self.log_violations(violations, file_name)
+        return False
+    
+    def log_violations(self, violations: List[Any], file_name: str = ""):
+        """
+        Registrar violaciones de esquema (hasta max_logged_errors).
+        
+        Args:
+            violations (List[SchemaViolation]): Violaciones encontradas.
+            file_name (str): Nombre del archivo (para el log).
+        """
+        self.logger.error(f"❌ [{ErrorCodes.JSON_VALIDATION_FAILED}] {len(violations)} errores de validación en {file_name or 'orden'}:")
+        max_logged = VALIDATION_CONFIG['max_logged_errors']
+        for violation in violations[:max_logged]:
+            self.logger.error(f"   • {violation}")
+        if len(violations) > max_logged:
+            self.logger.error(f"   ... y {len(violations) - max_logged} errores más")
+    
+    def accept(self, prepared: PreparedOrder) -> Optional[Order]:
+        """
+        Registrar el resultado de preparar un archivo y encolar su backup.
+        
+        La lectura, decodificación y validación ya ocurrieron en
+        pipeline.prepare_order (en este proceso o en el pool); aquí solo
+        se registran los errores y se respaldan los mismos bytes leídos.
+        
+        Args:
+            prepared (PreparedOrder): Resultado de prepare_order().
             
-            for i, item in enumerate(items):
-                if not isinstance(item, dict):
-                    self.logger.error(f"❌ Item {i} inválido")
-                    return False
-                
-                required_item_fields = ['descripcion', 'codigo', 'cantidad', 'precio_unitario']
-                for field in required_item_fields:
-                    if field not in item:
-                        self.logger.error(f"❌ Item {i}: Campo faltante: {field}")
-                        return False
+        Returns:
+            Optional[Order]: Orden lista para procesar, o None si es inválida.
+        """
+        if not self.log_prepared(prepared):
+            return None
+        
+        # Sin backup encolado la orden no podría llegar a completados
+        if not self.create_backup(prepared.file_path, prepared.raw):
+            self.logger.error(f"❌ [{ErrorCodes.BACKUP_FAILED}] No se pudo encolar el backup: {prepared.file_path.name}")
+            return None
+        return prepared.order
+    
+    def log_prepared(self, prepared: PreparedOrder) -> bool:
+        """
+        Registrar en el log el resultado de preparar un archivo.
+        
+        Args:
+            prepared (PreparedOrder): Resultado de prepare_order().
             
+        Returns:
+            bool: True si la orden es válida, False en caso contrario.
+        """
+        file_path = prepared.file_path
+        if prepared.ok:
             self.logger.info(f"✅ JSON válido: {file_path.name}")
             return True
-            
-        except json.JSONDecodeError as e:
-            self.logger.error(f"❌ [{ErrorCodes.JSON_VALIDATION_FAILED}] Error JSON en {file_path}: {e}")
-            self.logger.error(f"   Línea {e.lineno}, Columna {e.colno}: {e.msg}")
-            return False
-        except FileNotFoundError:
+        
+        if prepared.error_kind == 'not_found':
             self.logger.error(f"❌ [{ErrorCodes.FILE_NOT_FOUND}] Archivo no encontrado: {file_path}")
-            return False
-        except Exception as e:
-            self.logger.error(f"❌ [{ErrorCodes.JSON_VALIDATION_FAILED}] Error validando {file_path}: {e}")
-            self.logger.error(f"   Detalles: {type(e).__name__} - {str(e)}")
-            return False
+        elif prepared.error_kind == 'json':
+            self.logger.error(f"❌ [{ErrorCodes.JSON_VALIDATION_FAILED}] Error JSON en {file_path}")
+            self.logger.error(f"   {prepared.error}")
+        elif prepared.error_kind == 'invalid':
+            self.log_violations(prepared.violations, file_path.name)
+        else:
+            self.logger.error(f"❌ [{ErrorCodes.JSON_VALIDATION_FAILED}] Error validando {file_path}")
+            self.logger.error(f"   Detalles: {prepared.error}")
+        return False
     
-    def process_json(self, file_path: Path) -> bool:
+    def validate_json(self, file_path: Path) -> bool:
         """
-        Procesar archivo JSON de orden de compra.
+        Validar estructura y contenido de archivo JSON.
+        
+        Args:
+            file_path (Path): Ruta al archivo JSON a validar.
+            
+        Returns:
+            bool: True si el archivo es válido, False en caso contrario.
+        """
+        return self.log_prepared(prepare_order(file_path))
+    
+    def ingest(self, file_path: Path) -> Optional[Order]:
+        """
+        Etapa única de ingesta de un archivo de orden.
+        
+        Lee los bytes una sola vez, respalda esos mismos bytes, decodifica
+        y valida una sola vez y construye el objeto Order inmutable.
+        
+        Args:
+            file_path (Path): Ruta al archivo JSON.
+            
+        Returns:
+            Optional[Order]: Orden lista para procesar, o None si es inválida.
+        """
+        return self.accept(prepare_order(file_path))
+    
+    def process_order(self, order: Order, file_name: str) -> bool:
+        """
+        Procesar una orden ya ingerida en SAP.
 
-        Lee el archivo, muestra información de la orden y procesa en SAP.
-        Incluye backup automático y métricas de rendimiento.
+        Muestra información de la orden, la procesa en SAP y registra
+        métricas de rendimiento.
 
         Args:
-            file_path (Path): Ruta al archivo JSON a procesar.
+            order (Order): Orden producida por ingest().
+            file_name (str): Nombre del archivo de origen (para métricas).
 
         Returns:
             bool: True si el procesamiento fue exitoso, False en caso contrario.
         """
         start_time = time.time()
-        self.logger.info(f"📄 Procesando: {file_path.name}")
+        self.logger.info(f"📄 Procesando: {file_name}")
 
         try:
-            # Crear backup antes de procesar
-            if not self.create_backup(file_path):
-                self.logger.warning("⚠️ No se pudo crear backup, continuando...")
-
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
             # Mostrar información de la orden
-            self.logger.info(f"📋 Orden: {data.get('orden_compra', 'N/A')}")
-            self.logger.info(f"📅 Fecha: {data.get('fecha_documento', 'N/A')}")
-            self.logger.info(f"🏢 Comprador: {data.get('comprador', {}).get('nombre', 'N/A')}")
-            self.logger.info(f"💰 Total: {data.get('valor_total', 'N/A')}")
-            self.logger.info(f"📦 Items: {len(data.get('items', []))}")
+            self.logger.info(f"📋 Orden: {order.orden_compra}")
+            self.logger.info(f"📅 Fecha: {order.fecha_documento}")
+            self.logger.info(f"🏢 Comprador: {order.comprador.nombre}")
+            self.logger.info(f"💰 Total: {order.valor_total if order.valor_total is not None else 'N/A'}")
+            self.logger.info(f"📦 Items: {order.item_count if order.item_count is not None else 'por leer'}")
 
             # Procesar orden en SAP usando Computer Vision
-            success = self.sap_automation.process_order(data)
+            success = self.sap_automation.process_order(order)
 
             # Registrar métricas
             duration = time.time() - start_time
-            self.metrics.record_file_processed(success, file_path.name, duration)
+            self.metrics.record_file_processed(success, file_name, duration)
 
             if success:
-                self.logger.info(f"✅ Procesado: {file_path.name} (en {duration:.2f}s)")
+                self.logger.info(f"✅ Procesado: {file_name} (en {duration:.2f}s)")
             else:
-                self.logger.error(f"❌ Error procesando: {file_path.name}")
+                self.logger.error(f"❌ Error procesando: {file_name}")
 
             return success
             
-        except FileNotFoundError:
-            duration = time.time() - start_time
-            self.metrics.record_file_processed(False, file_path.name, duration)
-            self.logger.error(f"❌ [{ErrorCodes.FILE_NOT_FOUND}] Archivo no encontrado: {file_path}")
-            return False
-        except json.JSONDecodeError as e:
-            duration = time.time() - start_time
-            self.metrics.record_file_processed(False, file_path.name, duration)
-            self.logger.error(f"❌ [{ErrorCodes.JSON_PROCESSING_FAILED}] Error JSON en {file_path}: {e}")
-            return False
         except Exception as e:
             duration = time.time() - start_time
-            self.metrics.record_file_processed(False, file_path.name, duration)
-            self.logger.error(f"❌ [{ErrorCodes.JSON_PROCESSING_FAILED}] Error procesando {file_path.name}: {e}")
+            self.metrics.record_file_processed(False, file_name, duration)
+            self.logger.error(f"❌ [{ErrorCodes.JSON_PROCESSING_FAILED}] Error procesando {file_name}: {e}")
             self.logger.error(f"   Detalles: {type(e).__name__} - {str(e)}")
             return False
+    
+    def process_json(self, file_path: Path) -> bool:
+        """
+        Procesar archivo JSON de orden de compra.
+
+        Ingiere el archivo (lectura, backup y validación en una sola pasada)
+        y procesa la orden resultante en SAP.
+
+        Args:
+            file_path (Path): Ruta al archivo JSON a procesar.
+
+        Returns:
+            bool: True si el procesamiento fue exitoso, False en caso contrario.
+        """
+        order = self.ingest(file_path)
+        if order is None:
+            self.metrics.record_file_processed(False, file_path.name, 0.0)
+            self.logger.error(f"❌ [{ErrorCodes.JSON_PROCESSING_FAILED}] No se pudo ingerir: {file_path.name}")
+            return False
+        success = self.process_order(order, file_path.name)
+        self.confirm_backup(file_path, wait=success)
+        return success
 
 
 class QueueManager:
@@ -458,6 +664,27 @@ class QueueManager:
     def __init__(self, logger, file_processor):
         self.logger = logger
         self.file_processor = file_processor
+        self.scanner = QueueScanner(PENDING_PATH, COMPLETED_PATH, SUPPORTED_EXTENSIONS)
+        
+        # Índice de nombres de completados: un solo escaneo al iniciar
+        self.completed_index = CompletedNameIndex(COMPLETED_PATH, SUPPORTED_EXTENSIONS)
+        for recovered in self.completed_index.recover(PENDING_PATH):
+            self.logger.warning(f"♻️ Movimiento interrumpido completado: {recovered.name}")
+        self.completed_index.load()
+        self.scanner.completed_count = self.completed_index.file_count
+        
+        # Preparación en paralelo de las órdenes siguientes a la actual
+        self.pipeline = OrderPipeline(
+            logger,
+            workers=PIPELINE_CONFIG['workers'] if PIPELINE_CONFIG['enabled'] else 0,
+            prefetch=PIPELINE_CONFIG['prefetch']
+        )
+        
+        # Carriles de ejecución: se arrancan con la primera orden
+        self.lane_scheduler: Optional[LaneScheduler] = None
+        if LANES_CONFIG['enabled']:
+            self.lane_scheduler = LaneScheduler(logger, lanes_from_config(), self._finish_lane_order)
+        self._lane_processed = 0
     
     def get_pending_files(self) -> List[Path]:
         """
@@ -466,20 +693,14 @@ class QueueManager:
         Returns:
             List[Path]: Lista de archivos ordenados por fecha de creación (más antiguos primero).
         """
-        if not PENDING_PATH.exists():
-            return []
-        
-        files = [f for f in PENDING_PATH.iterdir() 
-                if f.is_file() and f.suffix.lower() == '.json']
-        
-        files.sort(key=lambda x: x.stat().st_ctime)
-        return files
+        return list(self.scanner.scan_pending())
     
     def move_to_completed(self, file_path: Path) -> bool:
         """
         Mover archivo procesado a directorio de completados.
         
-        Si ya existe un archivo con el mismo nombre, añade un sufijo numérico.
+        Si ya existe un archivo con el mismo nombre, añade un sufijo numérico
+        tomado del índice de completados (sin sondear el directorio).
         
         Args:
             file_path (Path): Ruta al archivo a mover.
@@ -488,17 +709,12 @@ class QueueManager:
             bool: True si el movimiento fue exitoso, False en caso contrario.
         """
         try:
-            destination = COMPLETED_PATH / file_path.name
-            
-            counter = 1
-            while destination.exists():
-                name = file_path.stem
-                ext = file_path.suffix
-                destination = COMPLETED_PATH / f"{name}_{counter}{ext}"
-                counter += 1
-            
-            shutil.move(str(file_path), str(destination))
-            self.logger.info(f"✅ Movido: {file_path.name}")
+            destination = self.completed_index.move_into(file_path)
+            self.scanner.record_completed()
+            if destination.name != file_path.name:
+                self.logger.info(f"✅ Movido: {file_path.name} → {destination.name}")
+            else:
+                self.logger.info(f"✅ Movido: {file_path.name}")
             return True
             
         except PermissionError:
@@ -517,16 +733,19 @@ class QueueManager:
         Procesar cola completa de archivos JSON pendientes.
         
         Para cada archivo:
-        1. Valida la estructura JSON
-        2. Procesa el contenido
+        1. Ingiere el archivo (lectura, backup y validación en una pasada)
+        2. Procesa la orden en SAP
         3. Mueve a completados si es exitoso
         
+        La ingesta de las órdenes siguientes corre en paralelo (ver
+        process_files) mientras SAP procesa la actual.
+        
         Returns:
             bool: True si todos los archivos fueron procesados exitosamente.
         """
         self.logger.info("📦 Procesando cola...")
         
-        pending_files = self.get_pending_files()
+        pending_files = self.scanner.scan_pending()
         
         if not pending_files:
             self.logger.info("📭 No hay archivos pendientes")
@@ -534,41 +753,159 @@ class QueueManager:
         
         self.logger.info(f"📋 Procesando {len(pending_files)} archivos...")
         
-        for file_path in pending_files:
-            if not self.file_processor.validate_json(file_path):
-                self.logger.error(f"❌ Inválido: {file_path.name}")
-                continue
+        self.process_files(pending_files)
+        
+        self.logger.info("✅ Cola procesada")
+        return True
+    
+    def process_files(self, file_paths) -> int:
+        """
+        Procesar varios archivos con preparación anticipada.
+        
+        El pool de OrderPipeline lee, decodifica y valida hasta prefetch
+        órdenes por delante; aquí solo se consumen órdenes ya preparadas,
+        en orden de llegada, y SAP sigue recibiéndolas de una en una.
+        Con LANES_CONFIG['enabled'] cada orden va al primer carril libre.
+        
+        Args:
+            file_paths (Iterable[Path]): Archivos pendientes en orden de llegada.
             
-            if not self.file_processor.process_json(file_path):
-                self.logger.error(f"❌ Error procesando: {file_path.name}")
-                continue
+        Returns:
+            int: Número de órdenes procesadas y movidas a completados.
+        """
+        if self.lane_scheduler is not None:
+            return self.process_files_in_lanes(file_paths)
+        
+        processed = 0
+        for prepared in self.pipeline.prepare(file_paths):
+            if self.process_prepared(prepared):
+                processed += 1
+        return processed
+    
+    def process_file(self, file_path: Path) -> bool:
+        """
+        Procesar un único archivo pendiente: ingesta, SAP y movimiento.
+        
+        Args:
+            file_path (Path): Ruta al archivo JSON pendiente.
             
-            if not self.move_to_completed(file_path):
-                self.logger.error(f"❌ Error moviendo: {file_path.name}")
-                continue
+        Returns:
+            bool: True si la orden se procesó y movió a completados.
+        """
+        return self.process_prepared(prepare_order(file_path))
+    
+    def process_prepared(self, prepared: PreparedOrder) -> bool:
+        """
+        Procesar una orden ya preparada: backup, SAP y movimiento.
+        
+        Args:
+            prepared (PreparedOrder): Resultado de prepare_order().
+            
+        Returns:
+            bool: True si la orden se procesó y movió a completados.
+        """
+        file_path = prepared.file_path
+        order = self.file_processor.accept(prepared)
+        if order is None:
+            self.logger.error(f"❌ Inválido: {file_path.name}")
+            return False
+        
+        success = self.file_processor.process_order(order, file_path.name)
+        return self.finish_order(file_path, success)
+    
+    def finish_order(self, file_path: Path, success: bool) -> bool:
+        """
+        Cerrar una orden ya procesada en SAP: confirmar backup y mover.
+        
+        Si el backup no queda durable (error de escritura o timeout), el
+        archivo se deja en pendientes.
+        
+        Args:
+            file_path (Path): Archivo de origen de la orden.
+            success (bool): Resultado del procesamiento en SAP.
+            
+        Returns:
+            bool: True si la orden se movió a completados.
+        """
+        if not success:
+            self.file_processor.confirm_backup(file_path, wait=False)
+            self.logger.error(f"❌ Error procesando: {file_path.name}")
+            return False
+        
+        # Solo mover a completados cuando el backup ya es durable
+        if not self.file_processor.confirm_backup(file_path):
+            self.logger.error(f"❌ [{ErrorCodes.BACKUP_FAILED}] Backup no confirmado, queda en pendientes: {file_path.name}")
+            return False
+        
+        if not self.move_to_completed(file_path):
+            self.logger.error(f"❌ Error moviendo: {file_path.name}")
+            return False
         
-        self.logger.info("✅ Cola procesada")
         return True
     
+    def process_files_in_lanes(self, file_paths) -> int:
+        """
+        Procesar varios archivos repartiéndolos entre los carriles.
+        
+        La ingesta y el backup siguen en este proceso; cada orden aceptada
+        se entrega al primer carril libre y se cierra (backup confirmado y
+        movimiento) cuando su carril termina.
+        
+        Args:
+            file_paths (Iterable[Path]): Archivos pendientes en orden de llegada.
+            
+        Returns:
+            int: Número de órdenes procesadas y movidas a completados.
+        """
+        self._lane_processed = 0
+        for prepared in self.pipeline.prepare(file_paths):
+            file_path = prepared.file_path
+            order = self.file_processor.accept(prepared)
+            if order is None:
+                self.logger.error(f"❌ Inválido: {file_path.name}")
+                continue
+            
+            lane = self.lane_scheduler.submit(file_path, order)
+            self.logger.info(f"📄 Procesando: {file_path.name} (carril {lane})")
+        
+        self.lane_scheduler.drain()
+        return self._lane_processed
+    
+    def _finish_lane_order(self, result: LaneResult):
+        """Registrar el resultado de un carril y cerrar la orden"""
+        file_name = result.file_path.name
+        self.file_processor.metrics.record_file_processed(result.success, file_name, result.duration)
+        if result.spans:
+            self.file_processor.metrics.record_spans(result.spans, lane=result.lane)
+        if result.success:
+            self.logger.info(f"✅ Procesado: {file_name} en {result.lane} (en {result.duration:.2f}s)")
+        elif result.error:
+            self.logger.error(f"❌ [{ErrorCodes.JSON_PROCESSING_FAILED}] Error en {result.lane}: {result.error}")
+        
+        if self.finish_order(result.file_path, result.success):
+            self._lane_processed += 1
+    
+    def close(self):
+        """Detener los carriles y el pool de preparación"""
+        if self.lane_scheduler is not None:
+            self.lane_scheduler.close()
+        self.pipeline.close()
+    
     def get_queue_status(self) -> Dict[str, int]:
         """
         Obtener estado actual de las colas de procesamiento.
         
+        Los contadores se siembran con un único escaneo y luego se mantienen
+        de forma incremental (escaneos de pendientes, movimientos y llegadas
+        en modo watch), por lo que la consulta es O(1).
+        
         Returns:
             Dict[str, int]: Diccionario con:
                 - pending: Número de archivos pendientes
                 - completed: Número de archivos completados
                 - total: Total de archivos procesados
         """
-        pending_files = self.get_pending_files()
-        completed_files = [f for f in COMPLETED_PATH.iterdir() 
-                          if f.is_file() and f.suffix.lower() == '.json']
-        
-        return {
-            'pending': len(pending_files),
-            'completed': len(completed_files),
-            'total': len(pending_files) + len(completed_files)
-        }
+        return self.scanner.status()
     
     def print_status(self):
         """
@@ -599,8 +936,9 @@ class OrderLoader:
         self.metrics = MetricsCollector()
 
         # Inicializar componentes especializados
-        self.window_manager = WindowManager(self.logger)
-        self.file_processor = FileProcessor(self.logger, self.metrics)
+        self.timing = load_profile(logger=self.logger)
+        self.window_manager = WindowManager(self.logger, self.timing)
+        self.file_processor = FileProcessor(self.logger, self.metrics, self.timing)
         self.queue_manager = QueueManager(self.logger, self.file_processor)
 
         self.logger.info("🚀 OrderLoader iniciado")
@@ -652,44 +990,27 @@ class OrderLoader:
         Returns:
             bool: True si el backup fue exitoso, False en caso contrario.
         """
-        if not BACKUP_CONFIG['enabled']:
-            return True
-            
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_name = f"{file_path.stem}_{timestamp}{file_path.suffix}"
-            backup_file = self.backup_path / backup_name
-            
-            if BACKUP_CONFIG['compress_backups']:
-                backup_file = backup_file.with_suffix('.gz')
-                with open(file_path, 'rb') as f_in:
-                    with gzip.open(backup_file, 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-            else:
-                shutil.copy2(file_path, backup_file)
-            
-            self.logger.info(f"💾 Backup creado: {backup_name}")
-            return True
-            
+            raw = file_path.read_bytes()
         except Exception as e:
             self.logger.error(f"❌ Error creando backup: {e}")
             return False
+        return self.file_processor.create_backup(file_path, raw)
     
     def cleanup_old_backups(self):
-        """Limpiar backups antiguos manteniendo solo los más recientes."""
+        """
+        Limpiar backups antiguos manteniendo solo los más recientes.
+        
+        Elimina archivos de backup completos (días o sesiones), sin hacer
+        stat de cada orden respaldada.
+        """
         if not BACKUP_CONFIG['enabled']:
             return
             
         try:
-            backup_files = list(self.backup_path.glob('*'))
-            if len(backup_files) > BACKUP_CONFIG['max_backups']:
-                # Ordenar por fecha de modificación y eliminar los más antiguos
-                backup_files.sort(key=lambda x: x.stat().st_mtime)
-                files_to_delete = backup_files[:-BACKUP_CONFIG['max_backups']]
-                
-                for file_to_delete in files_to_delete:
-                    file_to_delete.unlink()
-                    self.logger.info(f"🗑️ Backup antiguo eliminado: {file_to_delete.name}")
+            deleted = self.file_processor.backup_archive.cleanup(BACKUP_CONFIG['max_archives'])
+            for archive_path in deleted:
+                self.logger.info(f"🗑️ Backup antiguo eliminado: {archive_path.name}")
                     
         except Exception as e:
             self.logger.warning(f"⚠️ Error limpiando backups: {e}")
@@ -711,11 +1032,11 @@ class OrderLoader:
         try:
             # Configurar pyautogui
             pyautogui.FAILSAFE = PYAUTOGUI_FAILSAFE
-            pyautogui.PAUSE = PYAUTOGUI_PAUSE
+            pyautogui.PAUSE = self.timing.pyautogui_pause
             
             # Presionar Alt+Tab para cambiar a la ventana correcta
             pyautogui.hotkey('alt', 'tab')
-            time.sleep(WINDOW_ACTIVATION_DELAY)  # Esperar a que se active
+            time.sleep(self.timing.window_activation_delay)  # Esperar a que se active
             
             self.logger.info("✅ Ventana de SAP activada")
             return True
@@ -736,7 +1057,7 @@ class OrderLoader:
         self.logger.info("📱 Maximizando ventana...")
         try:
             pyautogui.hotkey('win', 'up')
-            time.sleep(WINDOW_MAXIMIZE_DELAY)
+            time.sleep(self.timing.window_maximize_delay)
             self.logger.info("✅ Ventana maximizada")
             return True
         except Exception as e:
@@ -898,7 +1219,7 @@ class OrderLoader:
         
         # Esperar estabilización
         self.logger.info("⏳ Esperando estabilización...")
-        time.sleep(SYSTEM_STABILIZATION_DELAY)
+        time.sleep(self.timing.stabilization_delay)
         
         # Verificar SAP (opcional, para confirmar)
         if not self.window_manager.verify_sap_chrome():
@@ -906,6 +1227,21 @@ class OrderLoader:
         
         return True
     
+    def ensure_sap_environment(self) -> bool:
+        """
+        Reconfigurar el entorno SAP solo si el health check falla.
+        
+        Returns:
+            bool: True si el entorno está listo, False en caso contrario.
+        """
+        if self.window_manager.is_sap_active():
+            return True
+        
+        self.logger.warning("⚠️ Health check de SAP falló, reconfigurando entorno...")
+        # El formulario del lote ya no es confiable: la siguiente orden navega
+        self.file_processor.sap_automation.end_batch(close=False)
+        return self.setup_sap_environment()
+    
     def run(self) -> bool:
         """
         Ejecutar proceso completo de automatización.
@@ -958,9 +1294,99 @@ class OrderLoader:
             self.logger.error(f"   Detalles: {type(e).__name__} - {str(e)}")
             return False
         finally:
+            self.queue_manager.close()
+            self.file_processor.close()
+            
             # Finalizar métricas
             if METRICS_CONFIG['enabled']:
                 self.metrics.end_session()
+    
+    def watch(self) -> bool:
+        """
+        Ejecutar en modo daemon observando data/pending.
+        
+        Configura el entorno SAP una sola vez, procesa la cola existente y
+        luego procesa cada orden nueva en cuanto termina de escribirse.
+        Antes de cada lote corre un health check barato y solo repite
+        setup_sap_environment si falla. Se detiene con Ctrl+C.
+        
+        Returns:
+            bool: True si el modo watch terminó limpiamente, False si falló.
+        """
+        self.logger.info("👀 Iniciando modo watch...")
+        
+        if METRICS_CONFIG['enabled']:
+            self.metrics.start_session()
+        
+        watcher = None
+        try:
+            if not self.validate_system():
+                return False
+            
+            if not self.setup_sap_environment():
+                return False
+            
+            # Iniciar el watcher antes de procesar la cola existente para no
+            # perder archivos que lleguen mientras tanto
+            watcher = PendingWatcher(
+                self.logger, PENDING_PATH, SUPPORTED_EXTENSIONS,
+                poll_interval=WATCH_CONFIG['poll_interval'],
+                settle_time=WATCH_CONFIG['settle_time'],
+                rescan_interval=WATCH_CONFIG['rescan_interval'],
+                use_inotify=WATCH_CONFIG['use_inotify']
+            )
+            watcher.mark_existing()
+            self.queue_manager.process_queue()
+            
+            self.logger.info("⏳ Esperando órdenes nuevas (Ctrl+C para detener)...")
+            while True:
+                ready = watcher.wait_ready(WATCH_CONFIG['idle_timeout'])
+                if not ready:
+                    continue
+                
+                if not self.ensure_sap_environment():
+                    self.logger.error(f"❌ [{ErrorCodes.SAP_NOT_DETECTED}] Entorno SAP no disponible, reintentando luego")
+                    for file_path in ready:
+                        watcher.requeue(file_path)
+                    time.sleep(WATCH_CONFIG['idle_timeout'])
+                    continue
+                
+                self.queue_manager.scanner.record_arrival(watcher.arrivals(ready))
+                self.queue_manager.process_files(ready)
+                
+                self.cleanup_old_backups()
+                if METRICS_CONFIG['enabled']:
+                    self.file_processor.record_automation_metrics()
+                    self.metrics.save_metrics()
+            
+        except KeyboardInterrupt:
+            self.logger.info("🛑 Modo watch detenido por el usuario")
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ [{ErrorCodes.SYSTEM_VALIDATION_FAILED}] Error en modo watch: {e}")
+            self.logger.error(f"   Detalles: {type(e).__name__} - {str(e)}")
+            return False
+        finally:
+            if watcher:
+                watcher.close()
+            self.queue_manager.close()
+            self.file_processor.close()
+            if METRICS_CONFIG['enabled']:
+                self.metrics.end_session()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parsear argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="OrderLoader - SAP Business One")
+    parser.add_argument(
+        '--watch', action='store_true',
+        help="Modo daemon: observar data/pending y procesar órdenes al llegar"
+    )
+    parser.add_argument(
+        '--record', metavar='ARCHIVO',
+        help="Grabar capturas y entrada para reproducirlas sin display (ver recording.py)"
+    )
+    return parser.parse_args(argv)
 
 
 def main():
@@ -983,6 +1409,17 @@ NOTA: Asegúrate de que la ventana de SAP en Chrome esté abierta
       y sea accesible con Alt+Tab antes de ejecutar el sistema.
 """)
     
+    args = parse_args()
+    if args.record:
+        SAP_AUTOMATION_CONFIG['record_file'] = args.record
+    
+    if args.watch:
+        order_loader = OrderLoader()
+        order_loader.print_status()
+        success = order_loader.watch()
+        order_loader.print_status()
+        sys.exit(0 if success else 1)
+    
     try:
         # Crear instancia del sistema
         order_loader = OrderLoader()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modelo de Orden - OrderLoader
+Objetos inmutables y compactos que recorren todo el pipeline
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+
+class _FrozenSlots:
+    """
+    Base para objetos inmutables basados en __slots__.
+
+    Los atributos se asignan una sola vez en __init__ mediante
+    object.__setattr__; cualquier asignación posterior falla.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} es inmutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} es inmutable")
+
+    def __reduce__(self):
+        # Necesario para pickle: el __setattr__ inmutable impide el
+        # restablecimiento por defecto del estado de los slots
+        return (type(self), tuple(getattr(self, slot) for slot in self.__slots__))
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, s) for s in self.__slots__))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{s}={getattr(self, s)!r}" for s in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Comprador(_FrozenSlots):
+    """Cliente que emite la orden de compra"""
+
+    __slots__ = ('nit', 'nombre')
+
+    def __init__(self, nit: Any, nombre: Any):
+        object.__setattr__(self, 'nit', nit)
+        object.__setattr__(self, 'nombre', nombre)
+
+
+class OrderItem(_FrozenSlots):
+    """Línea de una orden de compra"""
+
+    __slots__ = ('codigo', 'descripcion', 'cantidad', 'precio_unitario',
+                 'precio_total', 'fecha_entrega')
+
+    def __init__(self, codigo: Any, descripcion: Any, cantidad: Any,
+                 precio_unitario: Any, precio_total: Any = None,
+                 fecha_entrega: Optional[str] = None):
+        object.__setattr__(self, 'codigo', codigo)
+        object.__setattr__(self, 'descripcion', descripcion)
+        object.__setattr__(self, 'cantidad', cantidad)
+        object.__setattr__(self, 'precio_unitario', precio_unitario)
+        object.__setattr__(self, 'precio_total', precio_total)
+        object.__setattr__(self, 'fecha_entrega', fecha_entrega)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'OrderItem':
+        """
+        Construir item desde el diccionario decodificado del JSON.
+
+        Args:
+            data: Diccionario del item (ya validado)
+
+        Returns:
+            OrderItem: Item inmutable
+        """
+        return cls(
+            data['codigo'],
+            data['descripcion'],
+            data['cantidad'],
+            data['precio_unitario'],
+            data.get('precio_total'),
+            data.get('fecha_entrega'),
+        )
+
+
+class Order(_FrozenSlots):
+    """Orden de compra completa, lista para ingresar en SAP"""
+
+    __slots__ = ('orden_compra', 'fecha_documento', 'fecha_entrega', 'comprador',
+                 'items', 'valor_total')
+
+    def __init__(self, orden_compra: Any, fecha_documento: Any,
+                 fecha_entrega: Optional[str], comprador: Comprador,
+                 items: Iterable[OrderItem], valor_total: Any = None):
+        object.__setattr__(self, 'orden_compra', orden_compra)
+        object.__setattr__(self, 'fecha_documento', fecha_documento)
+        object.__setattr__(self, 'fecha_entrega', fecha_entrega)
+        object.__setattr__(self, 'comprador', comprador)
+        object.__setattr__(self, 'items', tuple(items))
+        object.__setattr__(self, 'valor_total', valor_total)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Order':
+        """
+        Construir orden desde el diccionario decodificado del JSON.
+
+        Args:
+            data: Diccionario de la orden (ya validado)
+
+        Returns:
+            Order: Orden inmutable
+        """
+        comprador = data['comprador']
+        return cls(
+            data['orden_compra'],
+            data['fecha_documento'],
+            data.get('fecha_entrega'),
+            Comprador(comprador['nit'], comprador['nombre']),
+            (OrderItem.from_dict(item) for item in data['items']),
+            data.get('valor_total'),
+        )
+
+    @property
+    def item_count(self) -> int:
+        """Número de líneas de la orden"""
+        return len(self.items)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Esquema de Órdenes - OrderLoader
+Esquema declarativo compilado una sola vez en un validador rápido
+"""
+
+import re
+import math
+import calendar
+import functools
+from typing import Any, Callable, Dict, List
+
+
+# Esquema declarativo de una orden de compra.
+#
+# Cada nodo indica 'type' (uno o varios de: string, integer, number, date,
+# object, array) y, según el tipo:
+# - object: 'properties' y 'required'
+# - array: 'items' (esquema de cada elemento)
+# - integer/number: 'minimum'
+# - string: 'min_length'
+ORDER_SCHEMA = {
+    'type': 'object',
+    'required': ['orden_compra', 'fecha_documento', 'comprador', 'items'],
+    'properties': {
+        'orden_compra': {'type': ('string', 'integer'), 'min_length': 1},
+        'fecha_documento': {'type': 'date'},
+        'fecha_entrega': {'type': 'date'},
+        'comprador': {
+            'type': 'object',
+            'required': ['nit', 'nombre'],
+            'properties': {
+                'nit': {'type': ('string', 'integer'), 'min_length': 1},
+                'nombre': {'type': 'string'},
+            },
+        },
+        'items': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'required': ['descripcion', 'codigo', 'cantidad', 'precio_unitario'],
+                'properties': {
+                    'codigo': {'type': ('string', 'integer'), 'min_length': 1},
+                    'descripcion': {'type': 'string'},
+                    'cantidad': {'type': 'number', 'minimum': 0},
+                    'precio_unitario': {'type': 'number', 'minimum': 0},
+                    'precio_total': {'type': 'number', 'minimum': 0},
+                    'fecha_entrega': {'type': 'date'},
+                },
+            },
+        },
+        'valor_total': {'type': 'number', 'minimum': 0},
+        'total_items_unicos': {'type': 'integer', 'minimum': 0},
+        'numero_items_totales': {'type': 'number', 'minimum': 0},
+    },
+}
+
+_DATE_RE = re.compile(r'(\d{2})/(\d{2})/(\d{4})')
+
+_TYPE_NAMES = {
+    'string': 'texto',
+    'integer': 'entero',
+    'number': 'número',
+    'date': 'fecha dd/mm/yyyy',
+    'object': 'objeto',
+    'array': 'lista',
+}
+
+
+class SchemaViolation:
+    """Violación del esquema con su ruta JSON (ej. $.items[3].cantidad)"""
+
+    __slots__ = ('path', 'message')
+
+    def __init__(self, path: str, message: str):
+        self.path = path
+        self.message = message
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+    def __repr__(self) -> str:
+        return f"SchemaViolation({self.path!r}, {self.message!r})"
+
+
+@functools.lru_cache(maxsize=4096)
+def is_valid_date(value: str) -> bool:
+    """
+    Verificar una fecha dd/mm/yyyy (incluye días por mes y bisiestos).
+
+    Las fechas se repiten mucho entre items, por eso el resultado se cachea.
+    """
+    match = _DATE_RE.fullmatch(value)
+    if not match:
+        return False
+    day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    if not 1 <= month <= 12 or year < 1:
+        return False
+    return 1 <= day <= calendar.monthrange(year, month)[1]
+
+
+def _is_number(value: Any) -> bool:
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and not (isinstance(value, float) and math.isnan(value)))
+
+
+def _is_integer(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    'string': lambda v: isinstance(v, str),
+    'integer': _is_integer,
+    'number': _is_number,
+    'date': lambda v: isinstance(v, str) and is_valid_date(v),
+    'object': lambda v: isinstance(v, dict),
+    'array': lambda v: isinstance(v, list),
+}
+
+# Las rutas se pasan como (contenedor, clave): el contenedor es una tupla
+# enlazada (padre, clave) y solo se convierte a texto cuando hay una violación
+JsonPath = Any
+Checker = Callable[[Any, JsonPath, Any, List[SchemaViolation]], None]
+
+
+def render_path(path: JsonPath) -> str:
+    """Convertir una ruta enlazada en texto JSONPath (ej. $.items[3].cantidad)"""
+    parts = []
+    while isinstance(path, tuple):
+        path, key = path
+        parts.append(f"[{key}]" if isinstance(key, int) else f".{key}")
+    parts.append(path)
+    return "".join(reversed(parts))
+
+
+def _violation(parent: JsonPath, key: Any, message: str) -> SchemaViolation:
+    path = parent if key is None else (parent, key)
+    return SchemaViolation(render_path(path), message)
+
+
+def _compile_scalar(types: tuple, expected: str, minimum: Any, min_length: Any) -> Checker:
+    """
+    Compilar un nodo escalar.
+
+    Los casos frecuentes (número con mínimo, texto, fecha) tienen una
+    función especializada sin bucles; el resto usa la versión genérica.
+    """
+    if types == ('number',):
+        def check_number(value, parent, key, errors):
+            value_type = type(value)
+            if (value_type is not int and value_type is not float) or value != value:
+                if not _is_number(value):
+                    errors.append(_violation(parent, key, f"debe ser {expected} (recibido: {value!r})"))
+                    return
+            if minimum is not None and value < minimum:
+                errors.append(_violation(parent, key, f"debe ser >= {minimum} (recibido: {value!r})"))
+        return check_number
+
+    if types == ('string',) and min_length is None:
+        def check_string(value, parent, key, errors):
+            if not isinstance(value, str):
+                errors.append(_violation(parent, key, f"debe ser {expected} (recibido: {value!r})"))
+        return check_string
+
+    if types == ('date',):
+        def check_date(value, parent, key, errors):
+            if type(value) is not str or not is_valid_date(value):
+                errors.append(_violation(parent, key, f"debe ser {expected} (recibido: {value!r})"))
+        return check_date
+
+    type_checks = tuple(_TYPE_CHECKS[t] for t in types)
+    accepts_string = 'string' in types
+
+    def check_scalar(value, parent, key, errors):
+        if not (accepts_string and type(value) is str):
+            for type_check in type_checks:
+                if type_check(value):
+                    break
+            else:
+                errors.append(_violation(parent, key, f"debe ser {expected} (recibido: {value!r})"))
+                return
+        if minimum is not None and _is_number(value) and value < minimum:
+            errors.append(_violation(parent, key, f"debe ser >= {minimum} (recibido: {value!r})"))
+        if min_length is not None and type(value) is str and len(value.strip()) < min_length:
+            errors.append(_violation(parent, key, "no puede estar vacío"))
+    return check_scalar
+
+
+def _compile(node: Dict[str, Any]) -> Checker:
+    """Compilar un nodo del esquema en una función de validación"""
+    types = node['type'] if isinstance(node['type'], tuple) else (node['type'],)
+    expected = " o ".join(_TYPE_NAMES[t] for t in types)
+
+    if types == ('object',):
+        fields = tuple(
+            (key, key in node.get('required', ()), _compile(child))
+            for key, child in node.get('properties', {}).items()
+        )
+
+        def check_object(value, parent, key, errors):
+            if type(value) is not dict:
+                errors.append(_violation(parent, key, f"debe ser {expected}"))
+                return
+            path = parent if key is None else (parent, key)
+            for field, required, check in fields:
+                if field in value:
+                    check(value[field], path, field, errors)
+                elif required:
+                    errors.append(_violation(path, field, "campo requerido faltante"))
+        return check_object
+
+    if types == ('array',):
+        check_element = _compile(node['items'])
+
+        def check_array(value, parent, key, errors):
+            if type(value) is not list:
+                errors.append(_violation(parent, key, f"debe ser {expected}"))
+                return
+            path = parent if key is None else (parent, key)
+            for index, element in enumerate(value):
+                check_element(element, path, index, errors)
+        return check_array
+
+    return _compile_scalar(types, expected, node.get('minimum'), node.get('min_length'))
+
+
+class OrderValidator:
+    """
+    Validador compilado a partir de un esquema declarativo.
+
+    El esquema se traduce una sola vez en funciones anidadas; validar
+    una orden es una sola pasada que acumula todas las violaciones en
+    lugar de detenerse en la primera.
+    """
+
+    def __init__(self, schema: Dict[str, Any], stream_key: str = 'items'):
+        """
+        Compilar validador.
+
+        Args:
+            schema: Esquema declarativo (ver ORDER_SCHEMA)
+            stream_key: Campo lista que puede validarse elemento a elemento
+        """
+        self.schema = schema
+        self.stream_key = stream_key
+        self._check = _compile(schema)
+
+        # Entradas para validación incremental (ver order_stream): campos de
+        # primer nivel por separado y cada elemento de stream_key por separado
+        properties = schema.get('properties', {})
+        required = schema.get('required', ())
+        self._fields = tuple(
+            (key, key in required, _compile(child)) for key, child in properties.items()
+        )
+        # Campos requeridos fuera de stream_key: el encabezado mínimo para
+        # empezar a ingresar una orden leída por partes
+        self.header_fields = tuple(key for key in required if key != stream_key)
+        stream_node = properties.get(stream_key, {})
+        self._check_element = _compile(stream_node['items']) if 'items' in stream_node else None
+
+    def validate(self, data: Any) -> List[SchemaViolation]:
+        """
+        Validar un documento completo.
+
+        Args:
+            data: Documento JSON decodificado
+
+        Returns:
+            List[SchemaViolation]: Todas las violaciones (vacía si es válido)
+        """
+        errors: List[SchemaViolation] = []
+        self._check(data, '$', None, errors)
+        return errors
+
+    def validate_fields(self, fields: Dict[str, Any], streamed: bool = True,
+                        required: bool = True) -> List[SchemaViolation]:
+        """
+        Validar campos de primer nivel de un documento leído por partes.
+
+        Args:
+            fields: Campos ya decodificados (sin los elementos de stream_key)
+            streamed: True si stream_key se valida elemento a elemento aparte
+            required: Reportar campos requeridos faltantes
+
+        Returns:
+            List[SchemaViolation]: Violaciones en los campos presentes
+        """
+        errors: List[SchemaViolation] = []
+        for key, is_required, check in self._fields:
+            if key == self.stream_key and streamed:
+                continue
+            if key in fields:
+                check(fields[key], '$', key, errors)
+            elif required and is_required:
+                errors.append(_violation('$', key, "campo requerido faltante"))
+        return errors
+
+    def validate_item(self, item: Any, index: int) -> List[SchemaViolation]:
+        """
+        Validar un elemento de stream_key (ej. $.items[index]).
+
+        Args:
+            item: Elemento decodificado
+            index: Posición en la lista
+
+        Returns:
+            List[SchemaViolation]: Violaciones del elemento
+        """
+        errors: List[SchemaViolation] = []
+        if self._check_element is not None:
+            self._check_element(item, ('$', self.stream_key), index, errors)
+        return errors
+
+
+# Validador de órdenes compilado al importar el módulo
+ORDER_VALIDATOR = OrderValidator(ORDER_SCHEMA)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura Incremental de Órdenes - OrderLoader
+Encabezado primero e items uno a uno, con memoria constante
+"""
+
+import re
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from order import _FrozenSlots, Comprador, OrderItem
+from order_schema import ORDER_VALIDATOR, SchemaViolation
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_TAIL = frozenset('.eE+-')
+
+# Campos del encabezado necesarios antes de empezar a ingresar items (los
+# requeridos por el esquema; los opcionales se leen si están antes de items)
+HEADER_FIELDS = ORDER_VALIDATOR.header_fields
+
+
+class JsonStreamError(ValueError):
+    """JSON mal formado detectado durante la lectura incremental"""
+
+
+class OrderStreamError(Exception):
+    """Violaciones de esquema encontradas mientras se recorren los items"""
+
+    def __init__(self, violations: List[SchemaViolation]):
+        self.violations = violations
+        super().__init__("; ".join(str(v) for v in violations[:5]))
+
+
+class JsonStreamReader:
+    """
+    Lector incremental de un objeto JSON raíz.
+
+    Lee el archivo en bloques y decodifica un valor a la vez con
+    JSONDecoder.raw_decode; el buffer solo contiene el bloque actual y el
+    valor que se está decodificando. Las claves del objeto raíz se recorren
+    con members() y una lista grande se recorre elemento a elemento con
+    array(), sin construirla completa.
+    """
+
+    def __init__(self, fp: TextIO, chunk_size: int = 64 * 1024,
+                 max_value_size: Optional[int] = None):
+        """
+        Inicializar lector.
+
+        Args:
+            fp: Archivo abierto en modo texto
+            chunk_size: Caracteres leídos por bloque
+            max_value_size: Tamaño máximo de un valor individual (por
+                defecto 64 bloques, mínimo 4M caracteres); evita cargar el
+                archivo completo al buscar el final de un valor mal formado
+        """
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._max_value_size = max_value_size or max(chunk_size * 64, 4 * 1024 * 1024)
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._offset = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._offset += self._pos
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, message: str, pos: Optional[int] = None) -> JsonStreamError:
+        position = self._offset + (self._pos if pos is None else pos)
+        return JsonStreamError(f"Carácter {position}: {message}")
+
+    def peek(self) -> str:
+        """Siguiente carácter significativo ('' al final del archivo)"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char: str):
+        if self.peek() != char:
+            raise self._error(f"se esperaba '{char}'")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decodificar el siguiente valor JSON completo"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if len(self._buffer) - self._pos <= self._max_value_size and self._fill():
+                    continue
+                raise self._error(e.msg, e.pos) from None
+            # Un número cortado por el bloque (ej. "12" de "125" o "1." de
+            # "1.5") puede continuar en el siguiente
+            if (end == len(self._buffer) or (type(value) in (int, float)
+                                             and self._buffer[end] in _NUMBER_TAIL)):
+                if self._fill():
+                    continue
+            self._pos = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        """
+        Recorrer las claves del objeto raíz.
+
+        Después de recibir cada clave, el llamador debe consumir su valor
+        con value() o array() antes de pedir la siguiente.
+
+        Yields:
+            str: Clave del objeto raíz
+        """
+        self._expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error("se esperaba una clave")
+            key = self.value()
+            self._expect(':')
+            yield key
+            separator = self.peek()
+            self._pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise self._error("se esperaba ',' o '}'", self._pos - 1)
+
+    def array(self) -> Iterator[Any]:
+        """
+        Recorrer una lista elemento a elemento.
+
+        Yields:
+            Any: Cada elemento decodificado
+        """
+        self._expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self._pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise self._error("se esperaba ',' o ']'", self._pos - 1)
+
+    def finish(self):
+        """Verificar que no queda contenido después del objeto raíz"""
+        if self.peek() != '':
+            raise self._error("contenido extra después del documento")
+
+
+class StreamingOrder(_FrozenSlots):
+    """
+    Orden cuyos items se leen del archivo a medida que se recorren.
+
+    Ofrece la misma interfaz que order.Order: cada acceso a items abre el
+    archivo y devuelve un generador de OrderItem validados uno a uno (un
+    item inválido lanza OrderStreamError antes de entregarse). item_count y
+    valor_total son None si la orden no se prevalidó completa.
+    """
+
+    __slots__ = ('file_path', 'orden_compra', 'fecha_documento', 'fecha_entrega',
+                 'comprador', 'valor_total', 'item_count', 'encoding', 'chunk_size')
+
+    def __init__(self, file_path: Path, orden_compra: Any, fecha_documento: Any,
+                 fecha_entrega: Optional[str], comprador: Comprador,
+                 valor_total: Any = None, item_count: Optional[int] = None,
+                 encoding: str = 'utf-8', chunk_size: int = 64 * 1024):
+        object.__setattr__(self, 'file_path', Path(file_path))
+        object.__setattr__(self, 'orden_compra', orden_compra)
+        object.__setattr__(self, 'fecha_documento', fecha_documento)
+        object.__setattr__(self, 'fecha_entrega', fecha_entrega)
+        object.__setattr__(self, 'comprador', comprador)
+        object.__setattr__(self, 'valor_total', valor_total)
+        object.__setattr__(self, 'item_count', item_count)
+        object.__setattr__(self, 'encoding', encoding)
+        object.__setattr__(self, 'chunk_size', chunk_size)
+
+    @property
+    def items(self) -> Iterator[OrderItem]:
+        """Generador de items leídos y validados de a uno"""
+        return self._iter_items()
+
+    def _iter_items(self) -> Iterator[OrderItem]:
+        stream_key = ORDER_VALIDATOR.stream_key
+        with open(self.file_path, 'r', encoding=self.encoding) as f:
+            reader = JsonStreamReader(f, self.chunk_size)
+            trailer: Dict[str, Any] = {}
+            seen_items = False
+            for key in reader.members():
+                if key != stream_key or seen_items:
+                    value = reader.value()
+                    if seen_items:
+                        trailer[key] = value
+                    continue
+
+                seen_items = True
+                for index, element in enumerate(reader.array()):
+                    violations = ORDER_VALIDATOR.validate_item(element, index)
+                    if violations:
+                        raise OrderStreamError(violations)
+                    yield OrderItem.from_dict(element)
+            reader.finish()
+
+        # Campos posteriores a la lista (ej. valor_total), antes de guardar
+        violations = ORDER_VALIDATOR.validate_fields(trailer, required=False)
+        if violations:
+            raise OrderStreamError(violations)
+
+
+def open_streaming_order(file_path: Path, prevalidate: bool = True,
+                         encoding: str = 'utf-8',
+                         chunk_size: int = 64 * 1024) -> Tuple[Optional[StreamingOrder], List[SchemaViolation]]:
+    """
+    Leer el encabezado de una orden sin cargar sus items.
+
+    Con prevalidate, recorre además todos los items (sin conservarlos)
+    para validarlos y contarlos: la orden no se empieza a ingresar si
+    tiene errores, a costa de leer el archivo una vez más (validación,
+    ingreso en SAP y backup). Sin prevalidate, la lectura se detiene en
+    la lista de items si los campos requeridos ya se leyeron; los campos
+    opcionales que estén después de items (ej. fecha_entrega) quedan en
+    None, y los items se validan a medida que se ingresan.
+
+    Args:
+        file_path: Ruta al archivo JSON
+        prevalidate: Validar todos los items antes de devolver la orden
+        encoding: Codificación del archivo
+        chunk_size: Caracteres leídos por bloque
+
+    Returns:
+        Tuple[Optional[StreamingOrder], List[SchemaViolation]]: La orden
+        (None si hay violaciones) y las violaciones encontradas
+
+    Raises:
+        JsonStreamError: Si el JSON está mal formado
+    """
+    stream_key = ORDER_VALIDATOR.stream_key
+    fields: Dict[str, Any] = {}
+    violations: List[SchemaViolation] = []
+    streamed = False
+    item_count = None
+
+    with open(file_path, 'r', encoding=encoding) as f:
+        reader = JsonStreamReader(f, chunk_size)
+        if reader.peek() != '{':
+            # No es un objeto: se decodifica y lo reporta el validador
+            violations = ORDER_VALIDATOR.validate(reader.value())
+            reader.finish()
+            return None, violations
+
+        for key in reader.members():
+            if key != stream_key or streamed or reader.peek() != '[':
+                fields[key] = reader.value()
+                continue
+
+            streamed = True
+            if not prevalidate and all(field in fields for field in HEADER_FIELDS):
+                break
+
+            item_count = 0
+            for index, element in enumerate(reader.array()):
+                if prevalidate:
+                    violations.extend(ORDER_VALIDATOR.validate_item(element, index))
+                item_count += 1
+            if not prevalidate:
+                item_count = None
+        else:
+            reader.finish()
+
+    violations = ORDER_VALIDATOR.validate_fields(fields, streamed=streamed) + violations
+    if violations:
+        return None, violations
+
+    comprador = fields['comprador']
+    order = StreamingOrder(
+        file_path,
+        fields['orden_compra'],
+        fields['fecha_documento'],
+        fields.get('fecha_entrega'),
+        Comprador(comprador['nit'], comprador['nombre']),
+        fields.get('valor_total'),
+        item_count,
+        encoding,
+        chunk_size,
+    )
+    return order, []
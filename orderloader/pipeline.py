@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline de Preparación - OrderLoader
+Lectura, decodificación y validación en paralelo antes del consumidor GUI
+"""
+
+import json
+import logging
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+from config import FILE_ENCODING, STREAMING_CONFIG
+from order import Order
+from order_schema import ORDER_VALIDATOR, SchemaViolation
+from order_stream import JsonStreamError, StreamingOrder, open_streaming_order
+
+
+class PreparedOrder:
+    """
+    Resultado de preparar un archivo de orden.
+
+    Si order no es None, la orden está lista para SAP; si no, error_kind
+    indica el motivo: 'not_found', 'json', 'invalid' o 'error'. Las órdenes
+    grandes llegan como StreamingOrder sin raw (el backup se hace desde el
+    archivo).
+    """
+
+    __slots__ = ('file_path', 'raw', 'order', 'error_kind', 'error', 'violations')
+
+    def __init__(self, file_path: Path, raw: Optional[bytes] = None,
+                 order: Optional[Union[Order, StreamingOrder]] = None, error_kind: Optional[str] = None,
+                 error: Optional[str] = None,
+                 violations: Optional[List[SchemaViolation]] = None):
+        self.file_path = file_path
+        self.raw = raw
+        self.order = order
+        self.error_kind = error_kind
+        self.error = error
+        self.violations = violations or []
+
+    @property
+    def ok(self) -> bool:
+        """True si la orden quedó lista para procesar"""
+        return self.order is not None
+
+
+def prepare_order(file_path: Path, prevalidate: Optional[bool] = None) -> PreparedOrder:
+    """
+    Leer, decodificar, validar y construir una orden (una sola lectura).
+
+    Es una función de módulo sin estado para poder ejecutarse en los
+    procesos del pool; no registra logs, los errores van en el resultado.
+    Los archivos desde STREAMING_CONFIG['threshold_bytes'] se leen por
+    partes (ver prepare_streaming_order).
+
+    Args:
+        file_path: Ruta al archivo JSON
+        prevalidate: Para órdenes grandes, validar todos los items antes
+            de entregarlas (None = STREAMING_CONFIG['prevalidate'])
+
+    Returns:
+        PreparedOrder: Orden preparada o descripción del error
+    """
+    file_path = Path(file_path)
+    try:
+        if file_path.stat().st_size >= STREAMING_CONFIG['threshold_bytes']:
+            return prepare_streaming_order(file_path, prevalidate)
+        raw = file_path.read_bytes()
+    except FileNotFoundError:
+        return PreparedOrder(file_path, error_kind='not_found')
+    except Exception as e:
+        return PreparedOrder(file_path, error_kind='error', error=f"{type(e).__name__} - {e}")
+
+    try:
+        data = json.loads(raw.decode(FILE_ENCODING))
+    except json.JSONDecodeError as e:
+        return PreparedOrder(file_path, raw, error_kind='json',
+                             error=f"Línea {e.lineno}, Columna {e.colno}: {e.msg}")
+    except Exception as e:
+        return PreparedOrder(file_path, raw, error_kind='error', error=f"{type(e).__name__} - {e}")
+
+    violations = ORDER_VALIDATOR.validate(data)
+    if violations:
+        return PreparedOrder(file_path, raw, error_kind='invalid', violations=violations)
+
+    try:
+        order = Order.from_dict(data)
+    except Exception as e:
+        return PreparedOrder(file_path, raw, error_kind='error', error=f"{type(e).__name__} - {e}")
+    return PreparedOrder(file_path, raw, order)
+
+
+def prepare_streaming_order(file_path: Path, prevalidate: Optional[bool] = None) -> PreparedOrder:
+    """
+    Preparar una orden grande sin cargar sus items en memoria.
+
+    Args:
+        file_path: Ruta al archivo JSON
+        prevalidate: Validar todos los items antes de entregar la orden
+            (None = STREAMING_CONFIG['prevalidate'])
+
+    Returns:
+        PreparedOrder: StreamingOrder preparada o descripción del error
+    """
+    if prevalidate is None:
+        prevalidate = STREAMING_CONFIG['prevalidate']
+    try:
+        order, violations = open_streaming_order(
+            file_path, prevalidate, FILE_ENCODING, STREAMING_CONFIG['chunk_size']
+        )
+    except FileNotFoundError:
+        return PreparedOrder(file_path, error_kind='not_found')
+    except JsonStreamError as e:
+        return PreparedOrder(file_path, error_kind='json', error=str(e))
+    except Exception as e:
+        return PreparedOrder(file_path, error_kind='error', error=f"{type(e).__name__} - {e}")
+
+    if violations:
+        return PreparedOrder(file_path, error_kind='invalid', violations=violations)
+    return PreparedOrder(file_path, order=order)
+
+
+class OrderPipeline:
+    """
+    Productor de órdenes preparadas para el único consumidor GUI.
+
+    Un ProcessPoolExecutor prepara en paralelo las órdenes siguientes
+    mientras SAP procesa la actual. La cola de órdenes listas está
+    acotada por prefetch y se entrega en el mismo orden de llegada.
+    """
+
+    def __init__(self, logger: logging.Logger, workers: int = 2, prefetch: int = 4):
+        """
+        Inicializar pipeline.
+
+        Args:
+            logger: Logger para registro de eventos
+            workers: Procesos del pool (0 = preparar en el proceso actual)
+            prefetch: Órdenes preparadas por adelantado como máximo
+        """
+        self.logger = logger
+        self.workers = workers
+        self.prefetch = max(prefetch, 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            try:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            except Exception as e:
+                self.logger.warning(f"⚠️ Pool de procesos no disponible, preparando en línea: {e}")
+                self.workers = 0
+                return None
+        return self._executor
+
+    def prepare(self, file_paths: Iterable[Path]) -> Iterator[PreparedOrder]:
+        """
+        Preparar archivos por adelantado y entregarlos en orden.
+
+        Args:
+            file_paths: Archivos pendientes en orden de llegada
+
+        Yields:
+            PreparedOrder: Cada archivo preparado, en el mismo orden
+        """
+        executor = self._get_executor()
+        if executor is None:
+            for file_path in file_paths:
+                yield prepare_order(file_path)
+            return
+
+        in_flight: deque = deque()
+        paths = iter(file_paths)
+        try:
+            for file_path in paths:
+                in_flight.append((file_path, executor.submit(prepare_order, file_path)))
+                if len(in_flight) >= self.prefetch:
+                    break
+
+            while in_flight:
+                file_path, future = in_flight.popleft()
+                # Mantener la ventana llena antes de bloquear en la siguiente
+                next_path = next(paths, None)
+                if next_path is not None:
+                    in_flight.append((next_path, executor.submit(prepare_order, next_path)))
+                yield self._result(file_path, future)
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+
+    def _result(self, file_path: Path, future: Future) -> PreparedOrder:
+        try:
+            return future.result()
+        except Exception as e:
+            # Proceso del pool caído: preparar en línea para no perder la orden
+            self.logger.warning(f"⚠️ Fallo en pool preparando {file_path.name}, reintentando en línea: {e}")
+            return prepare_order(file_path)
+
+    def close(self):
+        """Detener el pool de procesos"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
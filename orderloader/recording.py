@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Grabación y Reproducción de Pantalla - OrderLoader
+Graba las capturas y la entrada de una corrida real y las reproduce sin
+display, para medir y probar cambios de Computer Vision fuera de línea
+
+Grabar (Windows, con SAP): SAP_AUTOMATION_CONFIG['record_file'] o
+    py main.py --record grabacion.zip
+Reproducir (cualquier equipo, sin pantalla):
+    python recording.py info grabacion.zip
+    python recording.py replay grabacion.zip --orders data/completed --repeat 5
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import zipfile
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # Sin OpenCV los cuadros son imágenes PIL en modo 'L'
+    cv2 = None
+    np = None
+
+from screen_capture import Region, ScreenCapture, ScreenInput, crop
+from spans import SpanRecorder, format_spans
+
+# Versión del formato del archivo de grabación
+RECORDING_FORMAT = 1
+INDEX_NAME = 'index.json'
+# Compresión PNG de los cuadros (0-9): más alto = archivo menor y grabación más lenta
+PNG_COMPRESSION = 6
+
+
+def encode_frame(frame: Any) -> bytes:
+    """Codificar una captura en escala de grises como PNG"""
+    if cv2 is not None:
+        ok, data = cv2.imencode('.png', frame, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION])
+        if not ok:
+            raise ValueError("No se pudo codificar el cuadro")
+        return data.tobytes()
+    buffer = io.BytesIO()
+    frame.save(buffer, 'PNG', compress_level=PNG_COMPRESSION)
+    return buffer.getvalue()
+
+
+def decode_frame(data: bytes) -> Any:
+    """Decodificar un cuadro PNG a escala de grises"""
+    if cv2 is not None:
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if frame is None:
+            raise ValueError("Cuadro PNG inválido")
+        return frame
+    from PIL import Image
+    return Image.open(io.BytesIO(data)).convert('L')
+
+
+def frame_digest(frame: Any) -> str:
+    """Huella del contenido de una captura (cuadros idénticos, misma huella)"""
+    size = frame.shape if cv2 is not None else frame.size
+    digest = hashlib.blake2b(str(tuple(size)).encode(), digest_size=16)
+    digest.update(frame.tobytes())
+    return digest.hexdigest()
+
+
+def describe_input(event: Sequence[Any]) -> str:
+    """Texto legible de una entrada ('click', 'write', 'press' o 'hotkey' y sus argumentos)"""
+    kind, args = event[0], event[1:]
+    if kind == 'click':
+        return f"click en ({args[0]}, {args[1]})"
+    if kind == 'write':
+        return f"escribir {args[0]!r}"
+    if kind == 'hotkey':
+        return "atajo " + "+".join(args)
+    return f"tecla {args[0]}"
+
+
+class Recorder:
+    """
+    Escritor del archivo de grabación.
+
+    El archivo es un zip con un cuadro PNG por cada captura distinta
+    (frames/N.png, sin recomprimir) y un index.json comprimido con la línea
+    de tiempo. Cada cuadro se guarda una sola vez: las capturas repetidas
+    solo agregan una referencia, y las consecutivas iguales se cuentan en
+    un mismo evento. Se escribe en un .tmp que reemplaza al destino al cerrar.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._temp = self.path.with_name(self.path.name + '.tmp')
+        self.archive = zipfile.ZipFile(self._temp, 'w')
+        self.frames: Dict[str, int] = {}  # Huella -> número de cuadro
+        self.events: List[Dict[str, Any]] = []
+        self.grabs = 0
+        self.size: Optional[Tuple[int, int]] = None
+        self.created = datetime.now().isoformat(timespec='seconds')
+        self.start = time.monotonic()
+        self.closed = False
+
+    def _elapsed(self) -> float:
+        return round(time.monotonic() - self.start, 4)
+
+    def grab(self, frame: Any) -> int:
+        """
+        Registrar una captura de pantalla completa.
+
+        Returns:
+            int: Número del cuadro en la grabación
+        """
+        digest = frame_digest(frame)
+        frame_id = self.frames.get(digest)
+        if frame_id is None:
+            frame_id = self.frames[digest] = len(self.frames)
+            self.archive.writestr(f"frames/{frame_id}.png", encode_frame(frame))
+        if self.size is None:
+            self.size = (frame.shape[1], frame.shape[0]) if cv2 is not None else frame.size
+
+        self.grabs += 1
+        last = self.events[-1] if self.events else None
+        if last is not None and last['kind'] == 'grab' and last['frame'] == frame_id:
+            last['count'] += 1
+        else:
+            self.events.append({'t': self._elapsed(), 'kind': 'grab', 'frame': frame_id, 'count': 1})
+        return frame_id
+
+    def input(self, kind: str, *args: Any):
+        """Registrar una entrada ('click', 'write', 'press' o 'hotkey')"""
+        self.events.append({'t': self._elapsed(), 'kind': kind, 'args': list(args)})
+
+    def close(self, meta: Optional[Dict[str, Any]] = None):
+        """Escribir el índice y dejar el archivo en su lugar"""
+        if self.closed:
+            return
+        self.closed = True
+        index = {
+            'format': RECORDING_FORMAT,
+            'created': self.created,
+            'duration': self._elapsed(),
+            'size': list(self.size) if self.size else None,
+            'frames': len(self.frames),
+            'grabs': self.grabs,
+            'meta': meta or {},
+            'events': self.events,
+        }
+        self.archive.writestr(zipfile.ZipInfo(INDEX_NAME), json.dumps(index, ensure_ascii=False),
+                              compress_type=zipfile.ZIP_DEFLATED)
+        self.archive.close()
+        os.replace(self._temp, self.path)
+
+
+class RecordingInput(ScreenInput):
+    """Entrada que registra cada acción en la grabación antes de ejecutarla"""
+
+    def __init__(self, inner: ScreenInput, recorder: Recorder):
+        self.inner = inner
+        self.recorder = recorder
+
+    def click(self, point: Tuple[int, int]):
+        self.recorder.input('click', int(point[0]), int(point[1]))
+        self.inner.click(point)
+
+    def write(self, text: str, interval: float = 0.0):
+        self.recorder.input('write', text)
+        self.inner.write(text, interval)
+
+    def press(self, key: str):
+        self.recorder.input('press', key)
+        self.inner.press(key)
+
+    def hotkey(self, *keys: str):
+        self.recorder.input('hotkey', *keys)
+        self.inner.hotkey(*keys)
+
+
+class RecordingCapture(ScreenCapture):
+    """
+    Backend que graba lo que captura otro backend.
+
+    Cada captura toma la pantalla completa (aunque se pida una región) para
+    que la reproducción pueda recortar cualquier región, incluso si el
+    código reproducido busca en otro lugar. La entrada creada con
+    create_input() queda registrada en la misma línea de tiempo.
+    """
+
+    name = 'record'
+
+    def __init__(self, inner: ScreenCapture, path: Path):
+        """
+        Args:
+            inner: Backend real (ej. MSSCapture)
+            path: Archivo de grabación a escribir (se reemplaza al cerrar)
+        """
+        self.inner = inner
+        self.recorder = Recorder(path)
+
+    def grab(self, region: Optional[Region] = None) -> Any:
+        frame = self.inner.grab()
+        self.recorder.grab(frame)
+        return crop(frame, region)
+
+    def size(self) -> Tuple[int, int]:
+        return self.inner.size()
+
+    def save(self, path: Path):
+        self.inner.save(path)
+
+    def create_input(self, pause: float = 0.5) -> ScreenInput:
+        return RecordingInput(self.inner.create_input(pause), self.recorder)
+
+    def close(self):
+        self.recorder.close({'backend': self.inner.name})
+        self.inner.close()
+
+
+class Recording:
+    """Grabación leída: cuadros decodificados y línea de tiempo"""
+
+    def __init__(self, frames: List[Any], events: List[Dict[str, Any]],
+                 index: Optional[Dict[str, Any]] = None):
+        if not any(event['kind'] == 'grab' for event in events):
+            raise ValueError("La grabación no tiene capturas")
+        self.frames = frames
+        self.events = events
+        self.index = index or {}
+
+    @classmethod
+    def load(cls, path: Path) -> 'Recording':
+        """Leer un archivo escrito por Recorder"""
+        with zipfile.ZipFile(path) as archive:
+            index = json.loads(archive.read(INDEX_NAME))
+            if index.get('format') != RECORDING_FORMAT:
+                raise ValueError(f"Formato de grabación no soportado: {index.get('format')}")
+            frames = [decode_frame(archive.read(f"frames/{n}.png")) for n in range(index['frames'])]
+        return cls(frames, index['events'], index)
+
+    @property
+    def inputs(self) -> List[Tuple[Any, ...]]:
+        """Entradas grabadas, en orden, como tuplas (tipo, argumentos...)"""
+        return [(event['kind'],) + tuple(event['args']) for event in self.events if event['kind'] != 'grab']
+
+    def timeline(self) -> List[List[int]]:
+        """
+        Cuadros servidos entre cada par de entradas.
+
+        Returns:
+            List[List[int]]: Una lista de números de cuadro por tramo (antes
+            de la primera entrada, entre cada par y después de la última).
+            Un tramo sin capturas repite el último cuadro anterior.
+        """
+        epochs: List[List[int]] = [[]]
+        for event in self.events:
+            if event['kind'] == 'grab':
+                epochs[-1].extend([event['frame']] * event['count'])
+            else:
+                epochs.append([])
+        last = next(event['frame'] for event in self.events if event['kind'] == 'grab')
+        for epoch in epochs:
+            if epoch:
+                last = epoch[-1]
+            else:
+                epoch.append(last)
+        return epochs
+
+
+class ReplayInput(ScreenInput):
+    """Entrada de la reproducción: la compara con la grabada y avanza la pantalla"""
+
+    def __init__(self, capture: 'ReplayCapture'):
+        self.capture = capture
+
+    def click(self, point: Tuple[int, int]):
+        self.capture.receive(('click', int(point[0]), int(point[1])))
+
+    def write(self, text: str, interval: float = 0.0):
+        self.capture.receive(('write', text))
+
+    def press(self, key: str):
+        self.capture.receive(('press', key))
+
+    def hotkey(self, *keys: str):
+        self.capture.receive(('hotkey',) + keys)
+
+
+class ReplayCapture(ScreenCapture):
+    """
+    Pantalla reproducida desde una grabación, sin display.
+
+    La pantalla de SAP solo cambia en respuesta a la entrada, así que la
+    grabación se divide en tramos entre entradas. Dentro de un tramo cada
+    captura recibe el siguiente cuadro grabado (el último se mantiene) y
+    cada entrada pasa al tramo siguiente. El resultado no depende de la
+    velocidad del equipo: con simulation.VirtualClock como reloj de
+    SAPAutomation las esperas no duermen y la corrida va a toda velocidad.
+
+    Las entradas que no coinciden con las grabadas (otro punto de click
+    más allá de tolerance píxeles, otro texto u otra tecla) se anotan en
+    divergences: es la señal de regresión de un cambio de Computer Vision.
+    """
+
+    name = 'replay'
+
+    def __init__(self, recording: Union[Recording, Path], tolerance: int = 3):
+        """
+        Args:
+            recording: Grabación o archivo de grabación
+            tolerance: Diferencia máxima en píxeles entre clicks equivalentes
+        """
+        self.recording = recording if isinstance(recording, Recording) else Recording.load(recording)
+        self.epochs = self.recording.timeline()
+        self.expected = self.recording.inputs
+        self.tolerance = tolerance
+        self.received = 0  # Entradas recibidas
+        self.grabs = 0
+        self.divergences: List[str] = []
+        self._served = 0  # Capturas servidas en el tramo actual
+        self._frame = self.recording.frames[self.epochs[0][0]]
+
+    def _same(self, expected: Tuple[Any, ...], received: Tuple[Any, ...]) -> bool:
+        if expected[0] != received[0] or len(expected) != len(received):
+            return False
+        if expected[0] == 'click':
+            return all(abs(a - b) <= self.tolerance for a, b in zip(expected[1:], received[1:]))
+        return tuple(expected) == tuple(received)
+
+    def receive(self, event: Tuple[Any, ...]):
+        """Registrar una entrada de la corrida reproducida y pasar al siguiente tramo"""
+        number = self.received + 1
+        if self.received >= len(self.expected):
+            self.divergences.append(f"entrada {number}: {describe_input(event)} no está en la grabación")
+        elif not self._same(self.expected[self.received], event):
+            self.divergences.append(f"entrada {number}: se esperaba {describe_input(self.expected[self.received])}, "
+                                    f"llegó {describe_input(event)}")
+        self.received += 1
+        self._served = 0
+
+    def grab(self, region: Optional[Region] = None) -> Any:
+        epoch = self.epochs[min(self.received, len(self.epochs) - 1)]
+        self._frame = self.recording.frames[epoch[min(self._served, len(epoch) - 1)]]
+        self._served += 1
+        self.grabs += 1
+        return crop(self._frame, region)
+
+    def size(self) -> Tuple[int, int]:
+        if cv2 is None:
+            return self._frame.size
+        return self._frame.shape[1], self._frame.shape[0]
+
+    def save(self, path: Path):
+        if cv2 is None:
+            self._frame.save(str(path))
+        else:
+            cv2.imwrite(str(path), self._frame)
+
+    def create_input(self, pause: float = 0.5) -> ScreenInput:
+        return ReplayInput(self)
+
+    def report(self) -> Dict[str, Any]:
+        """Resumen de la reproducción: capturas, entradas y divergencias"""
+        return {
+            'grabs': self.grabs,
+            'inputs': self.received,
+            'recorded_inputs': len(self.expected),
+            'complete': self.received >= len(self.expected),
+            'divergences': list(self.divergences),
+        }
+
+
+def replay_run(path: Path, script, logger: logging.Logger,
+               tolerance: int = 3) -> Tuple[ReplayCapture, Any, Any, float]:
+    """
+    Ejecutar un guion de SAPAutomation contra una grabación.
+
+    Args:
+        path: Archivo de grabación
+        script: Función que recibe el SAPAutomation y ejecuta el flujo
+        logger: Logger de SAPAutomation
+        tolerance: Ver ReplayCapture
+
+    Returns:
+        Tuple[ReplayCapture, Any, Any, float]: Pantalla reproducida (con su
+        report()), el SAPAutomation (con sus spans), resultado del guion y
+        segundos reales que tardó
+    """
+    from sap_automation import SAPAutomation
+    from simulation import VirtualClock
+
+    screen = ReplayCapture(Recording.load(path), tolerance)
+    sap = SAPAutomation.from_config(
+        logger, simulation_mode=False,
+        # Sin estado de visión en disco: no se mezcla con el de la máquina real
+        location_cache_file=None,
+        # El portapapeles no se graba: los items se escriben
+        bulk_paste=False,
+        capture=screen, clock=VirtualClock(), spans=SpanRecorder(),
+    )
+    start = time.perf_counter()
+    result = script(sap)
+    return screen, sap, result, time.perf_counter() - start
+
+
+def load_orders(directory: Path) -> List[Any]:
+    """Órdenes de los JSON de un directorio, en orden de nombre"""
+    from order import Order
+    orders = []
+    for path in sorted(Path(directory).glob('*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            orders.append(Order.from_dict(json.load(f)))
+    return orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grabaciones de pantalla para Computer Vision sin display")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    info = subparsers.add_parser('info', help="Resumen de una grabación")
+    info.add_argument('recording', type=Path, help="Archivo de grabación")
+    replay = subparsers.add_parser('replay', help="Reproducir una grabación y comparar la entrada")
+    replay.add_argument('recording', type=Path, help="Archivo de grabación")
+    replay.add_argument('--orders', type=Path,
+                        help="Directorio con los JSON de las órdenes grabadas, en orden de nombre "
+                             "(por defecto solo la navegación a Orden de Venta)")
+    replay.add_argument('--repeat', type=int, default=1, help="Repeticiones para medir el tiempo")
+    replay.add_argument('--tolerance', type=int, default=3, help="Píxeles de tolerancia en los clicks")
+    replay.add_argument('--verbose', action='store_true', help="Mostrar el log de SAPAutomation")
+    replay.add_argument('--json', action='store_true', help="Imprimir el resultado en JSON")
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        recording = Recording.load(args.recording)
+        index = recording.index
+        inputs = recording.inputs
+        print("=" * 70)
+        print(f"⏺️ GRABACIÓN {args.recording.name}")
+        print("=" * 70)
+        print(f"Creada:        {index.get('created')} ({index.get('meta', {}).get('backend', '?')})")
+        print(f"Duración:      {index.get('duration', 0):.1f}s")
+        print(f"Pantalla:      {index['size'][0]}x{index['size'][1]}")
+        print(f"Capturas:      {index['grabs']} ({len(recording.frames)} cuadros distintos)")
+        print(f"Entradas:      {len(inputs)}")
+        print(f"Archivo:       {args.recording.stat().st_size / 1024:.0f} KB")
+        for number, event in enumerate(inputs, 1):
+            print(f"   {number:>4}. {describe_input(event)}")
+        return 0
+
+    logger = logging.getLogger("Replay")
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.CRITICAL,
+                        format='%(levelname)s - %(message)s')
+    if args.orders:
+        orders = load_orders(args.orders)
+        script = lambda sap: all([sap.process_order(order) for order in orders])
+    else:
+        script = lambda sap: sap.navigate_to_sales_order()
+
+    times = []
+    for _ in range(max(1, args.repeat)):
+        screen, sap, result, elapsed = replay_run(args.recording, script, logger, args.tolerance)
+        times.append(elapsed)
+    report = screen.report()
+    report.update({'success': bool(result), 'seconds': min(times), 'runs': len(times),
+                   'grabs_per_second': report['grabs'] / min(times) if min(times) > 0 else 0.0,
+                   'spans': sap.spans.to_dict()})
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print("=" * 70)
+        print(f"▶️ REPRODUCCIÓN {args.recording.name} ({'órdenes' if args.orders else 'navegación'})")
+        print("=" * 70)
+        print(f"Resultado:     {'✅ éxito' if report['success'] else '❌ falló'}")
+        print(f"Tiempo:        {report['seconds'] * 1000:.1f}ms (mejor de {report['runs']})")
+        print(f"Capturas:      {report['grabs']} ({report['grabs_per_second']:.0f}/s)")
+        print(f"Entradas:      {report['inputs']} de {report['recorded_inputs']} grabadas")
+        for divergence in report['divergences']:
+            print(f"   ⚠️ {divergence}")
+        print("-" * 70)
+        print("Tiempo real por paso (última repetición; las esperas no cuentan):")
+        for line in format_spans(report['spans']):
+            print(f"   {line}")
+        print("=" * 70)
+    return 0 if report['success'] and not report['divergences'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,11 +6,130 @@ Automatización de SAP Business One usando pyautogui
 """
 
 import time
-import pyautogui
+from collections import deque
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 import logging
 
+try:
+    import pyautogui
+    IMAGE_NOT_FOUND = getattr(pyautogui, 'ImageNotFoundException', ())
+except Exception:  # Sin display (ej. al reproducir una grabación en Linux) no hay pyautogui
+    pyautogui = None
+    IMAGE_NOT_FOUND = ()
+
+try:
+    import pyperclip
+except ImportError:  # Sin portapapeles los items se escriben uno a uno
+    pyperclip = None
+
+from order import Order, OrderItem
+from screen_capture import ScreenCapture, ScreenInput, create_capture
+from simulation import LatencyModel
+from spans import SpanRecorder, traced
+from vision import (FrameGate, LocationCache, MatchResult, Template, TemplateRegistry,
+                    frame_difference, match_any)
+
+# Duraciones reales guardadas por primitiva (las más recientes)
+LATENCY_SAMPLE_LIMIT = 500
+
+# paste_items: se pegó un bloque pero no se pudo verificar cuántas filas llegaron
+PASTE_UNVERIFIED = -1
+
+
+def _clipboard_cell(value: Any) -> str:
+    """Texto de una celda en una sola línea y sin tabulaciones"""
+    text = '' if value is None else str(value)
+    return text.replace('\t', ' ').replace('\r', ' ').replace('\n', ' ')
+
+
+def lane_file(path: Path, lane: Optional[str]) -> Path:
+    """Archivo propio de un carril: path con el nombre del carril como sufijo"""
+    if not lane:
+        return path
+    return path.with_name(f"{path.stem}_{lane}{path.suffix}")
+
+
+def items_to_clipboard_text(items: Iterable[OrderItem],
+                            columns: Sequence[Optional[str]] = ('codigo', 'cantidad')) -> str:
+    """
+    Serializar items como texto separado por tabulaciones (formato de Excel).
+
+    Args:
+        items: Items de la orden
+        columns: Campo de OrderItem para cada columna de la tabla de SAP, en
+            el orden de la tabla a partir de la celda activa (None = celda
+            vacía, para saltar una columna que SAP completa solo)
+
+    Returns:
+        str: Una fila por item separadas por CRLF, columnas separadas por tab
+    """
+    rows = []
+    for item in items:
+        rows.append('\t'.join(_clipboard_cell(getattr(item, column) if column else None)
+                              for column in columns))
+    return '\r\n'.join(rows)
+
+
+def count_copied_rows(text: str, items: Sequence[OrderItem],
+                      columns: Sequence[Optional[str]] = ('codigo', 'cantidad')) -> Optional[int]:
+    """
+    Contar las filas pegadas a partir de una copia de la tabla.
+
+    La copia solo se acepta si cada línea es una fila completa (varias
+    columnas, no solo la celda activa) y, si se pegó el código, si los
+    códigos coinciden en orden con los primeros items pegados. Las líneas
+    de más se cuentan igual: el resultado supera len(items) y el llamador
+    decide qué hacer con filas duplicadas.
+
+    Args:
+        text: Texto copiado de la tabla
+        items: Items del bloque pegado
+        columns: Columnas pegadas (ver items_to_clipboard_text)
+
+    Returns:
+        Optional[int]: Filas que llegaron, o None si la copia no permite contarlas
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return None
+    min_fields = max(2, len(columns))
+    for index, line in enumerate(lines):
+        fields = [field.strip() for field in line.split('\t')]
+        if len(fields) < min_fields:
+            return None
+        if (index < len(items) and 'codigo' in columns
+                and _clipboard_cell(items[index].codigo).strip() not in fields):
+            return None
+    return len(lines)
+
+
+class AdaptivePoll:
+    """
+    Intervalo de sondeo que empieza corto y crece mientras nada cambia.
+
+    Al esperar a SAP, el primer sondeo llega en milisegundos; si la
+    pantalla sigue igual, el intervalo se multiplica por factor hasta
+    maximum. reset() lo devuelve al mínimo cuando la pantalla cambia.
+    """
+
+    def __init__(self, minimum: float, maximum: float, factor: float = 1.5):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.factor = factor
+        self.current = minimum
+
+    def next(self) -> float:
+        """Intervalo a esperar antes del siguiente sondeo"""
+        interval = self.current
+        self.current = min(self.current * self.factor, self.maximum)
+        return interval
+
+    def reset(self):
+        """Volver al intervalo mínimo"""
+        self.current = self.minimum
+
 
 class SAPAutomation:
     """
@@ -20,7 +139,20 @@ class SAPAutomation:
     y automatizar la interacción con SAP.
     """
 
-    def __init__(self, logger: logging.Logger, assets_path: Path, simulation_mode: bool = False):
+    def __init__(self, logger: logging.Logger, assets_path: Path, simulation_mode: bool = False,
+                 template_cache_size: int = 64, location_cache_file: Optional[Path] = None,
+                 roi_padding: int = 40, pyramid_levels: int = 2,
+                 poll_interval: float = 0.03, max_poll_interval: float = 0.5,
+                 poll_backoff: float = 1.5, settle_time: float = 0.3,
+                 change_threshold: float = 0.002, save_timeout: float = 30,
+                 batch_mode: bool = False, form_image: Optional[str] = None,
+                 bulk_paste: bool = False, paste_chunk_size: int = 100,
+                 paste_columns: Sequence[Optional[str]] = ('codigo', 'cantidad'),
+                 grid_copy_keys: Optional[Sequence[str]] = ('ctrl', 'c'),
+                 pyautogui_pause: float = 0.5, type_interval: float = 0.05,
+                 capture: Union[str, ScreenCapture] = 'auto',
+                 latencies: Optional[LatencyModel] = None, clock: Any = None,
+                 spans: Optional[SpanRecorder] = None):
         """
         Inicializar automatización SAP.
 
@@ -28,21 +160,162 @@ class SAPAutomation:
             logger: Logger para registro de eventos
             assets_path: Ruta a las imágenes de referencia
             simulation_mode: Si True, simula acciones sin ejecutarlas
+            template_cache_size: Máximo de plantillas decodificadas en memoria
+            location_cache_file: Archivo de estado con la última posición de
+                cada plantilla (None = solo en memoria)
+            roi_padding: Margen en píxeles alrededor de la última posición
+            pyramid_levels: Niveles de reducción para buscar en capturas
+                grandes (0 = siempre a resolución completa)
+            poll_interval: Intervalo inicial entre capturas al esperar un estado
+            max_poll_interval: Intervalo máximo mientras la pantalla no cambia
+            poll_backoff: Factor de crecimiento del intervalo
+            settle_time: Segundos sin cambios para considerar la pantalla estable
+            change_threshold: Fracción de píxeles que debe cambiar para
+                considerar que la pantalla respondió
+            save_timeout: Tiempo máximo de espera al guardar una orden
+            batch_mode: Mantener el formulario de Orden de Venta abierto
+                entre órdenes en lugar de navegar y cerrarlo cada vez.
+                Fuera de simulación requiere form_image
+            form_image: Imagen visible solo con el formulario abierto, para
+                verificar que sigue en pantalla en modo lote
+            bulk_paste: Ingresar los items pegándolos desde el portapapeles
+                en bloques en lugar de escribirlos uno a uno. Fuera de
+                simulación requiere grid_copy_keys
+            paste_chunk_size: Items por pegado
+            paste_columns: Columnas pegadas (ver items_to_clipboard_text)
+            grid_copy_keys: Atajo que copia las filas recién pegadas para
+                contarlas
+            pyautogui_pause: Pausa de pyautogui después de cada acción
+            type_interval: Intervalo entre teclas al escribir
+            capture: Backend de captura de pantalla ('auto', 'mss',
+                'pyautogui') o un ScreenCapture (ej. FakeCapture en tests).
+                El backend también provee la entrada (ver create_input)
+            latencies: Duración de cada acción en modo simulación (por
+                defecto los tiempos fijos de simulation.LEGACY_LATENCIES)
+            clock: Reloj con sleep() y monotonic() para las esperas (por
+                defecto time; simulation.VirtualClock para simular o
+                reproducir una grabación sin esperar)
+            spans: Tiempos por paso (navegación, cada click, encabezado,
+                items, guardado). Por defecto deshabilitados
         """
         self.logger = logger
         self.assets_path = assets_path
         self.simulation_mode = simulation_mode
         self.confidence = 0.8  # Confidence por defecto
         self.timeout = 10  # Timeout por defecto
+        self.pyramid_levels = pyramid_levels
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_backoff = poll_backoff
+        self.settle_time = settle_time
+        self.change_threshold = change_threshold
+        self.save_timeout = save_timeout
+        self.batch_mode = batch_mode
+        self.form_image = form_image
+        self.form_open = False  # Formulario de Orden de Venta listo para la siguiente orden
+        self.bulk_paste = bulk_paste
+        self.paste_chunk_size = max(1, paste_chunk_size)
+        self.paste_columns = tuple(paste_columns)
+        self.grid_copy_keys = tuple(grid_copy_keys) if grid_copy_keys else None
+        self.latencies = latencies or LatencyModel.legacy()
+        self.sleep = clock.sleep if clock is not None else time.sleep
+        self.monotonic = clock.monotonic if clock is not None else time.monotonic
+        # Duraciones reales por primitiva, para ajustar la simulación
+        self.latency_samples: Dict[str, Deque[float]] = {}
+        self.spans = spans or SpanRecorder(enabled=False)
+        self.poll_count = 0  # Sondeos de wait_until en total (para los spans)
+
+        self.type_interval = type_interval
+
+        # Todas las capturas (esperas, búsquedas y debug) pasan por el backend,
+        # y la entrada por la que él provee (pyautogui, grabada o reproducida)
+        self.screen = create_capture(capture, logger=logger)
+        self.input: Optional[ScreenInput] = None if simulation_mode else self.screen.create_input(pyautogui_pause)
+
+        # Plantillas decodificadas una sola vez para todos los sondeos
+        self.templates = TemplateRegistry(assets_path, template_cache_size, logger)
+        self.templates.preload()
+
+        # Última posición de cada plantilla: se busca primero cerca de ella
+        self.locations = LocationCache(location_cache_file, roi_padding, logger)
+        self.locations.load()
+
+        # Sin imagen del formulario no hay cómo saber si el usuario lo cerró:
+        # la orden siguiente se escribiría en cualquier pantalla activa
+        if self.batch_mode and not simulation_mode and (
+                not form_image or self.templates.get(form_image) is None):
+            self.logger.warning(f"⚠️ Modo lote desactivado: falta la imagen del formulario "
+                                f"(form_image = {form_image!r})")
+            self.batch_mode = False
+
+        # Sin contar las filas pegadas no se sabe qué falta escribir
+        if self.bulk_paste and not simulation_mode and not self.grid_copy_keys:
+            self.logger.warning("⚠️ Pegado en bloque desactivado: falta grid_copy_keys para verificarlo")
+            self.bulk_paste = False
+
+        self.logger.info(f"🤖 SAPAutomation inicializado (Simulación: {simulation_mode}, "
+                         f"captura: {self.screen.name})")
+
+    @classmethod
+    def from_config(cls, logger: logging.Logger, timing: Any = None, lane: Optional[str] = None,
+                    **overrides: Any) -> 'SAPAutomation':
+        """
+        Crear SAPAutomation con SAP_AUTOMATION_CONFIG y el perfil de tiempos.
 
-        # Configurar pyautogui
-        pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.5
+        Es la única construcción desde config.py: la usan el procesador
+        de archivos, cada carril y la reproducción de grabaciones.
 
-        self.logger.info(f"🤖 SAPAutomation inicializado (Simulación: {simulation_mode})")
+        Args:
+            logger: Logger para registro de eventos
+            timing: Perfil de tiempos (por defecto timing_profiles.load_profile())
+            lane: Nombre del carril; sus archivos propios (grabación y estado
+                de visión) llevan el nombre como sufijo para no pisar los de
+                otros carriles
+            overrides: Argumentos de __init__ que reemplazan a los de config
+                (ej. capture, clock, simulation_mode)
+
+        Returns:
+            SAPAutomation: Instancia configurada
+        """
+        from config import METRICS_CONFIG, PROJECT_ROOT, SAP_AUTOMATION_CONFIG as config
+        from timing_profiles import load_profile
+
+        timing = timing or load_profile(logger=logger)
+        simulation_mode = overrides.pop('simulation_mode', config['simulation_mode'])
+        if 'capture' not in overrides:
+            record = None
+            if config['record_file'] and not simulation_mode:
+                record = lane_file(PROJECT_ROOT / config['record_file'], lane)
+            overrides['capture'] = create_capture(config['capture_backend'], logger=logger, record=record)
+
+        arguments = dict(
+            assets_path=PROJECT_ROOT / "assets" / "images" / "sap",
+            template_cache_size=config['template_cache_size'],
+            location_cache_file=lane_file(PROJECT_ROOT / config['location_cache_file'], lane),
+            roi_padding=config['roi_padding'],
+            pyramid_levels=config['pyramid_levels'],
+            poll_interval=config['poll_interval'],
+            max_poll_interval=config['max_poll_interval'],
+            poll_backoff=config['poll_backoff'],
+            settle_time=timing.settle_time,
+            change_threshold=config['change_threshold'],
+            save_timeout=config['save_timeout'],
+            batch_mode=config['batch_mode'],
+            form_image=config['form_image'],
+            bulk_paste=config['bulk_paste'],
+            paste_chunk_size=config['paste_chunk_size'],
+            paste_columns=config['paste_columns'],
+            grid_copy_keys=config['grid_copy_keys'],
+            pyautogui_pause=timing.pyautogui_pause,
+            type_interval=timing.type_interval,
+            spans=SpanRecorder(enabled=METRICS_CONFIG['track_spans']),
+        )
+        arguments.update(overrides)
+        return cls(logger, simulation_mode=simulation_mode, **arguments)
 
     def find_and_click(self, image_name: str, confidence: float = 0.8,
-                       timeout: int = 10, region: Optional[Tuple] = None) -> bool:
+                       timeout: int = 10, region: Optional[Tuple] = None,
+                       wait_update: bool = False) -> bool:
         """
         Buscar imagen en pantalla y hacer clic.
 
@@ -51,72 +324,367 @@ class SAPAutomation:
             confidence: Nivel de confianza de detección (0.0 - 1.0)
             timeout: Tiempo máximo de búsqueda en segundos
             region: Región de búsqueda (x, y, width, height) opcional
+            wait_update: Si True, tras el clic espera a que la pantalla
+                responda (wait_for_update con una captura tomada justo
+                antes del clic, no antes de la búsqueda)
 
         Returns:
-            bool: True si encontró y hizo clic exitosamente
+            bool: True si encontró, hizo clic y (con wait_update) la
+            pantalla respondió
         """
-        image_path = self.assets_path / image_name
-
+        with self.spans.span(f"find_and_click:{image_name}") as span:
+            polls = self.poll_count
+            clicked, score = self._find_and_click(image_name, confidence, timeout, region, wait_update)
+            if not clicked:
+                span.mark_failed()
+            span.set(polls=self.poll_count - polls, score=score)
+            return clicked
+
+    def _find_and_click(self, image_name: str, confidence: float, timeout: float,
+                        region: Optional[Tuple], wait_update: bool = False) -> Tuple[bool, Optional[float]]:
+        """Buscar y hacer clic; devuelve (éxito, puntaje de la coincidencia)"""
         # Validar que la imagen existe
-        if not image_path.exists():
-            self.logger.error(f"❌ Imagen no encontrada: {image_path}")
-            return False
+        if self.templates.get(image_name) is None:
+            self.logger.error(f"❌ Imagen no encontrada: {self.assets_path / image_name}")
+            return False, None
 
         # Modo simulación
         if self.simulation_mode:
             self.logger.info(f"🎭 [SIMULACIÓN] Click en {image_name}")
-            time.sleep(0.5)
-            return True
+            self.simulate('click')
+            return True, None
 
         # Búsqueda real
         self.logger.debug(f"🔍 Buscando: {image_name} (confidence={confidence})")
-        start_time = time.time()
+        start = time.perf_counter()
+        match = self.wait_for_any([image_name], timeout=timeout, confidence=confidence, region=region)
+        if match is None:
+            return False, None
+
+        center = match.center
+        before = self.capture() if wait_update else None
+        self.input.click(center)
+        self.record_latency('click', start)
+        self.logger.info(f"✅ Click en {image_name} en posición {center}")
+        if wait_update and not self.wait_for_update(before):
+            self.logger.error(f"❌ La pantalla no respondió al click en {image_name}")
+            return False, match.score
+        return True, match.score
+
+    def wait_for_any(self, image_names: Sequence[Union[str, Tuple[str, float]]],
+                     timeout: float = 10, confidence: float = 0.8,
+                     region: Optional[Tuple] = None,
+                     poll_interval: Optional[float] = None) -> Optional[MatchResult]:
+        """
+        Esperar a que aparezca cualquiera de varias imágenes.
 
-        while time.time() - start_time < timeout:
-            try:
-                location = pyautogui.locateOnScreen(
-                    str(image_path),
-                    confidence=confidence,
-                    region=region
-                )
-
-                if location:
-                    # Obtener centro de la imagen detectada
-                    center = pyautogui.center(location)
-                    pyautogui.click(center)
-                    self.logger.info(f"✅ Click en {image_name} en posición {center}")
-                    return True
+        En cada sondeo toma una sola captura y prueba todas las plantillas
+        sobre ella, en el orden dado (prioridad). Sirve para esperar varios
+        desenlaces a la vez, por ejemplo el botón esperado, un diálogo de
+        error o un indicador de carga.
 
-            except pyautogui.ImageNotFoundException:
+        Args:
+            image_names: Nombres relativos a assets_path, o pares
+                (nombre, confidence) para un umbral propio por imagen
+            timeout: Tiempo máximo de espera en segundos
+            confidence: Confianza por defecto (0.0 - 1.0)
+            region: Región de búsqueda (x, y, width, height) opcional
+            poll_interval: Segundos fijos entre capturas (por defecto el
+                intervalo es adaptativo, ver AdaptivePoll)
+
+        Returns:
+            Optional[MatchResult]: Imagen encontrada, posición y puntaje, o
+            None si ninguna apareció antes del timeout
+
+        Si la captura es idéntica a la del sondeo anterior (sin
+        coincidencias), la búsqueda se omite: el resultado sería el mismo.
+        Cada cambio en pantalla vuelve el intervalo al mínimo.
+        """
+        candidates: List[Tuple[Template, float]] = []
+        for entry in image_names:
+            name, threshold = entry if isinstance(entry, tuple) else (entry, confidence)
+            template = self.templates.get(name)
+            if template is None:
+                self.logger.error(f"❌ Imagen no encontrada: {self.assets_path / name}")
+                continue
+            candidates.append((template, threshold))
+        if not candidates:
+            return None
+
+        names = ", ".join(template.name for template, _ in candidates)
+        if self.simulation_mode:
+            template = candidates[0][0]
+            self.logger.info(f"🎭 [SIMULACIÓN] Detectado {template.name}")
+            return MatchResult(template.name, (0, 0, template.width, template.height), 1.0)
+
+        if region is None:
+            self.locations.ensure_geometry(self.screen_geometry())
+
+        poll = self.adaptive_poll() if poll_interval is None else poll_interval
+        gate = FrameGate(on_change=poll.reset if isinstance(poll, AdaptivePoll) else None)
+        match = self.wait_until(lambda: self.locate_any(candidates, region, gate), timeout,
+                                names, poll)
+        if gate.skipped:
+            self.logger.debug(f"⏭️ {gate.skipped} sondeo(s) sin cambios en pantalla omitidos")
+        if match:
+            self.logger.debug(f"🎯 {match.name}: coincidencia {match.score:.3f} en {match.box}")
+        return match
+
+    def adaptive_poll(self, maximum: Optional[float] = None) -> AdaptivePoll:
+        """Intervalo de sondeo adaptativo con la configuración de la instancia"""
+        maximum = self.max_poll_interval if maximum is None else maximum
+        return AdaptivePoll(self.poll_interval, maximum, self.poll_backoff)
+
+    def wait_until(self, condition: Callable[[], Any], timeout: float, description: str,
+                   poll: Union[float, AdaptivePoll, None] = None) -> Any:
+        """
+        Sondear una condición hasta que se cumpla o venza el timeout.
+
+        Reemplaza las esperas fijas: devuelve apenas la pantalla llega al
+        estado esperado, y espera más si SAP está lento.
+
+        Args:
+            condition: Función sin argumentos; un resultado verdadero
+                termina la espera. Sus excepciones cuentan como "aún no".
+            timeout: Tiempo máximo de espera en segundos
+            description: Qué se espera (para el log de timeout)
+            poll: Segundos fijos entre sondeos, o un AdaptivePoll (por
+                defecto uno nuevo con la configuración de la instancia)
+
+        Returns:
+            Any: El resultado verdadero de condition, o None si venció el timeout
+        """
+        if poll is None:
+            poll = self.adaptive_poll()
+        deadline = self.monotonic() + timeout
+        while True:
+            self.poll_count += 1
+            try:
+                result = condition()
+                if result:
+                    return result
+            except IMAGE_NOT_FOUND:
                 pass
             except Exception as e:
-                self.logger.debug(f"Error buscando {image_name}: {e}")
+                self.logger.debug(f"Error esperando {description}: {e}")
+
+            remaining = deadline - self.monotonic()
+            if remaining <= 0:
+                self.logger.warning(f"⚠️ Timeout esperando {description} después de {timeout}s")
+                return None
+            interval = poll.next() if isinstance(poll, AdaptivePoll) else poll
+            self.sleep(min(interval, remaining))
+
+    def simulate(self, primitive: str, count: int = 1):
+        """
+        Esperar lo que tardaría una acción en modo simulación.
+
+        Args:
+            primitive: Acción (ver simulation.SIMULATED_PRIMITIVES)
+            count: Repeticiones (ej. caracteres escritos)
+        """
+        duration = self.latencies.sample(primitive, count)
+        if duration > 0:
+            self.sleep(duration)
 
-            time.sleep(0.5)
+    def record_latency(self, primitive: str, start: float, count: int = 1):
+        """
+        Registrar la duración real de una acción iniciada en start.
 
-        self.logger.warning(f"⚠️ Timeout: No se encontró {image_name} después de {timeout}s")
-        return False
+        Args:
+            primitive: Acción (ver simulation.SIMULATED_PRIMITIVES)
+            start: time.perf_counter() al iniciar la acción
+            count: Repeticiones incluidas (se guarda la duración de una)
+        """
+        if count <= 0:
+            return
+        samples = self.latency_samples.get(primitive)
+        if samples is None:
+            samples = self.latency_samples[primitive] = deque(maxlen=LATENCY_SAMPLE_LIMIT)
+        samples.append((time.perf_counter() - start) / count)
 
-    def type_text(self, text: str, interval: float = 0.05, press_enter: bool = False):
+    def capture(self, region: Optional[Tuple] = None) -> Any:
+        """
+        Captura en escala de grises para comparar estados de pantalla.
+
+        Args:
+            region: Región (x, y, width, height) opcional
+
+        Returns:
+            Any: np.ndarray con OpenCV, o imagen PIL en modo 'L' sin OpenCV
+        """
+        return self.screen.grab(region)
+
+    def wait_for_change(self, reference: Any, region: Optional[Tuple] = None,
+                        timeout: Optional[float] = None) -> bool:
+        """
+        Esperar a que la pantalla deje de ser igual a una captura previa.
+
+        Args:
+            reference: Captura tomada con capture() antes de la acción
+            region: La misma región de reference
+            timeout: Tiempo máximo de espera (por defecto self.timeout)
+
+        Returns:
+            bool: True si la pantalla cambió antes del timeout
+        """
+        if self.simulation_mode:
+            return True
+
+        def changed() -> bool:
+            return frame_difference(reference, self.capture(region)) >= self.change_threshold
+
+        timeout = self.timeout if timeout is None else timeout
+        return bool(self.wait_until(changed, timeout, "un cambio en pantalla"))
+
+    def wait_for_stable(self, region: Optional[Tuple] = None, timeout: Optional[float] = None,
+                        settle_time: Optional[float] = None) -> bool:
+        """
+        Esperar a que la pantalla deje de cambiar durante settle_time.
+
+        Args:
+            region: Región (x, y, width, height) opcional
+            timeout: Tiempo máximo de espera (por defecto self.timeout)
+            settle_time: Segundos sin cambios (por defecto el de la instancia)
+
+        Returns:
+            bool: True si la pantalla quedó estable antes del timeout
+        """
+        if self.simulation_mode:
+            return True
+
+        settle_time = self.settle_time if settle_time is None else settle_time
+        # El intervalo no supera settle_time para no pasarse de la estabilidad
+        poll = self.adaptive_poll(min(self.max_poll_interval, settle_time))
+        state = {'frame': self.capture(region), 'since': self.monotonic()}
+
+        def stable() -> bool:
+            frame = self.capture(region)
+            now = self.monotonic()
+            if frame_difference(state['frame'], frame) >= self.change_threshold:
+                state['frame'], state['since'] = frame, now
+                poll.reset()
+                return False
+            return now - state['since'] >= settle_time
+
+        timeout = self.timeout if timeout is None else timeout
+        return bool(self.wait_until(stable, timeout, "pantalla estable", poll))
+
+    def wait_for_update(self, reference: Any, region: Optional[Tuple] = None,
+                        timeout: Optional[float] = None) -> bool:
+        """
+        Esperar a que la pantalla responda a una acción y termine de dibujarse.
+
+        Args:
+            reference: Captura tomada con capture() antes de la acción
+            region: La misma región de reference
+            timeout: Tiempo máximo total (por defecto self.timeout)
+
+        Returns:
+            bool: True si la pantalla cambió y quedó estable antes del timeout
+        """
+        if self.simulation_mode:
+            return True
+
+        timeout = self.timeout if timeout is None else timeout
+        deadline = self.monotonic() + timeout
+        if not self.wait_for_change(reference, region, timeout):
+            return False
+        return self.wait_for_stable(region, max(deadline - self.monotonic(), self.settle_time))
+
+    def locate_any(self, candidates: Sequence[Tuple[Template, float]],
+                   region: Optional[Tuple] = None,
+                   gate: Optional[FrameGate] = None) -> Optional[MatchResult]:
+        """
+        Buscar varias plantillas en pantalla una vez.
+
+        Con OpenCV toma una sola captura en escala de grises y compara todas
+        las plantillas ya decodificadas; sin OpenCV usa
+        pyautogui.locateOnScreen por plantilla. Sin región explícita, busca
+        primero alrededor de la última posición conocida de las plantillas
+        y solo si no las encuentra captura la pantalla completa.
+
+        Args:
+            candidates: Pares (plantilla, confidence) en orden de prioridad
+            region: Región de búsqueda (x, y, width, height) opcional
+            gate: Omite la búsqueda en capturas idénticas a las del sondeo
+                anterior (ver vision.FrameGate)
+
+        Returns:
+            Optional[MatchResult]: Primera coincidencia en coordenadas de pantalla
+        """
+        if not self.templates.available:
+            for template, confidence in candidates:
+                box = pyautogui.locateOnScreen(str(template.path), confidence=confidence, region=region)
+                if box:
+                    return MatchResult(template.name, tuple(box), confidence)
+            return None
+
+        if region is not None:
+            return self._match_region(candidates, region, gate)
+
+        names = [template.name for template, _ in candidates]
+        roi = self.locations.roi(names, self.locations.geometry[:2]) if self.locations.geometry else None
+        match = self._match_region(candidates, roi, gate) if roi else None
+        if match is None:
+            match = self._match_region(candidates, None, gate)
+        if match is not None:
+            self.locations.record(match.name, match.box)
+        return match
+
+    def _match_region(self, candidates: Sequence[Tuple[Template, float]],
+                      region: Optional[Tuple], gate: Optional[FrameGate] = None) -> Optional[MatchResult]:
+        screen = self.screen.grab(region)
+        if gate is not None and gate.unchanged(region, screen):
+            return None
+        offset = (region[0], region[1]) if region else (0, 0)
+        return match_any(screen, candidates, offset, self.pyramid_levels)
+
+    def screen_geometry(self) -> Tuple[int, ...]:
+        """
+        Resolución de pantalla y caja de la ventana activa.
+
+        Las posiciones en caché solo valen mientras esta geometría no cambie.
+
+        Returns:
+            Tuple[int, ...]: (ancho, alto) más (x, y, ancho, alto) de la
+            ventana activa si el sistema permite consultarla
+        """
+        width, height = self.screen.size()
+        try:
+            window = pyautogui.getActiveWindow()
+            window_box = (window.left, window.top, window.width, window.height) if window else ()
+        except Exception:
+            window_box = ()
+        return (int(width), int(height)) + tuple(int(v) for v in window_box)
+
+    def type_text(self, text: str, interval: Optional[float] = None, press_enter: bool = False):
         """
         Escribir texto en el campo activo.
 
         Args:
             text: Texto a escribir
-            interval: Intervalo entre teclas en segundos
+            interval: Intervalo entre teclas en segundos (por defecto el de la instancia)
             press_enter: Si True, presiona Enter al final
         """
         if self.simulation_mode:
             self.logger.info(f"🎭 [SIMULACIÓN] Escribiendo: {text}")
-            time.sleep(0.3)
+            self.simulate('type')
+            self.simulate('keystroke', len(str(text)))
             return
 
-        pyautogui.write(str(text), interval=interval)
+        interval = self.type_interval if interval is None else interval
+        start = time.perf_counter()
+        self.input.write(str(text), interval)
+        self.record_latency('keystroke', start, len(str(text)))
         self.logger.info(f"✍️ Texto escrito: {text}")
 
+        start = time.perf_counter()
         if press_enter:
-            pyautogui.press('enter')
-            time.sleep(0.5)
+            before = self.capture()
+            self.input.press('enter')
+            self.wait_for_update(before)
+        self.record_latency('type', start)
 
     def press_key(self, key: str, times: int = 1):
         """
@@ -128,14 +696,19 @@ class SAPAutomation:
         """
         if self.simulation_mode:
             self.logger.info(f"🎭 [SIMULACIÓN] Presionando tecla: {key} x{times}")
+            self.simulate('key', times)
             return
 
+        start = time.perf_counter()
+        before = self.capture()
         for _ in range(times):
-            pyautogui.press(key)
-            time.sleep(0.2)
+            self.input.press(key)
+        self.wait_for_update(before)
+        self.record_latency('key', start, times)
 
         self.logger.debug(f"⌨️ Tecla presionada: {key} x{times}")
 
+    @traced('navigate_to_sales_order')
     def navigate_to_sales_order(self) -> bool:
         """
         Navegar al formulario de Orden de Venta en SAP.
@@ -154,23 +727,105 @@ class SAPAutomation:
         if not self.find_and_click("navegacion/menu_modulos.png", confidence=self.confidence, timeout=self.timeout):
             self.logger.error("❌ No se pudo abrir menú Módulos")
             return False
-        time.sleep(1.5)
 
-        # 2. Click en Ventas
+        # 2. Click en Ventas (find_and_click espera a que el menú lo muestre)
         if not self.find_and_click("navegacion/menu_ventas.png", confidence=self.confidence, timeout=self.timeout):
             self.logger.error("❌ No se pudo abrir menú Ventas")
             return False
-        time.sleep(1.5)
 
         # 3. Click en Orden de Venta (confidence más alto para evitar confusión con "Oferta de Ventas")
-        if not self.find_and_click("navegacion/boton_orden_venta.png", confidence=0.85, timeout=self.timeout):
+        # y esperar que cargue el formulario
+        if not self.find_and_click("navegacion/boton_orden_venta.png", confidence=0.85,
+                                   timeout=self.timeout, wait_update=True):
             self.logger.error("❌ No se pudo abrir Orden de Venta")
             return False
-        time.sleep(2)  # Esperar que cargue el formulario
 
         self.logger.info("✅ Formulario de Orden de Venta abierto")
         return True
 
+    def is_form_open(self) -> bool:
+        """
+        Verificar que el formulario de Orden de Venta sigue en pantalla.
+
+        En simulación se confía en el estado registrado: cualquier fallo
+        previo ya lo invalidó. Fuera de simulación el modo lote exige
+        form_image (ver __init__), así que siempre se verifica en pantalla.
+
+        Returns:
+            bool: True si el formulario está abierto
+        """
+        if not self.form_open:
+            return False
+        if self.simulation_mode:
+            return True
+
+        template = self.templates.get(self.form_image) if self.form_image else None
+        if template is None:
+            return False
+        try:
+            return self.locate_any([(template, self.confidence)]) is not None
+        except Exception as e:
+            self.logger.debug(f"Error verificando formulario: {e}")
+            return False
+
+    def ensure_sales_order_form(self) -> bool:
+        """
+        Dejar el formulario de Orden de Venta listo para una orden nueva.
+
+        En modo lote reutiliza el formulario abierto por la orden anterior
+        y solo navega por el menú si la verificación muestra que ya no
+        está en pantalla.
+
+        Returns:
+            bool: True si el formulario está listo
+        """
+        if self.batch_mode and self.is_form_open():
+            self.logger.info("♻️ Reutilizando formulario de Orden de Venta abierto")
+            return True
+
+        self.form_open = False
+        if not self.navigate_to_sales_order():
+            return False
+        self.form_open = self.batch_mode
+        return True
+
+    @traced('reset_form')
+    def reset_form(self) -> bool:
+        """
+        Volver el formulario a modo "Agregar" para la siguiente orden.
+
+        Returns:
+            bool: True si el formulario quedó listo
+        """
+        if self.simulation_mode:
+            self.logger.info("🎭 [SIMULACIÓN] Formulario en modo Agregar")
+            self.simulate('reset')
+            return True
+
+        # Ctrl+A: modo Agregar en SAP Business One (formulario en blanco)
+        before = self.capture()
+        start = time.perf_counter()
+        self.input.hotkey('ctrl', 'a')
+        if not self.wait_for_update(before):
+            self.logger.warning("⚠️ El formulario no volvió a modo Agregar")
+            return False
+        self.record_latency('reset', start)
+
+        self.logger.info("✅ Formulario listo para la siguiente orden")
+        return True
+
+    def end_batch(self, close: bool = True):
+        """
+        Terminar el modo lote.
+
+        Args:
+            close: Cerrar el formulario si quedó abierto. Con False solo se
+                olvida (ej. cuando la ventana de SAP se reconfiguró)
+        """
+        if self.form_open and close:
+            self.close_order_window()
+        self.form_open = False
+
     def fill_customer(self, nit: str, nombre: str) -> bool:
         """
         Rellenar campo de cliente con NIT.
@@ -187,23 +842,24 @@ class SAPAutomation:
         # En modo simulación, solo simular
         if self.simulation_mode:
             self.logger.info(f"🎭 [SIMULACIÓN] Cliente: {nit}")
-            time.sleep(0.5)
+            self.simulate('type')
+            self.simulate('keystroke', len(str(nit)))
             return True
 
         # TODO: Implementar búsqueda de campo cliente
         # Por ahora, asumir que el campo está activo
         self.type_text(nit, press_enter=True)
-        time.sleep(1)
 
         self.logger.info(f"✅ Cliente {nit} seleccionado")
         return True
 
-    def fill_order_header(self, order_data: Dict[str, Any]) -> bool:
+    @traced('fill_order_header')
+    def fill_order_header(self, order: Order) -> bool:
         """
         Rellenar encabezado de la orden.
 
         Args:
-            order_data: Diccionario con datos de la orden
+            order: Orden a ingresar
 
         Returns:
             bool: True si se rellenó exitosamente
@@ -211,12 +867,12 @@ class SAPAutomation:
         self.logger.info("📝 Rellenando encabezado de orden...")
 
         # Cliente (NIT)
-        comprador = order_data.get('comprador', {})
-        if not self.fill_customer(comprador.get('nit'), comprador.get('nombre')):
+        comprador = order.comprador
+        if not self.fill_customer(comprador.nit, comprador.nombre):
             return False
 
         # Fecha de documento
-        fecha_doc = order_data.get('fecha_documento')
+        fecha_doc = order.fecha_documento
         if fecha_doc:
             self.logger.info(f"📅 Fecha documento: {fecha_doc}")
             # TODO: Implementar llenado de fecha si es necesario
@@ -225,7 +881,7 @@ class SAPAutomation:
                 pass
 
         # Fecha de entrega
-        fecha_entrega = order_data.get('fecha_entrega')
+        fecha_entrega = order.fecha_entrega
         if fecha_entrega:
             self.logger.info(f"📅 Fecha entrega: {fecha_entrega}")
             # TODO: Implementar llenado de fecha de entrega
@@ -233,27 +889,26 @@ class SAPAutomation:
         self.logger.info("✅ Encabezado rellenado")
         return True
 
-    def add_item(self, item: Dict[str, Any], item_number: int) -> bool:
+    @traced('add_item')
+    def add_item(self, item: OrderItem, item_number: int) -> bool:
         """
         Agregar un item a la orden.
 
         Args:
-            item: Diccionario con datos del item
+            item: Item de la orden
             item_number: Número de item (para logging)
 
         Returns:
             bool: True si se agregó exitosamente
         """
-        codigo = item.get('codigo')
-        descripcion = item.get('descripcion')
-        cantidad = item.get('cantidad')
-        precio = item.get('precio_unitario')
+        codigo = item.codigo
+        cantidad = item.cantidad
 
         self.logger.info(f"➕ Item {item_number}: {codigo} - Cant: {cantidad}")
 
         if self.simulation_mode:
             self.logger.info(f"🎭 [SIMULACIÓN] Item: {codigo} x {cantidad}")
-            time.sleep(0.5)
+            self.simulate('item')
             return True
 
         # TODO: Implementar lógica real de agregar item
@@ -265,14 +920,160 @@ class SAPAutomation:
         # 6. Confirmar item
 
         # Por ahora, simulación simple
+        start = time.perf_counter()
         self.type_text(codigo, press_enter=True)
-        time.sleep(0.5)
         self.type_text(str(cantidad), press_enter=True)
-        time.sleep(0.5)
+        self.record_latency('item', start)
 
         self.logger.info(f"✅ Item {item_number} agregado")
         return True
 
+    def add_items(self, items: Iterable[OrderItem]) -> bool:
+        """
+        Agregar todos los items de la orden.
+
+        Con bulk_paste, los items se pegan en la tabla en bloques de
+        paste_chunk_size desde el portapapeles y se cuentan las filas que
+        llegaron. Las filas que faltan se escriben una a una con add_item,
+        que también es el camino sin portapapeles. Si no se puede verificar
+        qué filas llegaron, la orden se aborta en lugar de escribir sobre
+        un pegado parcial (duplicaría líneas). El portapapeles del usuario
+        se restaura al terminar.
+
+        Args:
+            items: Items en orden (puede ser un generador)
+
+        Returns:
+            bool: True si se agregaron todos
+        """
+        if not self.bulk_paste or (pyperclip is None and not self.simulation_mode):
+            return self._type_items(items, 1)
+
+        previous = self._read_clipboard()
+        try:
+            iterator = iter(items)
+            number = 1
+            while True:
+                chunk = list(islice(iterator, self.paste_chunk_size))
+                if not chunk:
+                    return True
+
+                landed = self.paste_items(chunk)
+                if landed is None:
+                    # Sin portapapeles: este bloque y los siguientes se escriben
+                    return (self._type_items(chunk, number)
+                            and self._type_items(iterator, number + len(chunk)))
+                if landed == PASTE_UNVERIFIED:
+                    self.logger.error(f"❌ No se pudo verificar qué items {number}-{number + len(chunk) - 1} "
+                                      f"se pegaron, se aborta la orden para no duplicar líneas")
+                    return False
+                if landed > len(chunk):
+                    self.logger.error(f"❌ Se pegaron {landed} filas, se esperaban {len(chunk)}")
+                    return False
+                if landed < len(chunk):
+                    self.logger.warning(f"⚠️ Solo llegaron {landed} de {len(chunk)} filas, "
+                                        f"escribiendo las restantes")
+                    if not self._type_items(chunk[landed:], number + landed):
+                        return False
+                number += len(chunk)
+        finally:
+            if previous is not None:
+                self._write_clipboard(previous)
+
+    def _type_items(self, items: Iterable[OrderItem], first_number: int) -> bool:
+        for idx, item in enumerate(items, first_number):
+            if not self.add_item(item, idx):
+                self.logger.error(f"❌ Fallo agregando item {idx}: {item.codigo}")
+                return False
+        return True
+
+    def _read_clipboard(self) -> Optional[str]:
+        if self.simulation_mode:
+            return None
+        try:
+            return pyperclip.paste()
+        except Exception as e:
+            self.logger.debug(f"Error leyendo portapapeles: {e}")
+            return None
+
+    def _write_clipboard(self, text: str) -> bool:
+        try:
+            pyperclip.copy(text)
+            return True
+        except Exception as e:
+            self.logger.warning(f"⚠️ Portapapeles no disponible: {e}")
+            return False
+
+    @traced('paste_items')
+    def paste_items(self, items: Sequence[OrderItem]) -> Optional[int]:
+        """
+        Pegar un bloque de items en la tabla de la orden.
+
+        Supone, como add_item, que la celda activa es la primera columna de
+        la primera fila vacía de la tabla.
+
+        Args:
+            items: Items del bloque
+
+        Returns:
+            Optional[int]: Filas que llegaron a la tabla, PASTE_UNVERIFIED
+            si se pegó pero no se pueden contar, o None si no se pudo usar
+            el portapapeles y no se pegó nada
+        """
+        self.logger.info(f"📋 Pegando {len(items)} items")
+        if self.simulation_mode:
+            self.logger.info(f"🎭 [SIMULACIÓN] {len(items)} items pegados")
+            self.simulate('paste')
+            return len(items)
+
+        if not self._write_clipboard(items_to_clipboard_text(items, self.paste_columns)):
+            return None
+        start = time.perf_counter()
+        self.input.hotkey('ctrl', 'v')
+        # SAP completa descripción y precios fila por fila antes de quedar quieto
+        self.wait_for_stable(timeout=max(self.timeout, self.save_timeout))
+        self.record_latency('paste', start)
+
+        rows = self.count_pasted_rows(items)
+        if rows is None:
+            self.logger.warning("⚠️ No se pudieron contar las filas pegadas")
+            return PASTE_UNVERIFIED
+        self.logger.info(f"✅ {rows} filas pegadas")
+        return rows
+
+    def count_pasted_rows(self, items: Sequence[OrderItem]) -> Optional[int]:
+        """
+        Contar las filas recién pegadas copiándolas de vuelta.
+
+        Tras pegar, la tabla deja seleccionadas las filas pegadas; con
+        grid_copy_keys se copian al portapapeles y se comparan con los
+        items (ver count_copied_rows). Un texto centinela distingue "no
+        copió nada".
+
+        Args:
+            items: Items del bloque pegado
+
+        Returns:
+            Optional[int]: Filas en la tabla, o None si no se pueden contar
+        """
+        if not self.grid_copy_keys:
+            return None
+
+        sentinel = f"orderloader-{time.monotonic_ns()}"
+        if not self._write_clipboard(sentinel):
+            return None
+        self.input.hotkey(*self.grid_copy_keys)
+
+        def copied() -> Optional[str]:
+            text = pyperclip.paste()
+            return text if text != sentinel else None
+
+        text = self.wait_until(copied, 2, "la copia de las filas pegadas")
+        if text is None:
+            return None
+        return count_copied_rows(text, items, self.paste_columns)
+
+    @traced('save_order')
     def save_order(self, order_number: str) -> bool:
         """
         Guardar la orden en SAP.
@@ -287,13 +1088,18 @@ class SAPAutomation:
 
         if self.simulation_mode:
             self.logger.info(f"🎭 [SIMULACIÓN] Orden {order_number} guardada")
-            time.sleep(1)
+            self.simulate('save')
             return True
 
         # TODO: Implementar guardado real
         # Generalmente: Ctrl+S o botón "Actualizar"/"Agregar"
-        pyautogui.hotkey('ctrl', 's')
-        time.sleep(2)
+        before = self.capture()
+        start = time.perf_counter()
+        self.input.hotkey('ctrl', 's')
+        if not self.wait_for_update(before, timeout=self.save_timeout):
+            self.logger.error(f"❌ SAP no respondió al guardar la orden {order_number}")
+            return False
+        self.record_latency('save', start)
 
         # TODO: Verificar confirmación de guardado
         # Buscar mensaje de éxito o ventana de confirmación
@@ -301,6 +1107,7 @@ class SAPAutomation:
         self.logger.info(f"✅ Orden {order_number} guardada exitosamente")
         return True
 
+    @traced('close_order_window')
     def close_order_window(self) -> bool:
         """
         Cerrar ventana de orden actual.
@@ -310,17 +1117,23 @@ class SAPAutomation:
         """
         if self.simulation_mode:
             self.logger.info("🎭 [SIMULACIÓN] Cerrando ventana de orden")
-            time.sleep(0.3)
+            self.simulate('close')
             return True
 
         # Ctrl+W o Esc para cerrar
-        pyautogui.hotkey('ctrl', 'w')
-        time.sleep(0.5)
+        before = self.capture()
+        start = time.perf_counter()
+        self.input.hotkey('ctrl', 'w')
+        if not self.wait_for_update(before):
+            self.logger.warning("⚠️ La ventana de orden no se cerró")
+            return False
+        self.record_latency('close', start)
 
         self.logger.info("✅ Ventana de orden cerrada")
         return True
 
-    def process_order(self, order_data: Dict[str, Any]) -> bool:
+    @traced('process_order')
+    def process_order(self, order: Order) -> bool:
         """
         Procesar una orden completa en SAP.
 
@@ -331,41 +1144,54 @@ class SAPAutomation:
         4. Guardar orden
         5. Cerrar ventana
 
+        En modo lote (batch_mode) el paso 1 reutiliza el formulario de la
+        orden anterior y el paso 5 lo deja en modo Agregar en lugar de
+        cerrarlo. Si algo falla, la siguiente orden vuelve a navegar.
+
+        Los items se recorren una sola vez y en orden, así que también acepta
+        una order_stream.StreamingOrder, cuyos items se leen del archivo a
+        medida que se ingresan.
+
         Args:
-            order_data: Diccionario completo con datos de la orden
+            order: Orden completa (ver order.Order)
 
         Returns:
             bool: True si la orden se procesó exitosamente
         """
-        orden_compra = order_data.get('orden_compra', 'N/A')
-        items = order_data.get('items', [])
+        orden_compra = order.orden_compra
+        items = order.items
 
-        self.logger.info(f"🎯 Procesando orden: {orden_compra} ({len(items)} items)")
+        item_count = order.item_count if order.item_count is not None else "?"
+        self.logger.info(f"🎯 Procesando orden: {orden_compra} ({item_count} items)")
 
         try:
             # 1. Navegar a Orden de Venta
-            if not self.navigate_to_sales_order():
+            if not self.ensure_sales_order_form():
                 self.logger.error("❌ Fallo en navegación")
                 return False
+            # Solo una orden completa deja el formulario reutilizable: si
+            # algo falla, la siguiente orden vuelve a navegar
+            self.form_open = False
 
             # 2. Rellenar encabezado
-            if not self.fill_order_header(order_data):
+            if not self.fill_order_header(order):
                 self.logger.error("❌ Fallo rellenando encabezado")
                 return False
 
             # 3. Agregar items
-            for idx, item in enumerate(items, 1):
-                if not self.add_item(item, idx):
-                    self.logger.error(f"❌ Fallo agregando item {idx}: {item.get('codigo')}")
-                    return False
+            if not self.add_items(items):
+                return False
 
             # 4. Guardar orden
             if not self.save_order(orden_compra):
                 self.logger.error("❌ Fallo guardando orden")
                 return False
 
-            # 5. Cerrar ventana
-            self.close_order_window()
+            # 5. Cerrar ventana (en modo lote, dejarla lista para la siguiente)
+            if self.batch_mode:
+                self.form_open = self.reset_form()
+            else:
+                self.close_order_window()
 
             self.logger.info(f"🎉 Orden {orden_compra} procesada exitosamente!")
             return True
@@ -388,7 +1214,7 @@ class SAPAutomation:
         try:
             timestamp = time.strftime("%Y%m%d_%H%M%S")
             screenshot_path = self.assets_path.parent.parent / f"debug_{name}_{timestamp}.png"
-            pyautogui.screenshot(str(screenshot_path))
+            self.screen.save(screenshot_path)
             self.logger.info(f"📸 Screenshot guardado: {screenshot_path}")
         except Exception as e:
             self.logger.warning(f"⚠️ Error guardando screenshot: {e}")
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Captura de Pantalla - OrderLoader
+Backends intercambiables para capturar la pantalla en escala de grises
+y para enviar la entrada (mouse y teclado)
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # Sin OpenCV las capturas son imágenes PIL en modo 'L'
+    cv2 = None
+    np = None
+
+try:
+    import mss
+except ImportError:  # Sin mss se captura con pyautogui
+    mss = None
+
+from vision import TEMPLATE_EXTENSIONS, to_gray
+
+Region = Tuple[int, int, int, int]
+
+# Backends que acepta create_capture
+CAPTURE_BACKENDS = ('auto', 'mss', 'pyautogui', 'fake', 'replay')
+
+
+def crop(frame: Any, region: Optional[Region]) -> Any:
+    """Recortar una región (x, y, width, height) de una captura en escala de grises"""
+    if region is None:
+        return frame
+    x, y, width, height = (int(v) for v in region)
+    if cv2 is None:
+        return frame.crop((x, y, x + width, y + height))
+    return frame[max(0, y):y + height, max(0, x):x + width]
+
+
+class ScreenInput:
+    """Interfaz de entrada usada por SAPAutomation (mismas firmas que pyautogui)"""
+
+    def click(self, point: Tuple[int, int]):
+        raise NotImplementedError
+
+    def write(self, text: str, interval: float = 0.0):
+        raise NotImplementedError
+
+    def press(self, key: str):
+        raise NotImplementedError
+
+    def hotkey(self, *keys: str):
+        raise NotImplementedError
+
+
+class PyAutoGUIInput(ScreenInput):
+    """Mouse y teclado reales con pyautogui"""
+
+    def __init__(self, pause: float = 0.5):
+        """
+        Args:
+            pause: Pausa de pyautogui después de cada acción
+        """
+        import pyautogui
+        pyautogui.FAILSAFE = True
+        pyautogui.PAUSE = pause
+        self.pyautogui = pyautogui
+
+    def click(self, point: Tuple[int, int]):
+        self.pyautogui.click(point)
+
+    def write(self, text: str, interval: float = 0.0):
+        self.pyautogui.write(text, interval=interval)
+
+    def press(self, key: str):
+        self.pyautogui.press(key)
+
+    def hotkey(self, *keys: str):
+        self.pyautogui.hotkey(*keys)
+
+
+class FakeInput(ScreenInput):
+    """Entrada que solo se anota en events, sin tocar mouse ni teclado (tests)"""
+
+    def __init__(self):
+        self.events: List[Tuple[Any, ...]] = []
+
+    def click(self, point: Tuple[int, int]):
+        self.events.append(('click',) + tuple(int(v) for v in point))
+
+    def write(self, text: str, interval: float = 0.0):
+        self.events.append(('write', text))
+
+    def press(self, key: str):
+        self.events.append(('press', key))
+
+    def hotkey(self, *keys: str):
+        self.events.append(('hotkey',) + keys)
+
+
+class ScreenCapture:
+    """
+    Interfaz de captura usada por SAPAutomation.
+
+    grab() devuelve la pantalla (o una región) en escala de grises: un
+    np.ndarray uint8 con OpenCV, o una imagen PIL en modo 'L' sin OpenCV,
+    que es lo que esperan vision.match_any y vision.frame_difference.
+    """
+
+    name = 'base'
+
+    def grab(self, region: Optional[Region] = None) -> Any:
+        """
+        Capturar en escala de grises.
+
+        Args:
+            region: Región (x, y, width, height) opcional
+
+        Returns:
+            Any: Captura en escala de grises
+        """
+        raise NotImplementedError
+
+    def size(self) -> Tuple[int, int]:
+        """Resolución (ancho, alto) de la pantalla capturada"""
+        raise NotImplementedError
+
+    def save(self, path: Path):
+        """Guardar la pantalla completa en color (capturas de debug)"""
+        raise NotImplementedError
+
+    def create_input(self, pause: float = 0.5) -> ScreenInput:
+        """
+        Entrada que corresponde a esta pantalla.
+
+        Args:
+            pause: Pausa después de cada acción (entrada real)
+
+        Returns:
+            ScreenInput: Mouse y teclado reales; los backends sin pantalla
+            real devuelven una entrada que no la toca
+        """
+        return PyAutoGUIInput(pause)
+
+    def close(self):
+        """Liberar recursos del backend"""
+
+
+class PyAutoGUICapture(ScreenCapture):
+    """Captura con pyautogui.screenshot (PIL): la ruta original"""
+
+    name = 'pyautogui'
+
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+
+    def grab(self, region: Optional[Region] = None) -> Any:
+        screenshot = self.pyautogui.screenshot(region=region)
+        return to_gray(screenshot) if cv2 is not None else screenshot.convert('L')
+
+    def size(self) -> Tuple[int, int]:
+        width, height = self.pyautogui.size()
+        return int(width), int(height)
+
+    def save(self, path: Path):
+        self.pyautogui.screenshot(str(path))
+
+
+class MSSCapture(ScreenCapture):
+    """
+    Captura con mss: copia solo la región pedida directamente a memoria.
+
+    En X11 usa XShmGetImage (memoria compartida MIT-SHM) y en Windows
+    BitBlt, sin pasar por PIL. El arreglo BGRA se convierte a grises con
+    OpenCV. La conexión de mss no se comparte entre hilos: cada hilo abre
+    la suya en su primera captura.
+    """
+
+    name = 'mss'
+
+    def __init__(self):
+        if mss is None:
+            raise ImportError("mss no está instalado")
+        self._local = threading.local()
+        self._opened: List[Any] = []
+        self._lock = threading.Lock()
+
+    def _session(self) -> Any:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            factory = getattr(mss, 'MSS', None) or mss.mss
+            session = factory()
+            self._local.session = session
+            with self._lock:
+                self._opened.append(session)
+        return session
+
+    def _monitor(self, region: Optional[Region]) -> dict:
+        if region is None:
+            return self._session().monitors[1]  # Pantalla principal, como pyautogui
+        x, y, width, height = (int(v) for v in region)
+        return {'left': x, 'top': y, 'width': width, 'height': height}
+
+    def grab(self, region: Optional[Region] = None) -> Any:
+        shot = self._session().grab(self._monitor(region))
+        if cv2 is None:
+            from PIL import Image
+            return Image.frombytes('RGB', shot.size, shot.rgb).convert('L')
+        return cv2.cvtColor(np.asarray(shot), cv2.COLOR_BGRA2GRAY)
+
+    def size(self) -> Tuple[int, int]:
+        monitor = self._session().monitors[1]
+        return int(monitor['width']), int(monitor['height'])
+
+    def save(self, path: Path):
+        from mss.tools import to_png
+        shot = self._session().grab(self._monitor(None))
+        to_png(shot.rgb, shot.size, output=str(path))
+
+    def close(self):
+        with self._lock:
+            sessions, self._opened = self._opened, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
+
+class FakeCapture(ScreenCapture):
+    """
+    Pantalla en memoria que sirve cuadros desde archivos o arreglos.
+
+    Para tests y benchmarks sin display: cada cuadro se entrega durante
+    repeat capturas y después pasa al siguiente; el último se mantiene.
+    show() salta a un cuadro concreto. La entrada es un FakeInput.
+    """
+
+    name = 'fake'
+
+    def __init__(self, frames: Iterable[Any], repeat: int = 1):
+        """
+        Args:
+            frames: Rutas de imagen, arreglos o imágenes PIL (color o grises)
+            repeat: Capturas que dura cada cuadro
+        """
+        self.frames = [self._load(frame) for frame in frames]
+        if not self.frames:
+            raise ValueError("FakeCapture necesita al menos un cuadro")
+        self.repeat = max(1, repeat)
+        self.index = 0
+        self.grabs = 0  # Capturas servidas en total
+        self._served = 0  # Capturas servidas del cuadro actual
+
+    @classmethod
+    def from_directory(cls, path: Path, repeat: int = 1) -> 'FakeCapture':
+        """Cuadros tomados de las imágenes de un directorio, en orden de nombre"""
+        files = sorted(p for p in Path(path).iterdir() if p.suffix.lower() in TEMPLATE_EXTENSIONS)
+        return cls(files, repeat)
+
+    @staticmethod
+    def _load(frame: Any) -> Any:
+        if isinstance(frame, (str, Path)):
+            if cv2 is not None:
+                image = cv2.imread(str(frame), cv2.IMREAD_GRAYSCALE)
+                if image is None:
+                    raise ValueError(f"No se pudo leer el cuadro {frame}")
+                return image
+            from PIL import Image
+            return Image.open(frame).convert('L')
+        if cv2 is not None:
+            return to_gray(frame)
+        return frame.convert('L')
+
+    def show(self, index: int):
+        """Servir el cuadro index desde la siguiente captura"""
+        self.index = min(max(0, index), len(self.frames) - 1)
+        self._served = 0
+
+    def grab(self, region: Optional[Region] = None) -> Any:
+        frame = self.frames[self.index]
+        self.grabs += 1
+        self._served += 1
+        if self._served >= self.repeat and self.index < len(self.frames) - 1:
+            self.index += 1
+            self._served = 0
+        return crop(frame, region)
+
+    def size(self) -> Tuple[int, int]:
+        frame = self.frames[self.index]
+        if cv2 is None:
+            return frame.size
+        return frame.shape[1], frame.shape[0]
+
+    def save(self, path: Path):
+        frame = self.frames[self.index]
+        if cv2 is None:
+            frame.save(str(path))
+        else:
+            cv2.imwrite(str(path), frame)
+
+    def create_input(self, pause: float = 0.5) -> ScreenInput:
+        return FakeInput()
+
+
+def create_capture(backend: Union[str, ScreenCapture] = 'auto',
+                   frames: Optional[Union[Sequence[Any], str, Path]] = None,
+                   logger: Optional[logging.Logger] = None,
+                   record: Optional[Path] = None) -> ScreenCapture:
+    """
+    Crear un backend de captura.
+
+    Args:
+        backend: 'auto' (mss si está instalado, si no pyautogui), 'mss',
+            'pyautogui', 'fake', 'replay' o un ScreenCapture ya creado
+        frames: Cuadros (o un directorio) para 'fake', o el archivo de
+            grabación para 'replay'
+        logger: Logger para avisos
+        record: Grabar las capturas y la entrada en este archivo (ver
+            recording.RecordingCapture)
+
+    Returns:
+        ScreenCapture: El backend pedido; 'mss' sin mss instalado usa
+        pyautogui con un aviso
+    """
+    logger = logger or logging.getLogger(__name__)
+    if isinstance(backend, ScreenCapture):
+        capture = backend
+    elif backend not in CAPTURE_BACKENDS:
+        raise ValueError(f"Backend de captura desconocido: {backend} (opciones: {', '.join(CAPTURE_BACKENDS)})")
+    elif backend in ('fake', 'replay') and frames is None:
+        raise ValueError(f"El backend '{backend}' necesita frames")
+    elif backend == 'fake':
+        capture = FakeCapture.from_directory(Path(frames)) if isinstance(frames, (str, Path)) else FakeCapture(frames)
+    elif backend == 'replay':
+        from recording import ReplayCapture
+        capture = ReplayCapture(Path(frames))
+    elif backend in ('auto', 'mss') and mss is not None:
+        capture = MSSCapture()
+    else:
+        if backend == 'mss':
+            logger.warning("⚠️ mss no está instalado, capturando con pyautogui")
+        capture = PyAutoGUICapture()
+
+    if record is not None:
+        from recording import RecordingCapture
+        capture = RecordingCapture(capture, Path(record))
+        logger.info(f"⏺️ Grabando capturas y entrada en {record}")
+    return capture
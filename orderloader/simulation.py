@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simulación de Capacidad - OrderLoader
+Simulación de eventos discretos con reloj virtual: recorre cargas
+sintéticas grandes con el flujo real de SAPAutomation en segundos y
+proyecta órdenes/hora, esperas en cola y utilización por carril
+
+Uso:
+    py simulation.py --orders 2000 --hours 8 --lanes 1 2 3
+    py simulation.py --orders 2000 --backlog --fit metrics.json
+"""
+
+import sys
+import json
+import math
+import heapq
+import random
+import logging
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import *
+from calibrate_timing import percentile
+from order import Order
+
+# Acciones con duración propia en modo simulación
+SIMULATED_PRIMITIVES = (
+    'click',      # Buscar una imagen y hacer clic (navegación por el menú)
+    'type',       # Escribir un campo: Enter y espera, sin contar las teclas
+    'keystroke',  # Cada carácter escrito
+    'key',        # Tecla suelta y espera
+    'item',       # Ingresar un item tecla por tecla
+    'paste',      # Pegar un bloque de items
+    'save',       # Guardar la orden
+    'close',      # Cerrar el formulario
+    'reset',      # Dejar el formulario en modo Agregar (modo lote)
+)
+
+# Tiempos fijos que usaba el modo simulación (segundos)
+LEGACY_LATENCIES = {
+    'click': 0.5,
+    'type': 0.3,
+    'keystroke': 0.0,
+    'key': 0.0,
+    'item': 0.5,
+    'paste': 0.5,
+    'save': 1.0,
+    'close': 0.3,
+    'reset': 0.3,
+}
+
+LATENCY_KINDS = ('constant', 'normal', 'lognormal', 'empirical')
+
+
+class Latency:
+    """
+    Distribución de la duración de una acción.
+
+    - constant: siempre mean
+    - normal: media mean y desviación stdev, truncada en 0
+    - lognormal: sesgada a la derecha como los tiempos reales de SAP, con
+      media mean y desviación stdev
+    - empirical: se remuestrea de values (duraciones medidas)
+    """
+
+    __slots__ = ('kind', 'mean', 'stdev', 'values', '_mu', '_sigma')
+
+    def __init__(self, kind: str = 'constant', mean: float = 0.0, stdev: float = 0.0,
+                 values: Optional[Sequence[float]] = None):
+        if kind not in LATENCY_KINDS:
+            raise ValueError(f"Distribución desconocida: {kind} (opciones: {', '.join(LATENCY_KINDS)})")
+        if kind == 'empirical' and not values:
+            raise ValueError("La distribución empirical necesita values")
+        self.kind = kind
+        self.values = tuple(float(v) for v in values) if values else ()
+        self.mean = statistics.fmean(self.values) if kind == 'empirical' else float(mean)
+        self.stdev = float(stdev)
+        self._mu = self._sigma = 0.0
+        if kind == 'lognormal' and self.mean > 0:
+            self._sigma = math.sqrt(math.log(1 + (self.stdev / self.mean) ** 2))
+            self._mu = math.log(self.mean) - self._sigma ** 2 / 2
+
+    def sample(self, rng: random.Random) -> float:
+        """Una duración en segundos"""
+        if self.kind == 'constant':
+            return self.mean
+        if self.kind == 'empirical':
+            return rng.choice(self.values)
+        if self.mean <= 0:
+            return 0.0
+        if self.kind == 'normal':
+            return max(0.0, rng.gauss(self.mean, self.stdev))
+        return rng.lognormvariate(self._mu, self._sigma)
+
+    def total(self, rng: random.Random, count: int) -> float:
+        """Suma de count duraciones"""
+        if self.kind == 'constant':
+            return self.mean * count
+        return sum(self.sample(rng) for _ in range(count))
+
+    @classmethod
+    def from_spec(cls, spec: Any) -> 'Latency':
+        """
+        Construir desde la configuración.
+
+        Args:
+            spec: Número (constante) o dict con kind, mean, stdev y values
+        """
+        if isinstance(spec, (int, float)) and not isinstance(spec, bool):
+            return cls('constant', spec)
+        if not isinstance(spec, dict):
+            raise ValueError(f"Latencia inválida: {spec!r}")
+        return cls(spec.get('kind', 'constant'), spec.get('mean', 0.0), spec.get('stdev', 0.0),
+                   spec.get('values'))
+
+    def to_spec(self) -> Any:
+        """Inverso de from_spec"""
+        if self.kind == 'constant':
+            return round(self.mean, 4)
+        if self.kind == 'empirical':
+            return {'kind': self.kind, 'values': [round(v, 4) for v in self.values]}
+        return {'kind': self.kind, 'mean': round(self.mean, 4), 'stdev': round(self.stdev, 4)}
+
+    @classmethod
+    def fit(cls, values: Sequence[float], kind: str = 'lognormal') -> 'Latency':
+        """
+        Ajustar una distribución a duraciones medidas.
+
+        Args:
+            values: Duraciones en segundos
+            kind: 'lognormal' o 'normal' (por momentos) o 'empirical'
+
+        Returns:
+            Latency: Distribución ajustada (constante si no hay variación)
+        """
+        if kind == 'empirical':
+            return cls('empirical', values=values)
+        mean = statistics.fmean(values)
+        stdev = statistics.pstdev(values) if len(values) > 1 else 0.0
+        if stdev == 0:
+            return cls('constant', mean)
+        return cls(kind, mean, stdev)
+
+    def __repr__(self) -> str:
+        return f"Latency({self.kind!r}, mean={self.mean:.3f}, stdev={self.stdev:.3f})"
+
+
+class LatencyModel:
+    """Duración de cada acción simulada, con su propio generador aleatorio"""
+
+    def __init__(self, latencies: Dict[str, Latency], seed: Optional[int] = None):
+        self.latencies = dict(latencies)
+        self.random = random.Random(seed)
+
+    def sample(self, primitive: str, count: int = 1) -> float:
+        """
+        Duración de count repeticiones de una acción.
+
+        Las acciones sin distribución no tardan nada.
+        """
+        latency = self.latencies.get(primitive)
+        if latency is None or count <= 0:
+            return 0.0
+        return latency.total(self.random, count)
+
+    @classmethod
+    def legacy(cls) -> 'LatencyModel':
+        """Tiempos fijos del modo simulación original"""
+        return cls.from_config(LEGACY_LATENCIES)
+
+    @classmethod
+    def from_config(cls, spec: Dict[str, Any], base: Optional['LatencyModel'] = None,
+                    seed: Optional[int] = None) -> 'LatencyModel':
+        """
+        Construir desde un dict acción -> latencia (ver Latency.from_spec).
+
+        Las acciones que falten se toman de base.
+        """
+        latencies = dict(base.latencies) if base else {}
+        for primitive, value in spec.items():
+            if primitive not in SIMULATED_PRIMITIVES:
+                raise ValueError(f"Acción simulada desconocida: {primitive}")
+            latencies[primitive] = Latency.from_spec(value)
+        return cls(latencies, seed)
+
+    def to_config(self) -> Dict[str, Any]:
+        """Inverso de from_config"""
+        return {primitive: latency.to_spec() for primitive, latency in self.latencies.items()}
+
+    @classmethod
+    def fit(cls, samples: Dict[str, Sequence[float]], base: Optional['LatencyModel'] = None,
+            kind: str = 'lognormal', min_samples: int = 5,
+            seed: Optional[int] = None) -> 'LatencyModel':
+        """
+        Ajustar el modelo a duraciones reales por acción.
+
+        Args:
+            samples: Duraciones por acción (ver load_latency_samples)
+            base: Modelo para las acciones sin suficientes muestras
+            kind: Distribución a ajustar (ver Latency.fit)
+            min_samples: Muestras mínimas para ajustar una acción
+            seed: Semilla del generador aleatorio
+
+        Returns:
+            LatencyModel: Modelo ajustado
+        """
+        latencies = dict(base.latencies) if base else {}
+        for primitive, values in samples.items():
+            if primitive in SIMULATED_PRIMITIVES and len(values) >= min_samples:
+                latencies[primitive] = Latency.fit(values, kind)
+        return cls(latencies, seed)
+
+
+def load_latency_samples(path: Path) -> Dict[str, List[float]]:
+    """
+    Duraciones reales por acción guardadas en metrics.json.
+
+    SAPAutomation las mide en modo real y MetricsCollector las guarda en
+    la clave 'latencies' al terminar la sesión.
+
+    Returns:
+        Dict[str, List[float]]: Duraciones por acción (vacío si no hay)
+    """
+    data = json.loads(Path(path).read_text(encoding='utf-8'))
+    latencies = data.get('latencies') if isinstance(data, dict) else None
+    if not isinstance(latencies, dict):
+        return {}
+    return {primitive: [float(v) for v in values]
+            for primitive, values in latencies.items() if isinstance(values, list)}
+
+
+class VirtualClock:
+    """Reloj de la simulación: sleep() avanza el tiempo sin esperar"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def sleep(self, seconds: float):
+        self.now += max(0.0, seconds)
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def synthetic_order_data(rng: random.Random, number: int, items_mean: float = 20.0,
+                         items_max: int = 500, text_length: int = 24) -> Dict[str, Any]:
+    """
+    Orden sintética con el formato JSON de data/pending.
+
+    Args:
+        rng: Generador aleatorio
+        number: Número de la orden (para orden_compra)
+        items_mean: Items promedio. El número de items sigue una
+            distribución geométrica (muchas órdenes chicas, pocas grandes)
+        items_max: Máximo de items por orden
+        text_length: Largo promedio de descripciones y nombres (entre la
+            mitad y una vez y media)
+
+    Returns:
+        Dict[str, Any]: Orden válida según ORDER_SCHEMA
+    """
+    def text(prefix: str) -> str:
+        length = rng.randint(max(1, text_length // 2), max(1, text_length * 3 // 2))
+        return (prefix + ' ' + ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ ') for _ in range(length)))[:length]
+
+    count = 1
+    if items_mean > 1:
+        count += int(math.log(1 - rng.random()) / math.log(1 - 1 / items_mean))
+    count = min(count, items_max)
+    items = []
+    for _ in range(count):
+        cantidad = rng.randint(1, 500)
+        precio = round(rng.uniform(1000, 90000), 2)
+        items.append({
+            "codigo": f"PT{rng.randrange(10 ** 6):06d}",
+            "descripcion": text("PRODUCTO"),
+            "cantidad": cantidad,
+            "precio_unitario": precio,
+            "precio_total": round(cantidad * precio, 2),
+            "fecha_entrega": "15/01/2026",
+        })
+    return {
+        "orden_compra": f"SIM{number:06d}",
+        "fecha_documento": "01/01/2026",
+        "fecha_entrega": "15/01/2026",
+        "comprador": {"nit": str(rng.randrange(800000000, 999999999)), "nombre": text("CLIENTE")},
+        "items": items,
+        "valor_total": round(sum(item["precio_total"] for item in items), 2),
+    }
+
+
+def synthetic_order(rng: random.Random, number: int, items_mean: float = 20.0,
+                    items_max: int = 500) -> Order:
+    """Orden sintética ya construida (ver synthetic_order_data)"""
+    return Order.from_dict(synthetic_order_data(rng, number, items_mean, items_max))
+
+
+def synthetic_workload(orders: int, hours: float = 8.0, items_mean: float = 20.0,
+                       items_max: int = 500, backlog: bool = False,
+                       seed: Optional[int] = None) -> List[Tuple[float, Order]]:
+    """
+    Carga sintética: órdenes con su momento de llegada.
+
+    Args:
+        orders: Número de órdenes
+        hours: Ventana de llegada (llegadas de Poisson a ritmo constante)
+        items_mean: Items promedio por orden
+        items_max: Máximo de items por orden
+        backlog: Todas las órdenes ya están en cola al empezar
+        seed: Semilla
+
+    Returns:
+        List[Tuple[float, Order]]: (segundo de llegada, orden) en orden de llegada
+    """
+    rng = random.Random(seed)
+    rate = orders / (hours * 3600) if hours > 0 else 0
+    arrival = 0.0
+    workload = []
+    for number in range(1, orders + 1):
+        if not backlog and rate > 0:
+            arrival += rng.expovariate(rate)
+        workload.append((arrival, synthetic_order(rng, number, items_mean, items_max)))
+    return workload
+
+
+class SimulationReport:
+    """Resultado de una simulación"""
+
+    def __init__(self, lanes: int, waits: List[float], services: List[float],
+                 busy: List[float], failed: int, makespan: float):
+        self.lanes = lanes
+        self.waits = waits
+        self.services = services
+        self.busy = busy
+        self.failed = failed
+        self.makespan = makespan
+
+    @property
+    def orders(self) -> int:
+        return len(self.services)
+
+    @property
+    def orders_per_hour(self) -> float:
+        return (self.orders - self.failed) * 3600 / self.makespan if self.makespan else 0.0
+
+    @property
+    def utilization(self) -> List[float]:
+        """Fracción del tiempo que cada carril estuvo ocupado"""
+        return [busy / self.makespan if self.makespan else 0.0 for busy in self.busy]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'lanes': self.lanes,
+            'orders': self.orders,
+            'failed': self.failed,
+            'makespan_hours': round(self.makespan / 3600, 3),
+            'orders_per_hour': round(self.orders_per_hour, 1),
+            'service_mean': round(statistics.fmean(self.services), 3) if self.services else 0.0,
+            'wait_mean': round(statistics.fmean(self.waits), 3) if self.waits else 0.0,
+            'wait_p95': round(percentile(self.waits, 0.95), 3) if self.waits else 0.0,
+            'wait_max': round(max(self.waits, default=0.0), 3),
+            'utilization': [round(u, 3) for u in self.utilization],
+        }
+
+
+def simulate(workload: Iterable[Tuple[float, Order]], lanes: int = 1,
+             model: Optional[LatencyModel] = None, batch_mode: bool = True,
+             bulk_paste: bool = True, paste_chunk_size: int = 100,
+             logger: Optional[logging.Logger] = None) -> SimulationReport:
+    """
+    Simular el procesamiento de una carga en uno o más carriles.
+
+    Cada carril es un SAPAutomation en modo simulación con su propio
+    VirtualClock, así que el flujo (navegación, modo lote, pegado en
+    bloques) es el mismo que en producción. Cada orden va al primer carril
+    libre en orden de llegada (cola FIFO compartida, como LaneScheduler);
+    los eventos "carril libre" se ordenan en un heap por tiempo virtual.
+
+    Args:
+        workload: (segundo de llegada, orden) en orden de llegada
+        lanes: Número de carriles (sesiones SAP)
+        model: Duración de las acciones (por defecto SIMULATION_CONFIG)
+        batch_mode: Ver SAPAutomation
+        bulk_paste: Ver SAPAutomation
+        paste_chunk_size: Ver SAPAutomation
+        logger: Logger de los carriles (por defecto uno silencioso)
+
+    Returns:
+        SimulationReport: Esperas, duraciones y utilización
+    """
+    from sap_automation import SAPAutomation
+
+    if model is None:
+        model = LatencyModel.from_config(SIMULATION_CONFIG['latencies'], seed=SIMULATION_CONFIG['seed'])
+    if logger is None:
+        logger = logging.getLogger("orderloader.simulation")
+        logger.setLevel(logging.WARNING)
+
+    clocks = [VirtualClock() for _ in range(lanes)]
+    automations = [
+        SAPAutomation(logger, PROJECT_ROOT / "assets" / "images" / "sap", simulation_mode=True,
+                      batch_mode=batch_mode, bulk_paste=bulk_paste, paste_chunk_size=paste_chunk_size,
+                      latencies=model, clock=clock)
+        for clock in clocks
+    ]
+    free_at = [(0.0, lane) for lane in range(lanes)]
+    busy = [0.0] * lanes
+    waits, services = [], []
+    failed = 0
+    first_arrival = None
+    end = 0.0
+
+    for arrival, order in workload:
+        if first_arrival is None:
+            first_arrival = arrival
+        available, lane = heapq.heappop(free_at)
+        start = max(arrival, available)
+        clocks[lane].now = start
+        if not automations[lane].process_order(order):
+            failed += 1
+        finish = clocks[lane].now
+        waits.append(start - arrival)
+        services.append(finish - start)
+        busy[lane] += finish - start
+        end = max(end, finish)
+        heapq.heappush(free_at, (finish, lane))
+
+    for automation, clock in zip(automations, clocks):
+        automation.end_batch()
+        end = max(end, clock.now)
+    return SimulationReport(lanes, waits, services, busy, failed, end - (first_arrival or 0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación de capacidad con reloj virtual")
+    parser.add_argument('--orders', type=int, default=2000, help="Órdenes de la carga sintética")
+    parser.add_argument('--hours', type=float, default=8.0, help="Ventana de llegada de las órdenes")
+    parser.add_argument('--backlog', action='store_true', help="Todas las órdenes en cola desde el inicio")
+    parser.add_argument('--lanes', type=int, nargs='+', default=[SIMULATION_CONFIG['lanes']],
+                        help="Número de carriles a comparar")
+    parser.add_argument('--items', type=float, default=SIMULATION_CONFIG['items_mean'],
+                        help="Items promedio por orden")
+    parser.add_argument('--items-max', type=int, default=SIMULATION_CONFIG['items_max'],
+                        help="Máximo de items por orden")
+    parser.add_argument('--fit', type=Path, metavar='METRICS_JSON',
+                        help="Ajustar las latencias a las duraciones reales de metrics.json")
+    parser.add_argument('--no-batch', action='store_true', help="Cerrar el formulario después de cada orden")
+    parser.add_argument('--no-paste', action='store_true', help="Escribir los items uno a uno")
+    parser.add_argument('--seed', type=int, default=SIMULATION_CONFIG['seed'], help="Semilla")
+    parser.add_argument('--json', action='store_true', help="Imprimir los resultados en JSON")
+    args = parser.parse_args()
+
+    base = LatencyModel.from_config(SIMULATION_CONFIG['latencies'])
+    if args.fit:
+        try:
+            samples = load_latency_samples(args.fit)
+        except (OSError, ValueError) as e:
+            print(f"❌ No se pudo leer {args.fit}: {e}")
+            return 1
+        if not samples:
+            print(f"⚠️ {args.fit} no tiene latencias medidas, se usa SIMULATION_CONFIG")
+        base = LatencyModel.fit(samples, base)
+
+    workload = synthetic_workload(args.orders, args.hours, args.items, args.items_max,
+                                  args.backlog, args.seed)
+    reports = []
+    for lanes in args.lanes:
+        started = time.perf_counter()
+        model = LatencyModel(base.latencies, args.seed)
+        report = simulate(workload, lanes, model, not args.no_batch, not args.no_paste,
+                          SAP_AUTOMATION_CONFIG['paste_chunk_size'])
+        reports.append((report, time.perf_counter() - started))
+
+    if args.json:
+        print(json.dumps([report.to_dict() for report, _ in reports], indent=2, ensure_ascii=False))
+        return 0
+
+    arrival = "en cola al inicio" if args.backlog else f"llegando en {args.hours:g}h"
+    print("=" * 100)
+    print(f"🎭 SIMULACIÓN DE CAPACIDAD: {args.orders} órdenes {arrival}, ~{args.items:g} items/orden")
+    for primitive, latency in base.latencies.items():
+        print(f"   {primitive:<10} {latency}")
+    print("=" * 100)
+    print(f"{'Carriles':>8} | {'órdenes/h':>9} | {'duración':>9} | {'espera media':>12} | "
+          f"{'espera p95':>10} | {'espera máx':>10} | {'utilización':>11} | {'real':>7}")
+    print("-" * 100)
+    for report, elapsed in reports:
+        data = report.to_dict()
+        utilization = statistics.fmean(data['utilization']) * 100
+        print(f"{report.lanes:>8} | {data['orders_per_hour']:>9.1f} | {data['makespan_hours']:>8.2f}h | "
+              f"{data['wait_mean'] / 60:>10.1f}m | {data['wait_p95'] / 60:>8.1f}m | "
+              f"{data['wait_max'] / 60:>8.1f}m | {utilization:>10.1f}% | {elapsed:>6.2f}s")
+    print("=" * 100)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Spans - OrderLoader
+Tiempos por paso de SAPAutomation (navegación, clicks, encabezado, items,
+guardado) agregados en histogramas para las métricas de la sesión
+"""
+
+import time
+import functools
+from typing import Any, Callable, Dict, List, Sequence
+
+# Límites superiores (segundos) de los buckets de duración; el último es +inf
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Summary:
+    """Cantidad, suma, mínimo y máximo de un valor"""
+
+    __slots__ = ('count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.count:
+            return {'count': 0}
+        return {'count': self.count, 'mean': round(self.mean, 4),
+                'min': round(self.min, 4), 'max': round(self.max, 4)}
+
+
+class Histogram(Summary):
+    """
+    Histograma de duraciones con buckets fijos.
+
+    Los percentiles se estiman con el límite superior del bucket donde cae
+    el rango pedido (acotado por el máximo observado).
+    """
+
+    __slots__ = ('bounds', 'counts')
+
+    def __init__(self, bounds: Sequence[float] = SPAN_BUCKETS):
+        super().__init__()
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, value: float):
+        super().observe(value)
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, fraction: float) -> float:
+        """Percentil estimado (fraction entre 0 y 1)"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        if not self.count:
+            return data
+        data.update({
+            'total': round(self.total, 4),
+            'p50': round(self.quantile(0.5), 4),
+            'p95': round(self.quantile(0.95), 4),
+            'buckets': {f"<={bound:g}": count
+                        for bound, count in zip(self.bounds, self.counts) if count},
+        })
+        if self.counts[-1]:
+            data['buckets'][f">{self.bounds[-1]:g}"] = self.counts[-1]
+        return data
+
+
+class StepStats:
+    """Agregado de un paso: histograma de duración, fallos y atributos numéricos"""
+
+    __slots__ = ('duration', 'failed', 'errors', 'attributes')
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.failed = 0  # El paso devolvió un resultado falso
+        self.errors = 0  # El paso lanzó una excepción
+        self.attributes: Dict[str, Summary] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = self.duration.to_dict()
+        data['failed'] = self.failed
+        data['errors'] = self.errors
+        for key, summary in self.attributes.items():
+            data[key] = summary.to_dict()
+        return data
+
+
+class Span:
+    """
+    Un paso en curso.
+
+    set() agrega atributos numéricos (ej. sondeos, puntaje) y mark_failed()
+    cuenta el paso como fallido aunque no haya lanzado una excepción.
+    """
+
+    __slots__ = ('recorder', 'name', 'start', 'attributes', 'ok')
+
+    def __init__(self, recorder: 'SpanRecorder', name: str):
+        self.recorder = recorder
+        self.name = name
+        self.start = 0.0
+        self.attributes: Dict[str, float] = {}
+        self.ok = True
+
+    def set(self, **attributes: float):
+        self.attributes.update(attributes)
+
+    def mark_failed(self):
+        self.ok = False
+
+    def __enter__(self) -> 'Span':
+        self.start = self.recorder.clock()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.finish(self, self.recorder.clock() - self.start, exc_type is not None)
+        return False
+
+
+class _NullSpan:
+    """Span de un recorder deshabilitado: no mide nada"""
+
+    __slots__ = ()
+
+    def set(self, **attributes: float):
+        pass
+
+    def mark_failed(self):
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class SpanRecorder:
+    """
+    Agrega los spans por nombre de paso.
+
+    Deshabilitado, span() devuelve siempre el mismo NULL_SPAN: el costo es
+    una comparación y una llamada, sin leer el reloj ni crear objetos.
+    Sin hilos: cada SAPAutomation usa el suyo.
+    """
+
+    def __init__(self, enabled: bool = True, clock: Callable[[], float] = time.perf_counter):
+        """
+        Args:
+            enabled: Medir los spans
+            clock: Reloj en segundos (por defecto time.perf_counter)
+        """
+        self.enabled = enabled
+        self.clock = clock
+        self.steps: Dict[str, StepStats] = {}
+
+    def span(self, name: str) -> Any:
+        """Context manager que mide el paso name"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def finish(self, span: Span, duration: float, error: bool):
+        """Agregar un span terminado (lo llama Span.__exit__)"""
+        stats = self.steps.get(span.name)
+        if stats is None:
+            stats = self.steps[span.name] = StepStats()
+        stats.duration.observe(duration)
+        if error:
+            stats.errors += 1
+        elif not span.ok:
+            stats.failed += 1
+        for key, value in span.attributes.items():
+            if value is None:
+                continue
+            summary = stats.attributes.get(key)
+            if summary is None:
+                summary = stats.attributes[key] = Summary()
+            summary.observe(float(value))
+
+    def reset(self):
+        self.steps.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Histogramas por paso, en orden de nombre"""
+        return {name: self.steps[name].to_dict() for name in sorted(self.steps)}
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorador de métodos de SAPAutomation: mide cada llamada como el span
+    name en self.spans. Un resultado falso cuenta como fallo del paso.
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.spans.enabled:
+                return method(self, *args, **kwargs)
+            with self.spans.span(name) as span:
+                result = method(self, *args, **kwargs)
+                if not result:
+                    span.mark_failed()
+                return result
+        return wrapper
+    return decorator
+
+
+def format_spans(spans: Dict[str, Any]) -> List[str]:
+    """Líneas de tabla con los spans exportados (para mostrar en consola)"""
+    lines = [f"{'Paso':<48} | {'n':>6} | {'total':>9} | {'media':>8} | {'p95':>8} | {'fallos':>6}"]
+    for name, data in sorted(spans.items(), key=lambda entry: -entry[1].get('total', 0.0)):
+        if not data.get('count'):
+            continue
+        lines.append(f"{name:<48} | {data['count']:>6} | {data['total']:>8.2f}s | "
+                     f"{data['mean'] * 1000:>6.0f}ms | {data['p95'] * 1000:>6.0f}ms | "
+                     f"{data['failed'] + data['errors']:>6}")
+    return lines
@@ -189,6 +189,1383 @@ def test_error_handling():
         return False
 
 
+def test_order_ingest():
+    """Test 8: Ingesta única y objeto Order inmutable"""
+    print("📦 Test 8: Ingesta de órdenes...")
+    
+    try:
+        order_loader = OrderLoader()
+        
+        test_json = {
+            "orden_compra": "TEST008",
+            "fecha_documento": "01/01/2024",
+            "comprador": {"nit": "TEST", "nombre": "Test Company"},
+            "items": [
+                {"descripcion": "Item 1", "codigo": "A1", "cantidad": 2, "precio_unitario": 10},
+                {"descripcion": "Item 2", "codigo": "B2", "cantidad": 5, "precio_unitario": 20}
+            ]
+        }
+        
+        test_file = Path("data/pending/test_ingest.json")
+        with open(test_file, 'w', encoding='utf-8') as f:
+            json.dump(test_json, f, ensure_ascii=False)
+        
+        order = order_loader.file_processor.ingest(test_file)
+        test_file.unlink(missing_ok=True)
+        
+        assert order is not None, "La ingesta falló"
+        assert order.orden_compra == "TEST008"
+        assert order.comprador.nit == "TEST"
+        assert order.item_count == 2
+        assert order.items[1].codigo == "B2"
+        
+        # El objeto debe ser inmutable
+        try:
+            order.orden_compra = "OTRA"
+            assert False, "Order debería ser inmutable"
+        except AttributeError:
+            pass
+        
+        assert order_loader.file_processor.process_order(order, test_file.name)
+        
+        print("✅ Ingesta de órdenes funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en ingesta de órdenes: {e}")
+        return False
+
+
+def test_completed_naming():
+    """Test 9: Nombres sin colisión en completados"""
+    print("🏷️ Test 9: Nombres en completados...")
+    
+    created = []
+    try:
+        order_loader = OrderLoader()
+        queue_manager = order_loader.queue_manager
+        completed_before = queue_manager.get_queue_status()['completed']
+        
+        # Un nombre con sufijo no debe forzar sufijo en su base libre;
+        # luego mover dos veces un archivo con el mismo nombre
+        for name in ["test_naming_1.json", "test_naming.json", "test_naming.json"]:
+            test_file = Path("data/pending") / name
+            test_file.write_text("{}", encoding='utf-8')
+            assert queue_manager.move_to_completed(test_file), "No se pudo mover"
+            assert not test_file.exists(), "El archivo sigue en pendientes"
+        
+        created = sorted(Path("data/completed").glob("test_naming*.json"))
+        names = [path.name for path in created]
+        assert names == ["test_naming.json", "test_naming_1.json", "test_naming_2.json"], \
+            f"Nombres inesperados en completados: {names}"
+        assert queue_manager.get_queue_status()['completed'] == completed_before + 3
+        
+        print("✅ Nombres en completados funcionan correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en nombres de completados: {e}")
+        return False
+    finally:
+        for path in created:
+            path.unlink(missing_ok=True)
+
+
+def test_schema_validation():
+    """Test 10: Validación por esquema con todos los errores"""
+    print("📐 Test 10: Validación por esquema...")
+    
+    try:
+        from order_schema import ORDER_VALIDATOR
+        
+        invalid_order = {
+            "orden_compra": "TEST010",
+            "fecha_documento": "31/02/2024",
+            "comprador": {"nit": "TEST"},
+            "items": [
+                {"descripcion": "Item 1", "codigo": "A1", "cantidad": "2", "precio_unitario": 10},
+                {"descripcion": "Item 2", "codigo": "B2", "cantidad": 5, "precio_unitario": -20}
+            ]
+        }
+        
+        paths = [violation.path for violation in ORDER_VALIDATOR.validate(invalid_order)]
+        expected = [
+            "$.fecha_documento",
+            "$.comprador.nombre",
+            "$.items[0].cantidad",
+            "$.items[1].precio_unitario"
+        ]
+        assert paths == expected, f"Violaciones inesperadas: {paths}"
+        
+        invalid_order["fecha_documento"] = "29/02/2024"
+        invalid_order["comprador"]["nombre"] = "Test Company"
+        invalid_order["items"][0]["cantidad"] = 2
+        invalid_order["items"][1]["precio_unitario"] = 20
+        assert ORDER_VALIDATOR.validate(invalid_order) == [], "La orden corregida debería ser válida"
+        
+        print("✅ Validación por esquema funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en validación por esquema: {e}")
+        return False
+
+
+def test_order_pipeline():
+    """Test 11: Preparación anticipada de órdenes en paralelo"""
+    print("⚡ Test 11: Pipeline de preparación...")
+    
+    try:
+        import logging
+        import tempfile
+        from pipeline import OrderPipeline
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            files = []
+            for i in range(6):
+                file_path = temp_path / f"orden_{i}.json"
+                order = {
+                    "orden_compra": f"TEST{i:03d}",
+                    "fecha_documento": "01/01/2024",
+                    "comprador": {"nit": "TEST", "nombre": "Test Company"},
+                    "items": [{"descripcion": "Item", "codigo": "A1", "cantidad": i, "precio_unitario": 10}]
+                }
+                if i == 2:
+                    order["items"][0]["cantidad"] = -1
+                file_path.write_text(json.dumps(order), encoding='utf-8')
+                files.append(file_path)
+            (temp_path / "orden_3.json").write_text("{no es json", encoding='utf-8')
+            
+            pipeline = OrderPipeline(logging.getLogger("test"), workers=2, prefetch=3)
+            try:
+                results = list(pipeline.prepare(files))
+            finally:
+                pipeline.close()
+            
+            assert [r.file_path for r in results] == files, "El pipeline debe conservar el orden de llegada"
+            assert [r.error_kind for r in results] == [None, None, 'invalid', 'json', None, None], \
+                f"Resultados inesperados: {[r.error_kind for r in results]}"
+            assert results[5].order.orden_compra == "TEST005", "La orden preparada no coincide"
+            assert results[0].raw == files[0].read_bytes(), "Los bytes leídos deben conservarse para el backup"
+        
+        print("✅ Pipeline de preparación funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en pipeline de preparación: {e}")
+        return False
+
+
+def test_streaming_order():
+    """Test 12: Lectura incremental de órdenes grandes"""
+    print("🌊 Test 12: Lectura incremental...")
+    
+    try:
+        import tempfile
+        from order import Order
+        from order_stream import open_streaming_order, OrderStreamError
+        
+        order_data = {
+            "orden_compra": "TEST012",
+            "fecha_documento": "01/01/2024",
+            "comprador": {"nit": "TEST", "nombre": "Test Company"},
+            "items": [
+                {"descripcion": f"Item {i}", "codigo": f"A{i}", "cantidad": i + 0.5, "precio_unitario": 10}
+                for i in range(50)
+            ],
+            "valor_total": 1250
+        }
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "grande.json"
+            file_path.write_text(json.dumps(order_data, indent=2), encoding='utf-8')
+            
+            # Bloques diminutos para cortar claves y números entre lecturas
+            order, violations = open_streaming_order(file_path, prevalidate=True, chunk_size=7)
+            assert not violations, f"Violaciones inesperadas: {violations}"
+            assert order.item_count == 50 and order.valor_total == 1250, "Encabezado incompleto"
+            assert tuple(order.items) == Order.from_dict(order_data).items, "Los items no coinciden"
+            
+            order_data["items"][30]["cantidad"] = -1
+            file_path.write_text(json.dumps(order_data), encoding='utf-8')
+            
+            _, violations = open_streaming_order(file_path, prevalidate=True, chunk_size=7)
+            assert [v.path for v in violations] == ["$.items[30].cantidad"], "Item inválido no detectado"
+            
+            order, _ = open_streaming_order(file_path, prevalidate=False, chunk_size=7)
+            entered = 0
+            try:
+                for _ in order.items:
+                    entered += 1
+                assert False, "Debió fallar en el item inválido"
+            except OrderStreamError:
+                assert entered == 30, f"Se entregaron {entered} items antes del inválido"
+            
+            # Sin fecha_entrega (opcional) la lectura igual se detiene en items
+            assert "fecha_entrega" not in order_data
+            order, _ = open_streaming_order(file_path, prevalidate=False, chunk_size=7)
+            assert order.valor_total is None and order.item_count is None, \
+                "Sin prevalidate no deben leerse los items para devolver la orden"
+        
+        print("✅ Lectura incremental funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en lectura incremental: {e}")
+        return False
+
+
+def test_lanes():
+    """Test 13: Carriles de ejecución en paralelo"""
+    print("🛣️ Test 13: Carriles de ejecución...")
+    
+    try:
+        import logging
+        from order import Order
+        from lanes import Lane, LaneScheduler
+        
+        orders = [
+            Order.from_dict({
+                "orden_compra": f"TEST{i:03d}",
+                "fecha_documento": "01/01/2024",
+                "comprador": {"nit": "TEST", "nombre": "Test Company"},
+                "items": [{"descripcion": "Item", "codigo": "A1", "cantidad": 1, "precio_unitario": 10}] * 2
+            })
+            for i in range(4)
+        ]
+        
+        results = []
+        lanes = [Lane(f"lane{i}", backend='simulated', item_delay=0.05) for i in (1, 2)]
+        scheduler = LaneScheduler(logging.getLogger("test"), lanes, results.append)
+        try:
+            assert scheduler.start() == 2, "Ambos carriles deberían arrancar"
+            for i, order in enumerate(orders):
+                scheduler.submit(Path(f"orden_{i}.json"), order)
+            scheduler.drain()
+        finally:
+            scheduler.close()
+        
+        assert len(results) == 4 and all(r.success for r in results), "Todas las órdenes deberían procesarse"
+        assert sorted(r.file_path.name for r in results) == [f"orden_{i}.json" for i in range(4)], \
+            "Cada orden debe procesarse una sola vez"
+        assert {r.lane for r in results} == {"lane1", "lane2"}, "Ambos carriles deberían recibir órdenes"
+        assert sum(max(r.spans['process_order']['count'] for r in results if r.lane == name)
+                   for name in ("lane1", "lane2")) == 4, "Cada carril debe devolver sus spans por orden"
+        
+        from sap_automation import SAPAutomation
+        state_files = {SAPAutomation.from_config(logging.getLogger("test"), lane=lane.name,
+                                                 simulation_mode=True).locations.path
+                       for lane in lanes}
+        assert len(state_files) == len(lanes), "Cada carril debe tener su propio archivo de estado de visión"
+        
+        print("✅ Carriles de ejecución funcionan correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en carriles de ejecución: {e}")
+        return False
+
+
+def test_template_registry():
+    """Test 14: Caché de plantillas decodificadas"""
+    print("🖼️ Test 14: Caché de plantillas...")
+    
+    try:
+        import os
+        import tempfile
+        import cv2
+        import numpy as np
+        from vision import TemplateRegistry, match_template
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            assets = Path(temp_dir)
+            (assets / "navegacion").mkdir()
+            rng = np.random.default_rng(7)
+            screen = rng.integers(0, 255, (200, 300, 3), dtype=np.uint8)
+            for i, (x, y) in enumerate([(20, 30), (150, 90), (210, 140)]):
+                cv2.imwrite(str(assets / "navegacion" / f"boton_{i}.png"), screen[y:y + 25, x:x + 60])
+            
+            registry = TemplateRegistry(assets, max_entries=2)
+            assert registry.preload() == 2, "Debe precargar hasta max_entries"
+            
+            template = registry.get("navegacion/boton_2.png")
+            assert template.gray.ndim == 2 and (template.width, template.height) == (60, 25), \
+                "La plantilla debe quedar en escala de grises con su tamaño"
+            assert "navegacion/boton_0.png" not in registry, "La menos usada debe salir del caché (LRU)"
+            assert registry.get("navegacion/boton_2.png") is template, "El segundo acceso debe venir del caché"
+            assert registry.get("navegacion/no_existe.png") is None, "Imagen inexistente debe devolver None"
+            
+            replaced = assets / "navegacion" / "boton_2.png"
+            cv2.imwrite(str(replaced), screen[0:40, 0:80])
+            stat = replaced.stat()
+            os.utime(replaced, ns=(stat.st_atime_ns, template.mtime_ns + 1_000_000))
+            reloaded = registry.get("navegacion/boton_2.png")
+            assert (reloaded.width, reloaded.height) == (80, 40), "Una imagen reemplazada en disco debe releerse"
+            replaced.unlink()
+            assert registry.get("navegacion/boton_2.png") is None, "Una imagen borrada no debe servirse del caché"
+            
+            screen_gray = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+            box, score = match_template(screen_gray, registry.get("navegacion/boton_1.png"), 0.9)
+            assert box == (150, 90, 60, 25) and score > 0.99, f"Coincidencia inesperada: {box}"
+        
+        print("✅ Caché de plantillas funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en caché de plantillas: {e}")
+        return False
+
+
+def test_wait_for_any():
+    """Test 15: Varias plantillas sobre una sola captura"""
+    print("🎯 Test 15: Búsqueda de varias plantillas...")
+    
+    try:
+        import tempfile
+        import cv2
+        import numpy as np
+        from vision import TemplateRegistry, match_any
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            assets = Path(temp_dir)
+            rng = np.random.default_rng(12)
+            screen = rng.integers(0, 255, (200, 300), dtype=np.uint8)
+            cv2.imwrite(str(assets / "boton.png"), screen[40:70, 100:180])
+            cv2.imwrite(str(assets / "error.png"), rng.integers(0, 255, (30, 80), dtype=np.uint8))
+            cv2.imwrite(str(assets / "cargando.png"), screen[150:170, 20:60])
+            
+            registry = TemplateRegistry(assets)
+            candidates = [(registry.get(name), 0.9) for name in ("error.png", "cargando.png", "boton.png")]
+            
+            # El diálogo de error no está en pantalla: gana el primero que sí aparece
+            match = match_any(screen, candidates, offset=(1000, 500))
+            assert match.name == "cargando.png", f"Se esperaba cargando.png, no {match.name}"
+            assert match.box == (1020, 650, 40, 20) and match.center == (1040, 660), f"Posición inesperada: {match.box}"
+            assert match.score > 0.99, "El puntaje debe reportarse"
+            
+            assert match_any(screen, candidates[:1]) is None, "Sin coincidencias debe devolver None"
+        
+        print("✅ Búsqueda de varias plantillas funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en búsqueda de varias plantillas: {e}")
+        return False
+
+
+def test_location_cache():
+    """Test 16: Memoria de posiciones (ROI) entre ejecuciones"""
+    print("📍 Test 16: Memoria de posiciones...")
+    
+    try:
+        import tempfile
+        from vision import LocationCache
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            state_file = Path(temp_dir) / "vision_state.json"
+            geometry = (1920, 1080, 0, 0, 1920, 1040)
+            
+            cache = LocationCache(state_file, padding=40)
+            cache.ensure_geometry(geometry)
+            cache.record("navegacion/menu_modulos.png", (10, 20, 80, 33))
+            cache.record("navegacion/menu_ventas.png", (300, 500, 338, 22))
+            
+            # Otra ejecución: las posiciones se leen del archivo de estado
+            reloaded = LocationCache(state_file, padding=40)
+            assert reloaded.load() == 2, "Las posiciones deben persistir entre ejecuciones"
+            assert reloaded.ensure_geometry(geometry), "Con la misma geometría el caché sigue vigente"
+            assert reloaded.roi(["navegacion/menu_modulos.png"], (1920, 1080)) == (0, 0, 130, 93), \
+                "La región debe tener margen y quedar dentro de la pantalla"
+            assert reloaded.roi(["navegacion/menu_modulos.png", "navegacion/menu_ventas.png"], (1920, 1080)) == \
+                (0, 0, 678, 562), "La región debe cubrir todas las plantillas"
+            assert reloaded.roi(["navegacion/boton_orden_venta.png"], (1920, 1080)) is None, \
+                "Sin posición conocida se busca en pantalla completa"
+            
+            assert not reloaded.ensure_geometry((3840, 2160, 0, 0, 3840, 2120)), "Cambio de resolución no detectado"
+            assert reloaded.get("navegacion/menu_modulos.png") is None, "El cambio de resolución debe vaciar el caché"
+        
+        print("✅ Memoria de posiciones funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en memoria de posiciones: {e}")
+        return False
+
+
+def test_pyramid_matching():
+    """Test 17: Búsqueda piramidal gruesa a fina"""
+    print("🔍 Test 17: Búsqueda piramidal...")
+    
+    try:
+        import tempfile
+        import cv2
+        import numpy as np
+        from vision import Frame, TemplateRegistry, match_template
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            assets = Path(temp_dir)
+            rng = np.random.default_rng(21)
+            screen = np.full((720, 1280), 236, dtype=np.uint8)
+            for _ in range(60):
+                x, y = int(rng.integers(0, 1200)), int(rng.integers(0, 680))
+                cv2.rectangle(screen, (x, y), (x + int(rng.integers(40, 300)), y + int(rng.integers(16, 150))),
+                              int(rng.integers(150, 256)), -1)
+            button = np.full((36, 120), 200, dtype=np.uint8)
+            cv2.rectangle(button, (0, 0), (119, 35), 90, 2)
+            cv2.putText(button, "Orden", (14, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 20, 2)
+            screen[403:439, 517:637] = button
+            cv2.imwrite(str(assets / "boton.png"), button)
+            cv2.imwrite(str(assets / "ausente.png"), rng.integers(0, 255, (36, 120), dtype=np.uint8))
+            
+            registry = TemplateRegistry(assets)
+            template = registry.get("boton.png")
+            assert template.pyramid, "La plantilla debe tener niveles reducidos"
+            
+            full = match_template(screen, template, 0.8)
+            coarse = match_template(Frame(screen), template, 0.8, max_level=2)
+            assert coarse is not None and coarse[0] == full[0] == (517, 403, 120, 36), \
+                f"La búsqueda piramidal debe encontrar la misma posición: {coarse}"
+            assert abs(coarse[1] - full[1]) < 1e-4, "El puntaje debe ser el de resolución completa"
+            
+            assert match_template(Frame(screen), registry.get("ausente.png"), 0.8, max_level=2) is None, \
+                "Plantilla ausente no debe coincidir"
+            region = screen[380:460, 480:680]
+            assert match_template(region, template, 0.8, max_level=2)[0] == (37, 23, 120, 36), \
+                "Las regiones pequeñas se buscan a resolución completa"
+        
+        print("✅ Búsqueda piramidal funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en búsqueda piramidal: {e}")
+        return False
+
+
+def test_visual_waits():
+    """Test 18: Esperas por estado de pantalla"""
+    print("⏳ Test 18: Esperas por estado de pantalla...")
+    
+    try:
+        import time
+        import logging
+        import tempfile
+        import cv2
+        import numpy as np
+        from sap_automation import SAPAutomation
+        from screen_capture import FakeCapture
+        from simulation import VirtualClock
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), simulation_mode=False,
+                                poll_interval=0.01, settle_time=0.05)
+            sap.timeout = 2
+            
+            before = np.zeros((60, 80), dtype=np.uint8)
+            loading = before.copy()
+            loading[10:30, 10:40] = 120
+            loaded = before.copy()
+            loaded[10:50, 10:70] = 200
+            
+            # La pantalla cambia, se dibuja en dos pasos y queda estable
+            frames = iter([before, before, loading, loaded])
+            sap.capture = lambda region=None: next(frames, loaded)
+            start = time.monotonic()
+            assert sap.wait_for_update(before), "Debe detectar el cambio y la estabilidad"
+            elapsed = time.monotonic() - start
+            assert elapsed < 1, f"Debe volver apenas la pantalla queda estable ({elapsed:.2f}s)"
+            
+            # Pantalla que nunca responde: timeout sin excepción
+            sap.capture = lambda region=None: before
+            assert not sap.wait_for_change(before, timeout=0.1), "Sin cambios debe vencer el timeout"
+            
+            # Cambios de pocos píxeles (cursor parpadeando) no cuentan
+            blink = before.copy()
+            blink[5, 5] = 255
+            sap.capture = lambda region=None: blink
+            assert not sap.wait_for_change(before, timeout=0.1), "Un píxel no es un cambio de estado"
+            
+            calls = []
+            result = sap.wait_until(lambda: calls.append(1) or len(calls) >= 3, 1, "tercer sondeo")
+            assert result and len(calls) == 3, "wait_until debe volver al cumplirse la condición"
+            
+            # SAP tarda más que settle_time en reaccionar a una tecla: se espera el cambio
+            screen = FakeCapture([before, loading, loaded], repeat=20)
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), simulation_mode=False,
+                                poll_interval=0.01, settle_time=0.05, capture=screen,
+                                clock=VirtualClock())
+            sap.press_key('enter')
+            assert screen.index == 1, "press_key debe esperar a que la pantalla responda"
+            sap.type_text("ABC", press_enter=True)
+            assert screen.index == 2, "La captura de referencia debe tomarse antes de la tecla"
+            
+            # La referencia del click se toma al hacer click, no antes de buscar el botón
+            button = np.random.default_rng(0).integers(0, 256, (20, 30), dtype=np.uint8)
+            cv2.imwrite(str(Path(temp_dir) / "boton.png"), button)
+            shown = before.copy()
+            shown[20:40, 25:55] = button
+            opened = shown.copy()
+            opened[45:60, 0:80] = 90
+            screen = FakeCapture([before] + [shown] * 10 + [opened])
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), simulation_mode=False,
+                                poll_interval=0.01, settle_time=0.05, capture=screen,
+                                clock=VirtualClock())
+            assert sap.find_and_click("boton.png", timeout=2, wait_update=True), "Debe hacer click y esperar"
+            assert screen.index == 11, "Debe esperar a que el click cambie la pantalla"
+        
+        print("✅ Esperas por estado de pantalla funcionan correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en esperas por estado de pantalla: {e}")
+        return False
+
+
+def test_frame_gate():
+    """Test 19: Sondeo adaptativo y capturas sin cambios"""
+    print("⏭️ Test 19: Sondeo adaptativo...")
+    
+    try:
+        import numpy as np
+        from sap_automation import AdaptivePoll
+        from vision import FrameGate
+        
+        poll = AdaptivePoll(0.03, 0.1, factor=2)
+        intervals = [poll.next() for _ in range(4)]
+        assert intervals == [0.03, 0.06, 0.1, 0.1], f"El intervalo debe crecer hasta el máximo: {intervals}"
+        poll.reset()
+        assert poll.next() == 0.03, "reset() debe volver al mínimo"
+        
+        changes = []
+        gate = FrameGate(on_change=lambda: changes.append(1))
+        screen = np.zeros((40, 60), dtype=np.uint8)
+        assert not gate.unchanged(None, screen), "La primera captura siempre se busca"
+        assert gate.unchanged(None, screen.copy()), "Captura idéntica debe omitirse"
+        assert not gate.unchanged((0, 0, 10, 10), screen[:10, :10]), "Cada región se compara por separado"
+        
+        updated = screen.copy()
+        updated[20, 30] = 1
+        assert not gate.unchanged(None, updated), "Un solo píxel distinto obliga a buscar"
+        assert gate.skipped == 1 and len(changes) == 1, "Debe contar omisiones y avisar cambios"
+        
+        print("✅ Sondeo adaptativo funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en sondeo adaptativo: {e}")
+        return False
+
+
+def test_batch_mode():
+    """Test 20: Formulario abierto durante el lote"""
+    print("♻️ Test 20: Modo lote...")
+    
+    try:
+        import logging
+        import tempfile
+        import numpy as np
+        from order import Order
+        from sap_automation import SAPAutomation
+        from screen_capture import FakeCapture
+        from benchmark_validation import build_order
+        
+        order = Order.from_dict(build_order(2))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), simulation_mode=True,
+                                batch_mode=True)
+            calls = []
+            sap.navigate_to_sales_order = lambda: calls.append("navegar") or True
+            sap.reset_form = lambda: calls.append("agregar") or True
+            sap.close_order_window = lambda: calls.append("cerrar") or True
+            sap.fill_order_header = lambda order: True
+            sap.add_item = lambda item, number: True
+            sap.save_order = lambda number: True
+            
+            assert all(sap.process_order(order) for _ in range(3)), "Las órdenes deben procesarse"
+            assert calls == ["navegar", "agregar", "agregar", "agregar"], \
+                f"Debe navegar una sola vez en el lote: {calls}"
+            
+            # Una orden fallida invalida el formulario: la siguiente navega de nuevo
+            sap.save_order = lambda number: False
+            assert not sap.process_order(order), "La orden debe fallar"
+            sap.save_order = lambda number: True
+            calls.clear()
+            assert sap.process_order(order)
+            assert calls == ["navegar", "agregar"], f"Tras un fallo debe volver a navegar: {calls}"
+            
+            sap.end_batch()
+            assert calls[-1] == "cerrar" and not sap.form_open, "end_batch debe cerrar el formulario"
+            
+            sap.batch_mode = False
+            calls.clear()
+            assert sap.process_order(order)
+            assert calls == ["navegar", "cerrar"], f"Sin modo lote navega y cierra: {calls}"
+            
+            # Fuera de simulación el modo lote exige la imagen del formulario
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), batch_mode=True,
+                                capture=FakeCapture([np.zeros((50, 50), dtype=np.uint8)]))
+            assert not sap.batch_mode, "Sin form_image el modo lote debe desactivarse"
+            (Path(temp_dir) / "formulario.png").write_bytes(
+                Path("assets/images/sap/navegacion/menu_ventas.png").read_bytes())
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), batch_mode=True,
+                                form_image="formulario.png",
+                                capture=FakeCapture([np.zeros((50, 50), dtype=np.uint8)]))
+            assert sap.batch_mode, "Con form_image el modo lote se mantiene"
+            sap.form_open = True
+            assert not sap.is_form_open(), "Si el formulario no está en pantalla debe navegarse de nuevo"
+        
+        print("✅ Modo lote funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en modo lote: {e}")
+        return False
+
+
+def test_bulk_paste():
+    """Test 21: Pegado de items en bloque"""
+    print("📋 Test 21: Pegado de items en bloque...")
+    
+    try:
+        import logging
+        import tempfile
+        from order import Order, OrderItem
+        from sap_automation import (PASTE_UNVERIFIED, SAPAutomation, count_copied_rows,
+                                    items_to_clipboard_text)
+        from benchmark_validation import build_order
+        
+        text = items_to_clipboard_text([OrderItem("A\t1", "X", 5, 10), OrderItem("B2", "Y", 7.5, 10)],
+                                       ('codigo', None, 'cantidad'))
+        assert text == "A 1\t\t5\r\nB2\t\t7.5", f"Formato de portapapeles inesperado: {text!r}"
+        
+        # Solo una copia de filas completas con los códigos pegados permite contar
+        chunk = [OrderItem(f"C{i}", f"Item {i}", 1, 10) for i in range(3)]
+        assert count_copied_rows("1\tC0\tItem\t1,00\r\n2\tC1\tItem\t1,00\r\n", chunk) == 2
+        assert count_copied_rows("C0", chunk) is None, "La celda activa sola no cuenta filas"
+        assert count_copied_rows("1\tC0\t1\r\n2\tC9\t1", chunk) is None, "Códigos distintos no cuentan filas"
+        assert count_copied_rows("", chunk) is None
+        extra = "".join(f"{i + 1}\tC{i}\tItem\t1,00\r\n" for i in range(3)) + "4\tC0\tItem\t1,00"
+        assert count_copied_rows(extra, chunk) == 4, "Las filas de más deben contarse"
+        
+        items = Order.from_dict(build_order(25)).items
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), simulation_mode=True,
+                                bulk_paste=True, paste_chunk_size=10)
+            typed, pasted = [], []
+            sap.add_item = lambda item, number: typed.append(number) or True
+            
+            def paste(chunk, landed=None):
+                pasted.append(len(chunk))
+                return len(chunk) if landed is None else landed(chunk)
+            
+            sap.paste_items = paste
+            assert sap.add_items(iter(items)) and pasted == [10, 10, 5] and not typed, \
+                "Todos los items deben llegar pegados en bloques"
+            
+            # Filas faltantes: se escriben las que no llegaron
+            pasted.clear()
+            sap.paste_items = lambda chunk: paste(chunk, lambda c: len(c) - 2)
+            assert sap.add_items(items)
+            assert typed == [9, 10, 19, 20, 24, 25], f"Debe escribir solo las filas faltantes: {typed}"
+            
+            # Portapapeles no disponible: se escribe todo
+            typed.clear()
+            sap.paste_items = lambda chunk: None
+            assert sap.add_items(items) and typed == list(range(1, 26)), "Sin portapapeles debe escribir todo"
+            
+            # Filas de más: error
+            typed.clear()
+            sap.paste_items = lambda chunk: len(chunk) + 1
+            assert not sap.add_items(items) and not typed, "Filas de más deben fallar la orden"
+            
+            # Pegado sin verificar: se aborta sin escribir encima
+            typed.clear()
+            sap.paste_items = lambda chunk: PASTE_UNVERIFIED
+            assert not sap.add_items(items) and not typed, "Un pegado sin verificar debe abortar la orden"
+        
+        print("✅ Pegado de items en bloque funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en pegado de items en bloque: {e}")
+        return False
+
+
+def test_timing_profiles():
+    """Test 22: Calibración y perfiles de tiempos"""
+    print("⏱️ Test 22: Perfiles de tiempos...")
+    
+    try:
+        import json
+        import tempfile
+        from calibrate_timing import SimulatedTarget, calibrate
+        from timing_profiles import TimingProfile, default_profile, load_profile, save_profile
+        
+        target = SimulatedTarget(latency=0.1, jitter=0.0, frames=3, frame_gap=0.1,
+                                 min_interval=0.02, activation=0.4)
+        profile = calibrate(target, "rapida", samples=5, margin=1.5, window=True, report=lambda _: None)
+        assert abs(profile.pyautogui_pause - 0.15) < 1e-9, f"Pausa inesperada: {profile.pyautogui_pause}"
+        assert abs(profile.type_interval - 0.03) < 1e-9, "Debe elegir el menor intervalo sin pérdidas con margen"
+        assert abs(profile.window_activation_delay - 0.6) < 1e-9, "Debe medir la activación de ventana"
+        assert 0.1 <= profile.settle_time <= 0.15, f"settle_time inesperado: {profile.settle_time}"
+        assert profile.pyautogui_pause < default_profile().pyautogui_pause, "Equipo rápido: pausas menores"
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "timing_profiles.json"
+            save_profile(profile, path)
+            save_profile(TimingProfile("lenta", 1, 0.1, 1, 2, 2, 5), path)
+            
+            loaded = load_profile("rapida", path)
+            assert loaded.type_interval == profile.type_interval and loaded.backend == "simulation", \
+                "El perfil guardado debe cargarse igual"
+            assert load_profile("lenta", path).stabilization_delay == 5, "Los demás perfiles se conservan"
+            assert load_profile("no_existe", path).name == "default", "Perfil inexistente usa config.py"
+            
+            data = json.loads(path.read_text(encoding='utf-8'))
+            data["profiles"]["rapida"]["settle_time"] = -1
+            path.write_text(json.dumps(data), encoding='utf-8')
+            assert load_profile("rapida", path).settle_time == default_profile().settle_time, \
+                "Valores inválidos deben tomar el valor por defecto"
+        
+        print("✅ Perfiles de tiempos funcionan correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en perfiles de tiempos: {e}")
+        return False
+
+
+def test_screen_capture():
+    """Test 23: Backends de captura de pantalla"""
+    print("🖥️ Test 23: Backends de captura...")
+    
+    try:
+        import logging
+        import tempfile
+        import cv2
+        import numpy as np
+        from sap_automation import SAPAutomation
+        from screen_capture import FakeCapture, create_capture
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            rng = np.random.default_rng(0)
+            button = rng.integers(0, 256, (30, 40), dtype=np.uint8)
+            cv2.imwrite(str(Path(temp_dir) / "boton.png"), button)
+            
+            empty = np.full((200, 300), 236, dtype=np.uint8)
+            shown = empty.copy()
+            shown[70:100, 120:160] = button
+            
+            # El botón aparece en la tercera captura
+            screen = FakeCapture([empty, shown], repeat=2)
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), simulation_mode=False,
+                                poll_interval=0.01, capture=screen)
+            assert sap.screen is screen, "Debe usar el backend recibido"
+            assert sap.screen_geometry()[:2] == (300, 200), "La resolución viene del backend"
+            
+            match = sap.wait_for_any(["boton.png"], timeout=2)
+            assert match is not None and match.box == (120, 70, 40, 30), f"Coincidencia inesperada: {match}"
+            assert screen.grabs >= 3, "Debe sondear hasta que cambie el cuadro"
+            assert np.array_equal(sap.capture((120, 70, 40, 30)), button), "La región debe recortarse"
+            
+            debug_path = Path(temp_dir) / "debug.png"
+            screen.save(debug_path)
+            assert debug_path.exists(), "save debe escribir la captura"
+            
+            from_files = create_capture('fake', frames=temp_dir)
+            assert len(from_files.frames) == 2, "Debe cargar los cuadros del directorio"
+            try:
+                create_capture('xyz')
+                assert False, "Un backend desconocido debe fallar"
+            except ValueError:
+                pass
+        
+        print("✅ Backends de captura funcionan correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en backends de captura: {e}")
+        return False
+
+
+def test_capacity_simulation():
+    """Test 24: Simulación con reloj virtual"""
+    print("🎭 Test 24: Simulación de capacidad...")
+    
+    try:
+        import time
+        import json
+        import random
+        import logging
+        import tempfile
+        from config import PROJECT_ROOT
+        from sap_automation import SAPAutomation
+        from simulation import (Latency, LatencyModel, VirtualClock, load_latency_samples,
+                                simulate, synthetic_order, synthetic_workload)
+        
+        # El flujo real con los tiempos originales, sin esperar
+        clock = VirtualClock()
+        sap = SAPAutomation(logging.getLogger("test"), PROJECT_ROOT / "assets" / "images" / "sap",
+                            simulation_mode=True, clock=clock)
+        order = synthetic_order(random.Random(1), 1, items_mean=3)
+        start = time.perf_counter()
+        assert sap.process_order(order), "La orden simulada debe procesarse"
+        expected = 1.5 + 0.3 + 0.5 * order.item_count + 1.0 + 0.3
+        assert abs(clock.now - expected) < 1e-9, f"Tiempo virtual {clock.now} != {expected}"
+        assert time.perf_counter() - start < 0.5, "El reloj virtual no debe dormir"
+        
+        # Distribuciones
+        rng = random.Random(0)
+        lognormal = Latency('lognormal', 2.0, 0.5)
+        samples = [lognormal.sample(rng) for _ in range(20000)]
+        assert abs(sum(samples) / len(samples) - 2.0) < 0.05, "La media lognormal debe respetarse"
+        assert min(samples) > 0, "Las duraciones no pueden ser negativas"
+        fitted = Latency.fit(samples)
+        assert fitted.kind == 'lognormal' and abs(fitted.stdev - 0.5) < 0.05, "El ajuste debe recuperar stdev"
+        assert Latency.from_spec(0.25).total(rng, 4) == 1.0, "Constante por repetición"
+        
+        # Backlog: dos carriles terminan en la mitad del tiempo
+        model = LatencyModel.from_config({'click': 1, 'item': 2, 'save': 3})
+        workload = synthetic_workload(20, items_mean=5, backlog=True, seed=3)
+        one = simulate(workload, 1, model, batch_mode=False, bulk_paste=False)
+        two = simulate(workload, 2, model, batch_mode=False, bulk_paste=False)
+        assert one.orders == two.orders == 20 and one.failed == 0, "Deben procesarse todas las órdenes"
+        assert two.makespan < one.makespan * 0.6, "Dos carriles deben repartirse el trabajo"
+        assert max(two.waits) < max(one.waits), "Con más carriles se espera menos"
+        assert all(u > 0.9 for u in one.utilization), "Un carril con backlog está siempre ocupado"
+        
+        # Latencias reales guardadas en metrics.json
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "metrics.json"
+            path.write_text(json.dumps({'latencies': {'save': [1.0, 1.2, 0.8, 1.1, 0.9]}}), encoding='utf-8')
+            fitted_model = LatencyModel.fit(load_latency_samples(path), LatencyModel.legacy())
+            assert abs(fitted_model.latencies['save'].mean - 1.0) < 1e-9, "Debe ajustar save"
+            assert fitted_model.latencies['click'].mean == 0.5, "Sin muestras se conserva la base"
+        
+        print("✅ Simulación de capacidad funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en simulación de capacidad: {e}")
+        return False
+
+
+def test_throughput_benchmark():
+    """Test 25: Generador de carga y comparación con línea base"""
+    print("📈 Test 25: Benchmark de punta a punta...")
+    
+    try:
+        import tempfile
+        from pipeline import prepare_order
+        from benchmark_throughput import baseline_mismatch, compare, write_orders
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pending = Path(temp_dir) / "pending"
+            valid, malformed = write_orders(pending, 60, items_mean=4, items_max=10,
+                                            text_length=12, malformed_rate=0.2, seed=1)
+            assert valid + malformed == 60 and malformed > 0, "Debe generar órdenes dañadas"
+            prepared = [prepare_order(path) for path in sorted(pending.iterdir())]
+            assert sum(p.ok for p in prepared) == valid, "Solo las órdenes sanas deben validar"
+            kinds = {p.error_kind for p in prepared if not p.ok}
+            assert kinds == {'json', 'invalid'}, f"Tipos de daño inesperados: {kinds}"
+            assert all(p.order.item_count <= 10 for p in prepared if p.ok), "Respetar items_max"
+        
+        baseline = {'orders_per_sec': 100, 'latency_ms': {'p50': 1.0, 'p95': 2.0, 'p99': 3.0},
+                    'stages_ms_per_order': {'backup': 1.0, 'scan': 0.001}}
+        same = {'orders_per_sec': 95, 'latency_ms': {'p50': 1.1, 'p95': 2.0, 'p99': 3.0},
+                'stages_ms_per_order': {'backup': 1.1, 'scan': 0.004}}
+        assert compare(same, baseline, 0.25) == [], "Variaciones dentro de la tolerancia no son regresión"
+        slower = {'orders_per_sec': 60, 'latency_ms': {'p50': 1.0, 'p95': 4.0, 'p99': 3.0},
+                  'stages_ms_per_order': {'backup': 1.0, 'scan': 0.001}}
+        regressions = compare(slower, baseline, 0.25)
+        assert len(regressions) == 2 and regressions[0].startswith('orders_per_sec'), \
+            f"Debe marcar órdenes/s y p95: {regressions}"
+        
+        workload = {'items_mean': 20, 'seed': 0}
+        report = {'orders': 30, 'workload': dict(workload)}
+        assert baseline_mismatch(report, {'orders': 30, 'workload': workload}) == []
+        assert baseline_mismatch(report, {'orders': 500, 'workload': {'items_mean': 20, 'seed': 1}}) == \
+            ['orders', 'workload.seed'], "Otra carga no debe compararse"
+        
+        print("✅ Benchmark de punta a punta funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en benchmark de punta a punta: {e}")
+        return False
+
+
+def test_screen_recording():
+    """Test 26: Grabación y reproducción de pantalla"""
+    print("⏺️ Test 26: Grabación y reproducción...")
+    
+    try:
+        import time
+        import logging
+        import tempfile
+        import cv2
+        import numpy as np
+        from sap_automation import SAPAutomation
+        from screen_capture import FakeCapture
+        from recording import Recording, RecordingCapture, ReplayCapture
+        from simulation import VirtualClock
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            rng = np.random.default_rng(0)
+            button = rng.integers(0, 256, (30, 40), dtype=np.uint8)
+            cv2.imwrite(str(Path(temp_dir) / "boton.png"), button)
+            
+            empty = np.full((200, 300), 236, dtype=np.uint8)
+            shown = empty.copy()
+            shown[70:100, 120:160] = button
+            typed = shown.copy()
+            typed[10:20, 10:60] = 0
+            
+            def script(sap):
+                return (sap.find_and_click("boton.png", timeout=2)
+                        and sap.type_text("ABC", press_enter=True) is None)
+            
+            # Grabar una corrida sobre una pantalla falsa
+            record_path = Path(temp_dir) / "grabacion.zip"
+            screen = FakeCapture([empty, empty, shown, shown, typed])
+            recorder = RecordingCapture(screen, record_path)
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), simulation_mode=False,
+                                poll_interval=0.01, settle_time=0.05, capture=recorder)
+            assert script(sap), "La corrida grabada debe encontrar el botón"
+            sap.screen.close()
+            assert sap.input.inner.events == [('click', 140, 85), ('write', 'ABC'), ('press', 'enter')], \
+                f"La entrada debe llegar al backend real: {sap.input.inner.events}"
+            
+            recording = Recording.load(record_path)
+            assert len(recording.frames) == 3, f"Cuadros repetidos deben guardarse una vez: {len(recording.frames)}"
+            assert recording.index['grabs'] == screen.grabs, "Cada captura debe quedar en la línea de tiempo"
+            assert recording.inputs == [('click', 140, 85), ('write', 'ABC'), ('press', 'enter')], \
+                f"Entradas grabadas inesperadas: {recording.inputs}"
+            assert np.array_equal(recording.frames[-1], typed), "Los cuadros deben guardarse sin pérdida"
+            
+            # Reproducir sin esperar: misma entrada, sin divergencias
+            replay = ReplayCapture(record_path)
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), simulation_mode=False,
+                                poll_interval=0.01, settle_time=0.05, capture=replay,
+                                clock=VirtualClock())
+            start = time.perf_counter()
+            assert script(sap), "La reproducción debe repetir la corrida"
+            assert time.perf_counter() - start < 1.0, "La reproducción no debe dormir"
+            report = replay.report()
+            assert report['complete'] and not report['divergences'], f"Reproducción inesperada: {report}"
+            assert np.array_equal(sap.capture((120, 70, 40, 30)), button), "La región debe recortarse"
+            
+            # Una entrada distinta a la grabada se reporta
+            replay = ReplayCapture(record_path)
+            sap = SAPAutomation(logging.getLogger("test"), Path(temp_dir), simulation_mode=False,
+                                poll_interval=0.01, settle_time=0.05, capture=replay,
+                                clock=VirtualClock())
+            sap.type_text("XYZ")
+            assert len(replay.report()['divergences']) == 1, "La divergencia debe reportarse"
+        
+        print("✅ Grabación y reproducción funcionan correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en grabación y reproducción: {e}")
+        return False
+
+
+def test_template_benchmark():
+    """Test 27: Benchmark de estrategias de búsqueda"""
+    print("🎯 Test 27: Benchmark de estrategias de búsqueda...")
+    
+    try:
+        import cv2
+        import numpy as np
+        from benchmark_templates import (ASSETS_PATH, make_decoy, peaks, run_strategy,
+                                         summarize, synthetic_case)
+        from vision import TemplateRegistry
+        
+        template = TemplateRegistry(ASSETS_PATH).get("navegacion/boton_orden_venta.png")
+        assert template is not None, "Debe existir la imagen de Orden de Venta"
+        color = cv2.imread(str(template.path), cv2.IMREAD_COLOR)
+        
+        # El señuelo se parece pero no alcanza la coincidencia exacta
+        decoy = make_decoy(color)
+        similarity = float(cv2.matchTemplate(decoy, color, cv2.TM_CCOEFF_NORMED).max())
+        assert 0.5 < similarity < 0.95, f"Señuelo demasiado distinto o igual: {similarity:.3f}"
+        
+        # Segundo puntaje fuera de la vecindad del mejor
+        result = np.zeros((50, 50), dtype=np.float32)
+        result[10, 10], result[11, 11], result[40, 40] = 1.0, 0.9, 0.6
+        best, location, runner_up = peaks(result, (10, 10))
+        assert (best, location) == (1.0, (10, 10)) and abs(runner_up - 0.6) < 1e-6, \
+            f"Picos inesperados: {best}, {location}, {runner_up}"
+        
+        case = synthetic_case(template, '1080p', 1.0, 0, decoy)
+        rows = [run_strategy(strategy, template, color, case, 0.8, 2, 40, 1)
+                for strategy in ('opencv', 'piramidal', 'roi')]
+        for row in rows:
+            assert row['ok'], f"{row['strategy']} debe encontrar el botón y no el señuelo"
+            assert row['best'] > 0.99 and row['runner_up'] < 0.95, f"Puntajes inesperados: {row}"
+        
+        summary = summarize(rows, 0.05)
+        assert all(entry['usable'] for entry in summary), "Todas las estrategias deben separar el señuelo"
+        low, high = summary[0]['safe_range']
+        assert low < 0.8 < high, f"0.8 debe quedar en el rango seguro: {low:.3f}-{high:.3f}"
+        
+        print("✅ Benchmark de estrategias funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en benchmark de estrategias: {e}")
+        return False
+
+
+def test_step_spans():
+    """Test 28: Spans por paso de SAPAutomation"""
+    print("⏱️ Test 28: Spans por paso...")
+    
+    try:
+        import random
+        import logging
+        from config import PROJECT_ROOT
+        from sap_automation import SAPAutomation
+        from simulation import VirtualClock, synthetic_order
+        from spans import NULL_SPAN, Histogram, SpanRecorder
+        
+        # Percentiles por bucket
+        histogram = Histogram((0.1, 1.0, 10.0))
+        for value in (0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+        assert histogram.counts == [2, 1, 1, 0], f"Buckets inesperados: {histogram.counts}"
+        assert histogram.quantile(0.5) == 0.1 and histogram.quantile(1.0) == 5.0, "Percentiles inesperados"
+        
+        # Deshabilitado no mide ni crea objetos
+        disabled = SpanRecorder(enabled=False)
+        assert disabled.span("x") is NULL_SPAN, "Deshabilitado debe devolver NULL_SPAN"
+        with disabled.span("x") as span:
+            span.set(polls=1)
+        assert not disabled.steps, "Deshabilitado no debe registrar pasos"
+        
+        # Una orden simulada con el reloj virtual: duraciones exactas por paso
+        clock = VirtualClock()
+        spans = SpanRecorder(clock=clock.monotonic)
+        sap = SAPAutomation(logging.getLogger("test"), PROJECT_ROOT / "assets" / "images" / "sap",
+                            simulation_mode=True, clock=clock, spans=spans)
+        order = synthetic_order(random.Random(2), 1, items_mean=4)
+        assert sap.process_order(order), "La orden simulada debe procesarse"
+        
+        exported = spans.to_dict()
+        for step in ('process_order', 'navigate_to_sales_order', 'fill_order_header',
+                     'add_item', 'save_order', 'close_order_window',
+                     'find_and_click:navegacion/menu_modulos.png'):
+            assert step in exported, f"Falta el paso {step}: {sorted(exported)}"
+        assert exported['add_item']['count'] == order.item_count, "Un span por item"
+        assert abs(exported['add_item']['mean'] - 0.5) < 1e-9, "Cada item dura 0.5s simulados"
+        assert abs(exported['navigate_to_sales_order']['total'] - 1.5) < 1e-9, "Navegación: tres clicks"
+        assert abs(exported['process_order']['total'] - clock.now) < 1e-9, "La orden cubre todo el tiempo"
+        assert exported['save_order']['failed'] == 0, "El guardado no falló"
+        
+        # Los spans de cada carril quedan aparte de los del proceso principal
+        from main import MetricsCollector
+        metrics = MetricsCollector()
+        metrics.record_spans(exported)
+        metrics.record_spans({'process_order': {'count': 1}}, lane="lane1")
+        assert metrics.metrics['spans'] is exported and \
+            metrics.metrics['lane_spans'] == {"lane1": {'process_order': {'count': 1}}}, "Spans por carril"
+        
+        # Un click fallido cuenta como fallo, con sus sondeos
+        assert not sap.find_and_click("no_existe.png"), "Una imagen inexistente no se encuentra"
+        failed = spans.to_dict()['find_and_click:no_existe.png']
+        assert failed['failed'] == 1 and failed['polls']['max'] == 0, f"Fallo inesperado: {failed}"
+        
+        print("✅ Spans por paso funcionan correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en spans por paso: {e}")
+        return False
+
+
+def test_pending_watcher():
+    """Test 29: Watcher de pendientes con settle_time y requeue"""
+    print("👀 Test 29: Watcher de pendientes...")
+    
+    try:
+        import time
+        import logging
+        import tempfile
+        from watcher import PendingWatcher
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pending = Path(temp_dir)
+            (pending / "viejo.json").write_text("{}", encoding='utf-8')
+            watcher = PendingWatcher(logging.getLogger("test"), pending, ['.json'],
+                                     poll_interval=0.02, settle_time=0.2, use_inotify=False)
+            watcher.mark_existing()
+            
+            # Un archivo nuevo se entrega solo cuando lleva settle_time sin cambios
+            order_file = pending / "nuevo.json"
+            order_file.write_text("{}", encoding='utf-8')
+            (pending / "nota.txt").write_text("x", encoding='utf-8')
+            start = time.monotonic()
+            assert watcher.wait_ready(0.1) == [], "No debe entregarse antes de settle_time"
+            order_file.write_text('{"a": 1}', encoding='utf-8')
+            ready = watcher.wait_ready(2.0)
+            assert ready == [order_file], f"Debe entregarse solo el .json nuevo: {ready}"
+            assert time.monotonic() - start >= 0.3, "La escritura debe reiniciar la espera"
+            assert watcher.arrivals(ready) == 1, "Un archivo nuevo cuenta como llegada"
+            
+            # Reescrito o re-entregado, sigue siendo la misma llegada
+            order_file.write_text('{"a": 12}', encoding='utf-8')
+            ready = watcher.wait_ready(2.0)
+            assert ready == [order_file], "Un archivo reescrito se entrega de nuevo"
+            assert watcher.arrivals(ready) == 0, "Un archivo reescrito no es una llegada nueva"
+            watcher.requeue(order_file)
+            ready = watcher.wait_ready(2.0)
+            assert ready == [order_file], "requeue debe volver a entregar el archivo"
+            assert watcher.arrivals(ready) == 0, "Un archivo re-entregado no es una llegada nueva"
+            
+            # Tras salir del directorio, el mismo nombre vuelve a ser una llegada
+            order_file.unlink()
+            assert watcher.wait_ready(0.1) == []
+            order_file.write_text("{}", encoding='utf-8')
+            ready = watcher.wait_ready(2.0)
+            assert watcher.arrivals(ready) == 1, "Un archivo que volvió cuenta como llegada"
+            watcher.close()
+        
+        print("✅ Watcher de pendientes funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en watcher de pendientes: {e}")
+        return False
+
+
+def test_queue_scanner():
+    """Test 30: Escaneo de pendientes en orden de llegada y contadores O(1)"""
+    print("🗂️ Test 30: Escáner de colas...")
+    
+    try:
+        import time
+        import tempfile
+        from file_queue import QueueScanner
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pending = Path(temp_dir) / "pending"
+            completed = Path(temp_dir) / "completed"
+            pending.mkdir()
+            completed.mkdir()
+            (completed / "antigua.json").write_text("{}", encoding='utf-8')
+            
+            # Creados en orden inverso al alfabético
+            names = ["c.json", "b.json", "a.json"]
+            for name in names:
+                (pending / name).write_text("{}", encoding='utf-8')
+                time.sleep(0.02)
+            (pending / "nota.txt").write_text("x", encoding='utf-8')
+            (pending / "carpeta.json").mkdir()
+            
+            scanner = QueueScanner(pending, completed, ['.json'])
+            files = scanner.scan_pending()
+            assert len(files) == 3, f"Solo cuentan archivos .json: {len(files)}"
+            assert [path.name for path in files] == names, "Los pendientes deben salir en orden de llegada"
+            assert scanner.status() == {'pending': 3, 'completed': 1, 'total': 4}
+            
+            # Los contadores se actualizan sin volver a listar los directorios
+            (pending / "externo.json").write_text("{}", encoding='utf-8')
+            assert scanner.status()['pending'] == 3, "status() no debe re-escanear"
+            scanner.record_arrival(2)
+            scanner.record_completed()
+            assert scanner.status() == {'pending': 4, 'completed': 2, 'total': 6}
+            
+            # Sin escaneo previo, el primer status() siembra los contadores
+            fresh = QueueScanner(pending, completed, ['.json'])
+            assert fresh.status() == {'pending': 4, 'completed': 1, 'total': 5}
+        
+        print("✅ Escáner de colas funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en escáner de colas: {e}")
+        return False
+
+
+def test_backup_archive():
+    """Test 31: Archivo de backups append-only con índice"""
+    print("📦 Test 31: Archivo de backups...")
+    
+    try:
+        import tempfile
+        from backup_archive import (CODECS, INDEX_SUFFIX, BackupArchive, list_archives,
+                                    read_index, rebuild_index, restore)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            order_file = Path(temp_dir) / "grande.json"
+            order_file.write_bytes(b'{"items": [' + b'{"codigo": "A1"},' * 5000 + b'{}]}')
+            
+            # Ida y vuelta con cada códec, en memoria y por bloques
+            for codec in CODECS:
+                backup_path = Path(temp_dir) / codec
+                backup_path.mkdir()
+                archive = BackupArchive(backup_path, codec=codec, rotation='session')
+                archive.append("A.json", b'{"orden_compra": "A"}')
+                archive.append_file("grande.json", order_file, chunk_size=4096)
+                archive.append("A.json", b'{"orden_compra": "A2"}')
+                archive.close()
+                
+                assert restore(backup_path, "A.json") == b'{"orden_compra": "A2"}', \
+                    f"{codec}: debe restaurarse la copia más reciente"
+                assert restore(backup_path, "grande.json") == order_file.read_bytes(), \
+                    f"{codec}: el backup por bloques debe restaurarse igual"
+                assert restore(backup_path, "otra.json") is None
+            
+            # Índice truncado por una caída: se ignora la línea rota y se reconstruye
+            archive_path = list_archives(Path(temp_dir) / "zlib")[0]
+            index_path = archive_path.with_suffix(INDEX_SUFFIX)
+            original = read_index(archive_path)
+            index_path.write_bytes(index_path.read_bytes()[:-20])
+            assert len(read_index(archive_path)) == 2, "La línea truncada debe ignorarse"
+            rebuilt = rebuild_index(archive_path)
+            assert [(e['name'], e['offset'], e['sha256']) for e in rebuilt] == \
+                [(e['name'], e['offset'], e['sha256']) for e in original], "El índice reconstruido no coincide"
+            index_path.unlink()
+            assert len(read_index(archive_path)) == 3, "Sin índice debe reconstruirse desde el archivo"
+            assert restore(Path(temp_dir) / "zlib", "grande.json") == order_file.read_bytes()
+            
+            # cleanup conserva los más recientes y nunca el archivo abierto
+            backup_path = Path(temp_dir) / "rotacion"
+            backup_path.mkdir()
+            for day in ("20240101", "20240102", "20240103"):
+                (backup_path / f"orders_{day}.olbk").write_bytes(b'')
+                (backup_path / f"orders_{day}{INDEX_SUFFIX}").write_bytes(b'')
+            archive = BackupArchive(backup_path, rotation='session')
+            archive.append("B.json", b'{}')
+            deleted = archive.cleanup(2)
+            assert [path.name for path in deleted] == ["orders_20240101.olbk", "orders_20240102.olbk"]
+            assert not (backup_path / f"orders_20240101{INDEX_SUFFIX}").exists(), "El índice se borra con su archivo"
+            assert list_archives(backup_path) == [backup_path / "orders_20240103.olbk", archive.current_archive]
+            archive.cleanup(0)
+            assert list_archives(backup_path) == [archive.current_archive], "El archivo abierto no se borra"
+            archive.close()
+        
+        print("✅ Archivo de backups funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en archivo de backups: {e}")
+        return False
+
+
+def test_backup_confirmation():
+    """Test 32: Sin backup durable la orden queda en pendientes"""
+    print("🛡️ Test 32: Confirmación de backup...")
+    
+    from config import BACKUP_CONFIG
+    test_file = Path("data/pending/test_backup_confirmacion.json")
+    confirm_timeout = BACKUP_CONFIG['confirm_timeout']
+    try:
+        import threading
+        import tempfile
+        from backup_archive import BackupArchive, BackupWriter
+        
+        class FailingArchive(BackupArchive):
+            def append(self, name, raw):
+                raise OSError("disco lleno")
+        
+        class StalledArchive(BackupArchive):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.gate = threading.Event()
+            
+            def append(self, name, raw):
+                self.gate.wait(5)
+                return super().append(name, raw)
+        
+        test_json = {
+            "orden_compra": "TEST032",
+            "fecha_documento": "01/01/2024",
+            "comprador": {"nit": "TEST", "nombre": "Test Company"},
+            "items": [{"descripcion": "Item", "codigo": "A1", "cantidad": 1, "precio_unitario": 10}]
+        }
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for archive_class in (FailingArchive, StalledArchive):
+                order_loader = OrderLoader()
+                file_processor = order_loader.file_processor
+                archive = archive_class(Path(temp_dir))
+                file_processor.backup_writer.close()
+                file_processor.backup_writer = BackupWriter(archive, on_written=file_processor.metrics.record_backup)
+                BACKUP_CONFIG['confirm_timeout'] = 0.2
+                
+                test_file.write_text(json.dumps(test_json), encoding='utf-8')
+                completed_before = order_loader.get_queue_status()['completed']
+                assert not order_loader.queue_manager.process_file(test_file), \
+                    f"{archive_class.__name__}: la orden no debe cerrarse sin backup"
+                assert test_file.exists(), f"{archive_class.__name__}: el archivo debe quedar en pendientes"
+                assert order_loader.get_queue_status()['completed'] == completed_before
+                
+                if archive_class is StalledArchive:
+                    archive.gate.set()
+                file_processor.close()
+        
+        print("✅ Confirmación de backup funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en confirmación de backup: {e}")
+        return False
+    finally:
+        BACKUP_CONFIG['confirm_timeout'] = confirm_timeout
+        test_file.unlink(missing_ok=True)
+
+
+def test_backup_writer():
+    """Test 33: Escritor de backups con back-pressure y métricas"""
+    print("✍️ Test 33: Escritor de backups...")
+    
+    try:
+        import time
+        import threading
+        import tempfile
+        from main import MetricsCollector
+        from backup_archive import BackupArchive, BackupWriter, restore
+        
+        class GatedArchive(BackupArchive):
+            """Archivo que no escribe hasta abrir la compuerta"""
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.gate = threading.Event()
+                self.writing = threading.Event()
+            
+            def append(self, name, raw):
+                self.writing.set()
+                self.gate.wait(5)
+                if name == "falla.json":
+                    raise OSError("disco lleno")
+                return super().append(name, raw)
+        
+        def blocked_submit(writer, name, raw):
+            """Enviar desde otro hilo; devuelve (hilo, evento de enviado)"""
+            sent = threading.Event()
+            thread = threading.Thread(target=lambda: (writer.submit(name, raw), sent.set()), daemon=True)
+            thread.start()
+            return thread, sent
+        
+        for bound in ('count', 'bytes'):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                metrics = MetricsCollector()
+                archive = GatedArchive(Path(temp_dir), rotation='session')
+                if bound == 'count':
+                    writer = BackupWriter(archive, max_queue=2, on_written=metrics.record_backup)
+                    sizes = [5, 5, 5]
+                else:
+                    writer = BackupWriter(archive, max_bytes=10, on_written=metrics.record_backup)
+                    sizes = [5, 6]
+                
+                # El primer backup queda en escritura; los siguientes llenan la cola
+                futures = [writer.submit("orden_0.json", b'x' * 5)]
+                assert archive.writing.wait(2), "El hilo escritor debe tomar el primer backup"
+                futures += [writer.submit(f"orden_{i}.json", b'x' * size) for i, size in enumerate(sizes[1:], 1)]
+                thread, sent = blocked_submit(writer, "falla.json", b'x')
+                assert not sent.wait(0.2), f"submit debe bloquear con la cola llena ({bound})"
+                assert writer.depth == len(sizes) - 1
+                assert not any(future.done() for future in futures), "Nada es durable antes de escribir"
+                
+                # Al escribir se libera la cola y se confirman los futures
+                archive.gate.set()
+                assert sent.wait(2), "submit debe continuar al liberarse la cola"
+                thread.join(2)
+                assert [future.result(2)['name'] for future in futures] == \
+                    [f"orden_{i}.json" for i in range(len(sizes))]
+                writer.close(2)
+                assert restore(Path(temp_dir), "orden_0.json") == b'x' * 5, "Un future resuelto implica backup en disco"
+                
+                backup = metrics.metrics['backup']
+                assert backup['written'] == len(sizes) and backup['failed'] == 1, f"Métricas inesperadas: {backup}"
+                assert backup['queue_depth'] == 0 and backup['max_queue_depth'] >= 1
+                assert backup['max_lag'] >= 0.2 and 0 < backup['avg_lag'] <= backup['max_lag']
+                archive.close()
+        
+        print("✅ Escritor de backups funciona correctamente")
+        return True
+    except Exception as e:
+        print(f"❌ Error en escritor de backups: {e}")
+        return False
+
+
 def run_all_tests():
     """Ejecutar todos los tests"""
     print("=" * 50)
@@ -204,7 +1581,33 @@ def run_all_tests():
         test_queue_management,
         test_system_validation,
         test_sap_environment_setup,
-        test_error_handling
+        test_error_handling,
+        test_order_ingest,
+        test_completed_naming,
+        test_schema_validation,
+        test_order_pipeline,
+        test_streaming_order,
+        test_lanes,
+        test_template_registry,
+        test_wait_for_any,
+        test_location_cache,
+        test_pyramid_matching,
+        test_visual_waits,
+        test_frame_gate,
+        test_batch_mode,
+        test_bulk_paste,
+        test_timing_profiles,
+        test_screen_capture,
+        test_capacity_simulation,
+        test_throughput_benchmark,
+        test_screen_recording,
+        test_template_benchmark,
+        test_step_spans,
+        test_pending_watcher,
+        test_queue_scanner,
+        test_backup_archive,
+        test_backup_confirmation,
+        test_backup_writer
     ]
     
     passed = 0
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfiles de Tiempos - OrderLoader
+Pausas y esperas de entrada medidas por equipo con calibrate_timing.py
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import *
+
+# Tiempos que puede fijar un perfil (segundos)
+TIMING_FIELDS = (
+    'pyautogui_pause',          # Pausa de pyautogui después de cada acción
+    'type_interval',            # Intervalo entre teclas al escribir
+    'settle_time',              # Tiempo sin cambios para considerar la pantalla estable
+    'window_activation_delay',  # Espera después de Alt+Tab
+    'window_maximize_delay',    # Espera después de maximizar
+    'stabilization_delay',      # Espera al terminar de preparar el entorno SAP
+)
+
+
+class TimingProfile:
+    """
+    Conjunto de tiempos de entrada para un equipo.
+
+    El perfil 'default' reproduce los valores de config.py; los perfiles
+    calibrados guardan además el margen de seguridad aplicado y cuándo se
+    midieron.
+    """
+
+    __slots__ = TIMING_FIELDS + ('name', 'margin', 'measured_at', 'backend')
+
+    def __init__(self, name: str, pyautogui_pause: float, type_interval: float,
+                 settle_time: float, window_activation_delay: float,
+                 window_maximize_delay: float, stabilization_delay: float,
+                 margin: Optional[float] = None, measured_at: Optional[str] = None,
+                 backend: Optional[str] = None):
+        self.name = name
+        self.pyautogui_pause = pyautogui_pause
+        self.type_interval = type_interval
+        self.settle_time = settle_time
+        self.window_activation_delay = window_activation_delay
+        self.window_maximize_delay = window_maximize_delay
+        self.stabilization_delay = stabilization_delay
+        self.margin = margin
+        self.measured_at = measured_at
+        self.backend = backend
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación serializable en JSON (sin el nombre)"""
+        data = {field: round(getattr(self, field), 4) for field in TIMING_FIELDS}
+        data.update(margin=self.margin, measured_at=self.measured_at, backend=self.backend)
+        return data
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any], base: 'TimingProfile') -> 'TimingProfile':
+        """
+        Construir un perfil desde JSON.
+
+        Los tiempos que falten o no sean números no negativos se toman de base.
+        """
+        values = {}
+        for field in TIMING_FIELDS:
+            value = data.get(field)
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0
+            values[field] = float(value) if valid else getattr(base, field)
+        return cls(name, margin=data.get('margin'), measured_at=data.get('measured_at'),
+                   backend=data.get('backend'), **values)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{field}={getattr(self, field):.3f}" for field in TIMING_FIELDS)
+        return f"TimingProfile({self.name!r}, {values})"
+
+
+def default_profile() -> TimingProfile:
+    """Perfil con los tiempos fijos de config.py"""
+    return TimingProfile(
+        'default',
+        pyautogui_pause=PYAUTOGUI_PAUSE,
+        type_interval=SAP_AUTOMATION_CONFIG['type_interval'],
+        settle_time=SAP_AUTOMATION_CONFIG['settle_time'],
+        window_activation_delay=WINDOW_ACTIVATION_DELAY,
+        window_maximize_delay=WINDOW_MAXIMIZE_DELAY,
+        stabilization_delay=SYSTEM_STABILIZATION_DELAY,
+    )
+
+
+def profiles_path() -> Path:
+    """Archivo de perfiles configurado"""
+    return PROJECT_ROOT / TIMING_CONFIG['profiles_file']
+
+
+def read_profiles(path: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Leer todos los perfiles guardados.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Perfiles por nombre (vacío si no hay archivo)
+    """
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+    profiles = data.get('profiles') if isinstance(data, dict) else None
+    return profiles if isinstance(profiles, dict) else {}
+
+
+def load_profile(name: Optional[str] = None, path: Optional[Path] = None,
+                 logger: Optional[logging.Logger] = None) -> TimingProfile:
+    """
+    Cargar un perfil de tiempos.
+
+    Args:
+        name: Nombre del perfil (por defecto TIMING_CONFIG['profile'])
+        path: Archivo de perfiles (por defecto TIMING_CONFIG['profiles_file'])
+        logger: Logger para avisos
+
+    Returns:
+        TimingProfile: El perfil pedido, o el de config.py si no existe o
+        el archivo no se puede leer
+    """
+    logger = logger or logging.getLogger(__name__)
+    name = name or TIMING_CONFIG['profile']
+    base = default_profile()
+    if name == base.name:
+        return base
+
+    path = path or profiles_path()
+    try:
+        profiles = read_profiles(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ No se pudo leer {path.name}: {e}. Usando tiempos por defecto")
+        return base
+
+    data = profiles.get(name)
+    if not isinstance(data, dict):
+        logger.warning(f"⚠️ Perfil de tiempos '{name}' no encontrado, usando tiempos por defecto "
+                       f"(ejecuta calibrate_timing.py --profile {name})")
+        return base
+
+    profile = TimingProfile.from_dict(name, data, base)
+    logger.info(f"⏱️ Perfil de tiempos '{name}' cargado (pausa {profile.pyautogui_pause:.3f}s, "
+                f"tecla {profile.type_interval:.3f}s, estable {profile.settle_time:.3f}s)")
+    return profile
+
+
+def save_profile(profile: TimingProfile, path: Optional[Path] = None):
+    """
+    Guardar (o reemplazar) un perfil de forma atómica, conservando los demás.
+
+    Args:
+        profile: Perfil a guardar
+        path: Archivo de perfiles (por defecto TIMING_CONFIG['profiles_file'])
+    """
+    path = path or profiles_path()
+    profiles = read_profiles(path)
+    profiles[profile.name] = profile.to_dict()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(path.suffix + '.tmp')
+    temp_path.write_text(json.dumps({'profiles': profiles}, indent=2, ensure_ascii=False),
+                         encoding='utf-8')
+    os.replace(temp_path, path)
@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Visión - OrderLoader
+Plantillas decodificadas una sola vez y búsqueda con OpenCV
+"""
+
+import os
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # Sin OpenCV se usa pyautogui.locateOnScreen
+    cv2 = None
+    np = None
+
+# Extensiones de imagen reconocidas como plantillas
+TEMPLATE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+Box = Tuple[int, int, int, int]
+
+# Búsqueda piramidal: lado y área mínimos de la plantilla reducida, puntaje mínimo
+# del nivel reducido ante cualquier desplazamiento, área mínima de captura
+# para que valga la pena reducirla, margen de puntaje en el nivel reducido
+# y candidatos que se refinan a resolución completa
+PYRAMID_MIN_TEMPLATE_SIDE = 6
+PYRAMID_MIN_TEMPLATE_AREA = 256
+PYRAMID_MIN_PHASE_SCORE = 0.75
+PYRAMID_MIN_SCREEN_AREA = 640 * 480
+PYRAMID_COARSE_MARGIN = 0.25
+PYRAMID_TOP_CANDIDATES = 5
+
+
+class MatchResult:
+    """Coincidencia de una plantilla: cuál, dónde (en pantalla) y con qué puntaje"""
+
+    __slots__ = ('name', 'box', 'score')
+
+    def __init__(self, name: str, box: Box, score: float):
+        self.name = name
+        self.box = box
+        self.score = score
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        """Centro de la coincidencia (para hacer clic)"""
+        x, y, width, height = self.box
+        return x + width // 2, y + height // 2
+
+    def __repr__(self) -> str:
+        return f"MatchResult({self.name!r}, box={self.box}, score={self.score:.3f})"
+
+
+class Template:
+    """
+    Plantilla decodificada en memoria.
+
+    gray es la imagen en escala de grises (uint8); mask solo existe si la
+    imagen tiene píxeles transparentes. pyramid guarda las versiones
+    reducidas a la mitad (niveles 1, 2, ...) para la búsqueda piramidal.
+    Sin OpenCV, gray y mask son None y solo se conserva la ruta.
+    """
+
+    __slots__ = ('name', 'path', 'gray', 'mask', 'width', 'height', 'mtime_ns', 'pyramid')
+
+    def __init__(self, name: str, path: Path, gray: Any = None, mask: Any = None,
+                 width: int = 0, height: int = 0, mtime_ns: int = 0,
+                 pyramid: Tuple[Any, ...] = ()):
+        self.name = name
+        self.path = path
+        self.gray = gray
+        self.mask = mask
+        self.width = width
+        self.height = height
+        self.mtime_ns = mtime_ns
+        self.pyramid = pyramid
+
+    @property
+    def decoded(self) -> bool:
+        """True si la plantilla está decodificada para OpenCV"""
+        return self.gray is not None
+
+
+def _phase_score(gray: Any, level_template: Any, level: int) -> float:
+    """
+    Peor puntaje de un nivel reducido frente a la plantilla desplazada.
+
+    En pantalla la plantilla puede caer en cualquier posición respecto a
+    la rejilla de reducción: se prueban todos los desplazamientos de
+    0 a 2**level - 1 píxeles, con entorno negro y blanco.
+    """
+    scale = 1 << level
+    worst = 1.0
+    for border in (0, 255):
+        padded = cv2.copyMakeBorder(gray, 2 * scale, 2 * scale, 2 * scale, 2 * scale,
+                                    cv2.BORDER_CONSTANT, value=border)
+        for dy in range(scale):
+            for dx in range(scale):
+                shifted = padded[dy:, dx:]
+                for _ in range(level):
+                    shifted = cv2.pyrDown(shifted)
+                result = cv2.matchTemplate(shifted, level_template, cv2.TM_CCOEFF_NORMED)
+                worst = min(worst, float(np.nan_to_num(result.max(), nan=-1.0)))
+    return worst
+
+
+def build_pyramid(gray: Any, max_levels: int = 3) -> Tuple[Any, ...]:
+    """
+    Reducir una plantilla a la mitad sucesivamente (cv2.pyrDown).
+
+    Cada nivel se recorta un píxel por lado: el borde reducido mezcla
+    píxeles de fuera de la plantilla y en pantalla nunca coincide. Se
+    detiene cuando la plantilla reducida sería más chica que
+    PYRAMID_MIN_TEMPLATE_SIDE / PYRAMID_MIN_TEMPLATE_AREA (con pocos
+    píxeles se confunde con otros elementos) o cuando el nivel ya no
+    reconoce la plantilla desplazada con PYRAMID_MIN_PHASE_SCORE
+    (detalles finos que la reducción borra).
+
+    Args:
+        gray: Plantilla en escala de grises
+        max_levels: Niveles reducidos como máximo
+
+    Returns:
+        Tuple[np.ndarray, ...]: Niveles 1..N recortados (el nivel 0 es gray)
+    """
+    levels = []
+    current = gray
+    while len(levels) < max_levels:
+        current = cv2.pyrDown(current)
+        trimmed = np.ascontiguousarray(current[1:-1, 1:-1])
+        if (min(trimmed.shape[:2]) < PYRAMID_MIN_TEMPLATE_SIDE
+                or trimmed.size < PYRAMID_MIN_TEMPLATE_AREA):
+            break
+        if _phase_score(gray, trimmed, len(levels) + 1) < PYRAMID_MIN_PHASE_SCORE:
+            break
+        levels.append(trimmed)
+    return tuple(levels)
+
+
+def decode_template(name: str, path: Path) -> Template:
+    """
+    Leer y decodificar una imagen de referencia.
+
+    Args:
+        name: Nombre relativo a assets (ej. 'navegacion/menu_modulos.png')
+        path: Ruta absoluta de la imagen
+
+    Returns:
+        Template: Plantilla en escala de grises con su máscara
+
+    Raises:
+        FileNotFoundError: Si la imagen no existe
+        ValueError: Si la imagen no se puede decodificar
+    """
+    mtime_ns = path.stat().st_mtime_ns
+    if cv2 is None:
+        return Template(name, path, mtime_ns=mtime_ns)
+
+    # imdecode sobre los bytes evita problemas de cv2.imread con rutas no ASCII
+    image = cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"No se pudo decodificar {path}")
+
+    mask = None
+    if image.ndim == 2:
+        gray = image
+    elif image.shape[2] == 4:
+        alpha = image[:, :, 3]
+        if alpha.min() < 255:
+            mask = alpha
+        gray = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+    else:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    height, width = gray.shape
+    gray = np.ascontiguousarray(gray)
+    # Las plantillas con máscara se buscan siempre a resolución completa
+    pyramid = build_pyramid(gray) if mask is None else ()
+    return Template(name, path, gray, mask, width, height, mtime_ns, pyramid)
+
+
+class TemplateRegistry:
+    """
+    Registro de plantillas con caché LRU.
+
+    Las imágenes de assets se decodifican una sola vez (al precargar o en
+    el primer uso) y se reutilizan en cada sondeo. Cuando hay más imágenes
+    que max_entries se descartan las menos usadas recientemente.
+    """
+
+    def __init__(self, assets_path: Path, max_entries: int = 64,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Inicializar registro.
+
+        Args:
+            assets_path: Directorio raíz de las imágenes de referencia
+            max_entries: Máximo de plantillas decodificadas en memoria
+            logger: Logger para registro de eventos
+        """
+        self.assets_path = Path(assets_path)
+        self.max_entries = max(max_entries, 1)
+        self.logger = logger or logging.getLogger(__name__)
+        self._cache: "OrderedDict[str, Template]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def available(self) -> bool:
+        """True si OpenCV está disponible para buscar con las plantillas"""
+        return cv2 is not None
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._cache
+
+    def iter_assets(self) -> Iterator[str]:
+        """Nombres relativos de todas las imágenes bajo assets_path"""
+        if not self.assets_path.is_dir():
+            return
+        for path in sorted(self.assets_path.rglob('*')):
+            if path.suffix.lower() in TEMPLATE_EXTENSIONS and path.is_file():
+                yield path.relative_to(self.assets_path).as_posix()
+
+    def preload(self) -> int:
+        """
+        Decodificar por adelantado las imágenes de assets (hasta max_entries).
+
+        Returns:
+            int: Plantillas cargadas
+        """
+        loaded = 0
+        for name in self.iter_assets():
+            if loaded >= self.max_entries:
+                break
+            if self.get(name) is not None:
+                loaded += 1
+        self.logger.info(f"🖼️ {loaded} plantillas precargadas desde {self.assets_path}")
+        return loaded
+
+    def get(self, name: str) -> Optional[Template]:
+        """
+        Obtener una plantilla, decodificándola si no está en caché o si
+        la imagen cambió en disco desde que se decodificó.
+
+        Args:
+            name: Nombre relativo a assets_path
+
+        Returns:
+            Optional[Template]: Plantilla, o None si la imagen no existe o no se puede leer
+        """
+        template = self._cache.get(name)
+        if template is not None:
+            try:
+                mtime_ns = template.path.stat().st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            if mtime_ns == template.mtime_ns:
+                self._cache.move_to_end(name)
+                self.hits += 1
+                return template
+            # Imagen reemplazada o borrada en disco: volver a leerla
+            del self._cache[name]
+
+        self.misses += 1
+        try:
+            template = decode_template(name, self.assets_path / name)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.error(f"❌ No se pudo cargar la plantilla {name}: {e}")
+            return None
+
+        self._cache[name] = template
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return template
+
+    def invalidate(self, name: Optional[str] = None):
+        """Descartar una plantilla (o todas) para releerla del disco"""
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
+
+
+class LocationCache:
+    """
+    Última posición conocida de cada plantilla, persistida entre ejecuciones.
+
+    Las búsquedas prueban primero una región con margen alrededor de la
+    última coincidencia. Las posiciones solo valen para una geometría
+    (resolución y ventana): si cambia, el caché se vacía.
+    """
+
+    def __init__(self, path: Optional[Path] = None, padding: int = 40,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Inicializar caché de posiciones.
+
+        Args:
+            path: Archivo JSON de estado (None = solo en memoria)
+            padding: Margen en píxeles alrededor de la última posición
+            logger: Logger para registro de eventos
+        """
+        self.path = Path(path) if path else None
+        self.padding = padding
+        self.logger = logger or logging.getLogger(__name__)
+        self.geometry: Optional[Tuple[int, ...]] = None
+        self.locations: Dict[str, Box] = {}
+
+    def load(self) -> int:
+        """
+        Leer el estado guardado (un archivo dañado se ignora).
+
+        Returns:
+            int: Posiciones cargadas
+        """
+        if self.path is None or not self.path.exists():
+            return 0
+        try:
+            state = json.loads(self.path.read_text(encoding='utf-8'))
+            geometry = state.get('geometry')
+            self.geometry = tuple(geometry) if geometry else None
+            self.locations = {name: tuple(box) for name, box in state.get('locations', {}).items()}
+        except Exception as e:
+            self.logger.warning(f"⚠️ Estado de posiciones ignorado ({self.path.name}): {e}")
+            self.geometry = None
+            self.locations = {}
+        return len(self.locations)
+
+    def save(self):
+        """Guardar el estado de forma atómica"""
+        if self.path is None:
+            return
+        state = {
+            'geometry': list(self.geometry) if self.geometry else None,
+            'locations': {name: list(box) for name, box in self.locations.items()},
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            temp_path.write_text(json.dumps(state, indent=2), encoding='utf-8')
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"⚠️ No se pudo guardar el estado de posiciones: {e}")
+
+    def ensure_geometry(self, geometry: Tuple[int, ...]) -> bool:
+        """
+        Verificar que las posiciones correspondan a la geometría actual.
+
+        Args:
+            geometry: Resolución de pantalla y caja de la ventana activa
+
+        Returns:
+            bool: True si el caché sigue vigente, False si se vació
+        """
+        geometry = tuple(geometry)
+        if geometry == self.geometry:
+            return True
+        if self.locations:
+            self.logger.info("📐 Cambió la resolución o la ventana: posiciones descartadas")
+        self.geometry = geometry
+        self.locations = {}
+        self.save()
+        return False
+
+    def get(self, name: str) -> Optional[Box]:
+        """Última posición conocida de una plantilla"""
+        return self.locations.get(name)
+
+    def record(self, name: str, box: Box):
+        """Anotar la posición de una coincidencia (guarda solo si cambió)"""
+        box = tuple(int(v) for v in box)
+        if self.locations.get(name) != box:
+            self.locations[name] = box
+            self.save()
+
+    def forget(self, name: str):
+        """Descartar la posición de una plantilla"""
+        if self.locations.pop(name, None) is not None:
+            self.save()
+
+    def roi(self, names: Iterable[str], screen_size: Tuple[int, int]) -> Optional[Box]:
+        """
+        Región con margen que cubre la última posición de todas las plantillas.
+
+        Args:
+            names: Plantillas a buscar
+            screen_size: (ancho, alto) de la pantalla
+
+        Returns:
+            Optional[Box]: Región (x, y, ancho, alto), o None si alguna
+            plantilla no tiene posición conocida
+        """
+        boxes = [self.locations.get(name) for name in names]
+        if not boxes or any(box is None for box in boxes):
+            return None
+
+        screen_width, screen_height = screen_size
+        left = max(min(x for x, _, _, _ in boxes) - self.padding, 0)
+        top = max(min(y for _, y, _, _ in boxes) - self.padding, 0)
+        right = min(max(x + w for x, _, w, _ in boxes) + self.padding, screen_width)
+        bottom = min(max(y + h for _, y, _, h in boxes) + self.padding, screen_height)
+        if right <= left or bottom <= top:
+            return None
+        return (left, top, right - left, bottom - top)
+
+
+def to_gray(image: Any) -> Any:
+    """
+    Convertir una captura (PIL o arreglo RGB/RGBA) a escala de grises.
+
+    Args:
+        image: Captura de pantalla
+
+    Returns:
+        np.ndarray: Imagen uint8 en escala de grises
+    """
+    array = np.asarray(image)
+    if array.ndim == 2:
+        return array
+    if array.shape[2] == 4:
+        return cv2.cvtColor(array, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+
+
+def frame_difference(before: Any, after: Any, pixel_threshold: int = 16) -> float:
+    """
+    Fracción de píxeles que cambiaron entre dos capturas.
+
+    Args:
+        before: Captura en escala de grises (np.ndarray, o imagen PIL en
+            modo 'L' sin OpenCV)
+        after: Captura posterior de la misma región
+        pixel_threshold: Diferencia mínima de intensidad para contar un
+            píxel como cambiado (ignora ruido de compresión y suavizado)
+
+    Returns:
+        float: 0.0 (idénticas) a 1.0 (todo cambió o cambió el tamaño)
+    """
+    if cv2 is None:
+        from PIL import ImageChops
+        if before.size != after.size:
+            return 1.0
+        histogram = ImageChops.difference(before, after).histogram()
+        return sum(histogram[pixel_threshold + 1:]) / (before.size[0] * before.size[1])
+
+    if before.shape != after.shape:
+        return 1.0
+    diff = cv2.absdiff(before, after)
+    _, changed = cv2.threshold(diff, pixel_threshold, 255, cv2.THRESH_BINARY)
+    return cv2.countNonZero(changed) / diff.size
+
+
+class FrameGate:
+    """
+    Omitir búsquedas sobre capturas que no cambiaron.
+
+    Mientras se espera una plantilla, guarda la última captura de cada
+    región sin coincidencias. Si la siguiente es idéntica píxel a píxel,
+    la búsqueda daría el mismo resultado y se omite. Comparar dos
+    capturas cuesta una fracción de matchTemplate.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[], None]] = None):
+        """
+        Inicializar filtro.
+
+        Args:
+            on_change: Se llama cuando una región cambia respecto al sondeo
+                anterior (ej. para volver el intervalo de sondeo al mínimo)
+        """
+        self.on_change = on_change
+        self.skipped = 0
+        self._frames: Dict[Any, Any] = {}
+
+    def unchanged(self, key: Any, frame: Any) -> bool:
+        """
+        Registrar una captura y decir si es igual a la anterior.
+
+        Args:
+            key: Identificador de la región capturada
+            frame: Captura en escala de grises
+
+        Returns:
+            bool: True si es idéntica a la captura anterior de la región
+        """
+        previous = self._frames.get(key)
+        self._frames[key] = frame
+        if previous is None:
+            return False
+        if previous.shape == frame.shape and cv2.norm(previous, frame, cv2.NORM_INF) == 0:
+            self.skipped += 1
+            return True
+        if self.on_change is not None:
+            self.on_change()
+        return False
+
+
+class Frame:
+    """
+    Captura en escala de grises con su pirámide calculada bajo demanda.
+
+    Al buscar varias plantillas sobre la misma captura, cada nivel
+    reducido se calcula una sola vez.
+    """
+
+    __slots__ = ('gray', '_levels')
+
+    def __init__(self, gray: Any):
+        self.gray = gray
+        self._levels = [gray]
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.gray.shape
+
+    def level(self, n: int) -> Any:
+        """Captura reducida n veces a la mitad"""
+        while len(self._levels) <= n:
+            self._levels.append(cv2.pyrDown(self._levels[-1]))
+        return self._levels[n]
+
+
+def _match_full(screen_gray: Any, template: Template) -> Tuple[Box, float]:
+    if template.mask is not None:
+        result = cv2.matchTemplate(screen_gray, template.gray, cv2.TM_CCORR_NORMED, mask=template.mask)
+    else:
+        result = cv2.matchTemplate(screen_gray, template.gray, cv2.TM_CCOEFF_NORMED)
+    _, score, _, (x, y) = cv2.minMaxLoc(result)
+    return (x, y, template.width, template.height), score
+
+
+def _match_pyramid(frame: Frame, template: Template, confidence: float,
+                   level: int) -> Optional[Tuple[Box, float]]:
+    """
+    Búsqueda gruesa a fina.
+
+    Busca en el nivel reducido con un umbral más bajo, y refina a
+    resolución completa solo una ventana pequeña alrededor de los mejores
+    candidatos. El puntaje devuelto es el de resolución completa, así que
+    confidence significa lo mismo que en la búsqueda directa.
+    """
+    scale = 1 << level
+    small_template = template.pyramid[level - 1]
+    small_height, small_width = small_template.shape
+    small_screen = frame.level(level)
+    if small_width > small_screen.shape[1] or small_height > small_screen.shape[0]:
+        return None
+    result = cv2.matchTemplate(small_screen, small_template, cv2.TM_CCOEFF_NORMED)
+    np.nan_to_num(result, copy=False, nan=-1.0)
+
+    screen = frame.gray
+    screen_height, screen_width = screen.shape[:2]
+    coarse_threshold = confidence - PYRAMID_COARSE_MARGIN
+    best: Optional[Tuple[Box, float]] = None
+
+    for _ in range(PYRAMID_TOP_CANDIDATES):
+        _, coarse_score, _, (cx, cy) = cv2.minMaxLoc(result)
+        if coarse_score < coarse_threshold:
+            break
+        # Suprimir la vecindad del candidato para tomar el siguiente máximo
+        result[max(cy - small_height // 2, 0):cy + small_height // 2 + 1,
+               max(cx - small_width // 2, 0):cx + small_width // 2 + 1] = -1.0
+
+        # El nivel está recortado un píxel; pyrDown desplaza y suaviza, así
+        # que se refina con un margen de dos píxeles reducidos
+        x0, y0 = (cx - 1) * scale, (cy - 1) * scale
+        pad = 2 * scale
+        left = max(x0 - pad, 0)
+        top = max(y0 - pad, 0)
+        right = min(x0 + pad + template.width, screen_width)
+        bottom = min(y0 + pad + template.height, screen_height)
+        if right - left < template.width or bottom - top < template.height:
+            continue
+
+        refined = cv2.matchTemplate(screen[top:bottom, left:right], template.gray, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(refined)
+        if score >= confidence and (best is None or score > best[1]):
+            best = ((left + x, top + y, template.width, template.height), float(score))
+    return best
+
+
+def match_template(screen_gray: Any, template: Template, confidence: float,
+                   max_level: int = 0) -> Optional[Tuple[Box, float]]:
+    """
+    Buscar una plantilla en una imagen en escala de grises.
+
+    Args:
+        screen_gray: Imagen donde buscar (uint8, escala de grises) o Frame
+        template: Plantilla decodificada
+        confidence: Puntaje mínimo de coincidencia (0.0 - 1.0)
+        max_level: Niveles de reducción permitidos para la búsqueda
+            piramidal (0 = siempre a resolución completa). Solo se usa en
+            capturas grandes y con plantillas que lo permiten.
+
+    Returns:
+        Optional[Tuple[Box, float]]: ((x, y, ancho, alto), puntaje) de la
+        mejor coincidencia, o None si no alcanza confidence
+    """
+    frame = screen_gray if isinstance(screen_gray, Frame) else Frame(screen_gray)
+    screen_height, screen_width = frame.shape[:2]
+    if template.width > screen_width or template.height > screen_height:
+        return None
+
+    level = min(max_level, len(template.pyramid))
+    if level and screen_height * screen_width >= PYRAMID_MIN_SCREEN_AREA:
+        return _match_pyramid(frame, template, confidence, level)
+
+    box, score = _match_full(frame.gray, template)
+    if not score >= confidence:  # también descarta NaN
+        return None
+    return box, float(score)
+
+
+def match_any(screen_gray: Any, candidates: Sequence[Tuple[Template, float]],
+              offset: Tuple[int, int] = (0, 0), max_level: int = 0) -> Optional[MatchResult]:
+    """
+    Buscar varias plantillas sobre una misma captura.
+
+    Las plantillas se prueban en el orden dado (prioridad) y se devuelve la
+    primera que alcanza su confidence.
+
+    Args:
+        screen_gray: Captura en escala de grises
+        candidates: Pares (plantilla, confidence) en orden de prioridad
+        offset: Origen de la captura en pantalla (si es de una región)
+        max_level: Niveles de búsqueda piramidal (ver match_template)
+
+    Returns:
+        Optional[MatchResult]: Primera coincidencia, o None
+    """
+    frame = Frame(screen_gray)
+    for template, confidence in candidates:
+        match = match_template(frame, template, confidence, max_level)
+        if match is not None:
+            (x, y, width, height), score = match
+            return MatchResult(template.name, (x + offset[0], y + offset[1], width, height), score)
+    return None
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watcher de data/pending - OrderLoader
+Detecta órdenes nuevas con inotify (Linux) o sondeo como respaldo
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# Constantes de inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifySource:
+    """
+    Fuente de eventos basada en inotify (solo Linux).
+
+    Usa la libc vía ctypes, sin dependencias externas.
+    """
+
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY | IN_MOVED_FROM | IN_DELETE
+
+    def __init__(self, path: Path):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc no disponible")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), self.WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, os.strerror(err))
+
+    def wait(self, timeout: float) -> Tuple[Set[str], Set[str], bool]:
+        """
+        Esperar eventos del directorio.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+
+        Returns:
+            Tuple: (nombres modificados, nombres eliminados, desbordamiento)
+        """
+        changed: Set[str] = set()
+        removed: Set[str] = set()
+        overflow = False
+
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not readable:
+            return changed, removed, overflow
+
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, name_len = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset:offset + name_len].rstrip(b'\0').decode('utf-8', 'replace')
+                offset += name_len
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & (IN_MOVED_FROM | IN_DELETE):
+                    removed.add(name)
+                    changed.discard(name)
+                elif name:
+                    changed.add(name)
+                    removed.discard(name)
+
+        return changed, removed, overflow
+
+    def close(self):
+        """Cerrar descriptor de inotify"""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PendingWatcher:
+    """
+    Observador del directorio de pendientes.
+
+    Entrega cada archivo nuevo una sola vez, cuando su tamaño y mtime
+    se mantienen estables durante settle_time (archivo terminado de
+    escribir). Usa inotify en Linux y sondeo con os.scandir en el resto.
+    """
+
+    def __init__(self, logger: logging.Logger, path: Path, extensions: List[str],
+                 poll_interval: float = 0.5, settle_time: float = 0.3,
+                 rescan_interval: float = 30.0, use_inotify: bool = True):
+        """
+        Inicializar watcher.
+
+        Args:
+            logger: Logger para registro de eventos
+            path: Directorio a observar
+            extensions: Extensiones aceptadas (ej. ['.json'])
+            poll_interval: Intervalo de sondeo en segundos (modo respaldo)
+            settle_time: Tiempo que tamaño y mtime deben permanecer estables
+            rescan_interval: Cada cuánto re-escanear completo en modo inotify
+            use_inotify: Si True, intenta usar inotify en Linux
+        """
+        self.logger = logger
+        self.path = path
+        self.extensions = {ext.lower() for ext in extensions}
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.rescan_interval = rescan_interval
+
+        # nombre -> (tamaño, mtime_ns, instante del último cambio observado)
+        self._candidates: Dict[str, Tuple[int, int, float]] = {}
+        # nombre -> (tamaño, mtime_ns) con que fue entregado
+        self._emitted: Dict[str, Tuple[int, int]] = {}
+        # Nombres presentes ya contados como llegadas (se olvidan al desaparecer)
+        self._arrived: Set[str] = set()
+        self._last_rescan = 0.0
+
+        self._inotify: Optional[InotifySource] = None
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self._inotify = InotifySource(path)
+            except OSError as e:
+                self.logger.warning(f"⚠️ inotify no disponible, usando sondeo: {e}")
+
+        mode = "inotify" if self._inotify else f"sondeo cada {poll_interval}s"
+        self.logger.info(f"👀 Observando {path} ({mode})")
+
+    def _accepts(self, name: str) -> bool:
+        return os.path.splitext(name)[1].lower() in self.extensions
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Listar el directorio con os.scandir.
+
+        Returns:
+            Dict: nombre -> (tamaño, mtime_ns), usando el stat cacheado de DirEntry
+        """
+        signatures = {}
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if not self._accepts(entry.name):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    signatures[entry.name] = (st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        return signatures
+
+    def mark_existing(self):
+        """
+        Marcar los archivos ya presentes como entregados.
+
+        Se usa al arrancar, cuando la cola existente se procesa aparte.
+        """
+        self._emitted.update(self._scan())
+        self._arrived.update(self._emitted)
+        self._last_rescan = time.monotonic()
+
+    def arrivals(self, paths: List[Path]) -> int:
+        """
+        Contar cuántos archivos entregados son llegadas nuevas.
+
+        Un archivo reescrito o re-entregado con requeue() que sigue en el
+        directorio ya fue contado: solo cuentan los nombres no vistos.
+
+        Args:
+            paths: Archivos entregados por wait_ready()
+
+        Returns:
+            int: Número de archivos nuevos
+        """
+        names = {path.name for path in paths}
+        new = names - self._arrived
+        self._arrived.update(new)
+        return len(new)
+
+    def _forget(self, name: str):
+        """Olvidar un archivo que ya no está en el directorio"""
+        self._candidates.pop(name, None)
+        self._emitted.pop(name, None)
+        self._arrived.discard(name)
+
+    def requeue(self, file_path: Path):
+        """
+        Volver a entregar un archivo en la próxima espera.
+
+        Se usa cuando un archivo entregado no pudo procesarse todavía
+        (por ejemplo, si el entorno SAP no estaba listo).
+        """
+        self._emitted.pop(file_path.name, None)
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            self._candidates.pop(file_path.name, None)
+            return
+        self._candidates[file_path.name] = (st.st_size, st.st_mtime_ns, 0.0)
+
+    def _stat_names(self, names: Set[str]) -> Dict[str, Tuple[int, int]]:
+        """Obtener firma (tamaño, mtime_ns) de nombres reportados por inotify"""
+        signatures = {}
+        for name in names:
+            if not self._accepts(name):
+                continue
+            try:
+                st = os.stat(self.path / name)
+            except FileNotFoundError:
+                self._forget(name)
+                continue
+            signatures[name] = (st.st_size, st.st_mtime_ns)
+        return signatures
+
+    def _observe(self, signatures: Dict[str, Tuple[int, int]]):
+        """Registrar como candidatos los archivos nuevos o modificados"""
+        now = time.monotonic()
+        for name, signature in signatures.items():
+            if self._emitted.get(name) == signature:
+                continue
+            previous = self._candidates.get(name)
+            if previous is None or previous[:2] != signature:
+                self._candidates[name] = (signature[0], signature[1], now)
+
+    def _drop_missing(self, present: Dict[str, Tuple[int, int]]):
+        for name in set(self._emitted) | set(self._candidates) | self._arrived:
+            if name not in present:
+                self._forget(name)
+
+    def _collect_ready(self) -> List[Path]:
+        """Entregar los candidatos cuyo tamaño y mtime ya son estables"""
+        now = time.monotonic()
+        ready = []
+        for name, (size, mtime_ns, changed_at) in list(self._candidates.items()):
+            try:
+                st = os.stat(self.path / name)
+            except FileNotFoundError:
+                self._forget(name)
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                self._candidates[name] = (st.st_size, st.st_mtime_ns, now)
+                continue
+            if now - changed_at >= self.settle_time:
+                del self._candidates[name]
+                self._emitted[name] = (size, mtime_ns)
+                ready.append((mtime_ns, name))
+        ready.sort()
+        return [self.path / name for _, name in ready]
+
+    def wait_ready(self, timeout: float) -> List[Path]:
+        """
+        Esperar archivos nuevos y estables.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+
+        Returns:
+            List[Path]: Archivos listos, en orden de llegada (vacía si timeout)
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            now = time.monotonic()
+            remaining = deadline - now
+            # Con candidatos pendientes se revisa con más frecuencia para
+            # entregar apenas se cumpla settle_time
+            if self._candidates:
+                step = min(self.settle_time / 3, self.poll_interval)
+            else:
+                step = self.poll_interval
+            step = max(min(step, remaining), 0)
+
+            if self._inotify:
+                changed, removed, overflow = self._inotify.wait(step)
+                for name in removed:
+                    self._forget(name)
+                if overflow or time.monotonic() - self._last_rescan >= self.rescan_interval:
+                    if overflow:
+                        self.logger.warning("⚠️ Desbordamiento de inotify, re-escaneando")
+                    present = self._scan()
+                    self._drop_missing(present)
+                    self._observe(present)
+                    self._last_rescan = time.monotonic()
+                else:
+                    self._observe(self._stat_names(changed))
+            else:
+                time.sleep(step)
+                present = self._scan()
+                self._drop_missing(present)
+                self._observe(present)
+
+            ready = self._collect_ready()
+            if ready or time.monotonic() >= deadline:
+                return ready
+
+    def close(self):
+        """Liberar recursos del watcher"""
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()